@@ -0,0 +1,29 @@
+"""record model version on health entries
+
+Revision ID: 0002_health_entry_model_version
+Revises: 0001_initial
+Create Date: 2026-10-18
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "0002_health_entry_model_version"
+down_revision: Union[str, Sequence[str], None] = "0001_initial"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("health_entries", sa.Column("model_version", sa.String(length=64), nullable=True))
+    op.create_index(
+        "ix_health_entries_model_version", "health_entries", ["model_version"], unique=False
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_health_entries_model_version", table_name="health_entries")
+    op.drop_column("health_entries", "model_version")
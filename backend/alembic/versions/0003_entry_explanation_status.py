@@ -0,0 +1,27 @@
+"""track deferred explanation status on health entries
+
+Revision ID: 0003_entry_explanation_status
+Revises: 0002_health_entry_model_version
+Create Date: 2026-10-18
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "0003_entry_explanation_status"
+down_revision: Union[str, Sequence[str], None] = "0002_health_entry_model_version"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "health_entries", sa.Column("explanation_status", sa.String(length=16), nullable=True)
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("health_entries", "explanation_status")
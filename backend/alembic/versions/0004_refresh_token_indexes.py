@@ -0,0 +1,39 @@
+"""index refresh tokens by user and drop the redundant id index
+
+Revision ID: 0004_refresh_token_indexes
+Revises: 0003_entry_explanation_status
+Create Date: 2026-10-18
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "0004_refresh_token_indexes"
+down_revision: Union[str, Sequence[str], None] = "0003_entry_explanation_status"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # On PostgreSQL the index is built without locking out logins on a large table.
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_refresh_tokens_user_id_revoked",
+            "refresh_tokens",
+            ["user_id", "revoked"],
+            postgresql_concurrently=True,
+        )
+    # The primary key is already indexed; this one only slowed down every insert and delete.
+    op.drop_index("ix_refresh_tokens_id", table_name="refresh_tokens")
+
+
+def downgrade() -> None:
+    op.create_index("ix_refresh_tokens_id", "refresh_tokens", ["id"], unique=False)
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_refresh_tokens_user_id_revoked",
+            table_name="refresh_tokens",
+            postgresql_concurrently=True,
+        )
@@ -0,0 +1,36 @@
+"""index health entries for keyset-paginated history
+
+Revision ID: 0005_entry_history_index
+Revises: 0004_refresh_token_indexes
+Create Date: 2026-10-18
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "0005_entry_history_index"
+down_revision: Union[str, Sequence[str], None] = "0004_refresh_token_indexes"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Also serves the user_id foreign key, so no separate user_id index is needed.
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_health_entries_user_id_recorded_at_id",
+            "health_entries",
+            ["user_id", "recorded_at", "id"],
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_health_entries_user_id_recorded_at_id",
+            table_name="health_entries",
+            postgresql_concurrently=True,
+        )
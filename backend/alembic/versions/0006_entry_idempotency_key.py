@@ -0,0 +1,42 @@
+"""add per-user idempotency keys to health entries
+
+Revision ID: 0006_entry_idempotency_key
+Revises: 0005_entry_history_index
+Create Date: 2026-10-18
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "0006_entry_idempotency_key"
+down_revision: Union[str, Sequence[str], None] = "0005_entry_history_index"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "health_entries", sa.Column("idempotency_key", sa.String(length=128), nullable=True)
+    )
+    # Existing rows have no key, and NULLs never collide, so the index builds without a backfill.
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_health_entries_user_id_idempotency_key",
+            "health_entries",
+            ["user_id", "idempotency_key"],
+            unique=True,
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_health_entries_user_id_idempotency_key",
+            table_name="health_entries",
+            postgresql_concurrently=True,
+        )
+    op.drop_column("health_entries", "idempotency_key")
@@ -5,6 +5,7 @@ from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError
 from sqlalchemy.orm import Session
 
+from app.core.principal_cache import Principal, principal_cache
 from app.core.security import decode_token
 from app.db.session import SessionLocal
 from app.models.user import User
@@ -20,7 +21,14 @@ def get_db():
         db.close()
 
 
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> User:
+def get_current_user(
+    token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)
+) -> Principal:
+    # A cache hit skips both the signature check and the user query.
+    cached = principal_cache.get(token)
+    if cached is not None:
+        return cached[1]
+
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -36,4 +44,18 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
     user = db.get(User, user_id)
     if user is None:
         raise credentials_exception
+    principal = Principal.from_user(user)
+    principal_cache.put(token, payload, principal)
+    return principal
+
+
+def get_current_user_record(
+    principal: Principal = Depends(get_current_user), db: Session = Depends(get_db)
+) -> User:
+    """The ORM row behind the principal, for routes that modify the user."""
+    user = db.get(User, principal.id)
+    if user is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED, detail="Could not validate credentials"
+        )
     return user
@@ -6,14 +6,15 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy import select
 from sqlalchemy.orm import Session
 
-from app.api.deps import get_db
+from app.api.deps import get_current_user, get_db
+from app.core.principal_cache import Principal, principal_cache
 from app.core.response import success_response
 from app.core.security import (
     create_access_token,
     create_refresh_token,
     decode_token,
     hash_password,
-    verify_password,
+    password_hasher,
 )
 from app.models.refresh_token import RefreshToken
 from app.models.user import User
@@ -25,6 +26,7 @@ from app.schemas.auth import (
     TokenResponse,
     UserProfileResponse,
 )
+from app.services.refresh_token_service import revoke_user_tokens
 
 router = APIRouter(prefix="/auth", tags=["Authentication"])
 
@@ -66,8 +68,14 @@ def register(payload: RegisterRequest, db: Session = Depends(get_db)):
 @router.post("/login")
 def login(payload: LoginRequest, db: Session = Depends(get_db)):
     user = db.execute(select(User).where(User.email == payload.email)).scalar_one_or_none()
-    if not user or not verify_password(payload.password, user.hashed_password):
+    if not user:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials")
+    verified, new_hash = password_hasher.verify_and_update(payload.password, user.hashed_password)
+    if not verified:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials")
+    if new_hash:
+        # BCRYPT_ROUNDS changed since this hash was made; committed with the new tokens.
+        user.hashed_password = new_hash
     token_payload = _issue_tokens(user.id, db)
     return success_response(token_payload.model_dump(), "Login successful")
 
@@ -113,4 +121,12 @@ def logout(payload: LogoutRequest, db: Session = Depends(get_db)):
     if token_record:
         token_record.revoked = True
         db.commit()
+        principal_cache.invalidate_user(token_record.user_id)
     return success_response(None, "Logged out")
+
+
+@router.post("/logout-all")
+def logout_all(current_user: Principal = Depends(get_current_user), db: Session = Depends(get_db)):
+    revoked = revoke_user_tokens(db, current_user.id)
+    principal_cache.invalidate_user(current_user.id)
+    return success_response({"revoked_sessions": revoked}, "Logged out of all sessions")
@@ -1,23 +1,55 @@
 from __future__ import annotations
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy import desc, select
+import base64
+import json
+from datetime import UTC, datetime
+from typing import Any, Literal
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from pydantic import TypeAdapter, ValidationError
+from sqlalchemy import func, insert, select, tuple_
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
 from app.api.deps import get_current_user, get_db
+from app.core.config import settings
+from app.core.metrics import stage
+from app.core.principal_cache import Principal
 from app.core.response import success_response
 from app.models.health_entry import HealthEntry
-from app.models.user import User
-from app.schemas.health import HealthEntryCreate, HealthEntryResponse, HealthEntryUpdate
+from app.schemas.health import (
+    HealthEntryBulkInput,
+    HealthEntryBulkItem,
+    HealthEntryCreate,
+    HealthEntryResponse,
+    HealthEntryUpdate,
+)
 
 router = APIRouter(prefix="/health-entries", tags=["Health Entries"])
 
+_bulk_items = TypeAdapter(list[HealthEntryBulkItem])
+
+# What dashboards chart: no free text and none of the JSON columns.
+SUMMARY_COLUMNS = (
+    HealthEntry.id,
+    HealthEntry.recorded_at,
+    HealthEntry.heart_rate,
+    HealthEntry.systolic_bp,
+    HealthEntry.diastolic_bp,
+    HealthEntry.temperature,
+    HealthEntry.spo2,
+    HealthEntry.glucose,
+    HealthEntry.weight,
+    HealthEntry.risk_score,
+    HealthEntry.risk_level,
+)
+
 
 @router.post("")
 def create_entry(
     payload: HealthEntryCreate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ):
     entry = HealthEntry(user_id=current_user.id, **payload.model_dump(exclude_unset=True))
     db.add(entry)
@@ -26,17 +58,205 @@ def create_entry(
     return success_response(HealthEntryResponse.model_validate(entry).model_dump(), "Entry created")
 
 
+def _encode_cursor(entry) -> str:
+    raw = json.dumps([entry.recorded_at.isoformat(), entry.id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> tuple[datetime, int]:
+    try:
+        recorded_at, entry_id = json.loads(
+            base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        )
+        return datetime.fromisoformat(recorded_at), int(entry_id)
+    except (ValueError, TypeError) as exc:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor"
+        ) from exc
+
+
+def _naive_utc(value: datetime) -> datetime:
+    # recorded_at is stored without a time zone, in UTC.
+    return value.astimezone(UTC).replace(tzinfo=None) if value.tzinfo else value
+
+
+def _validate_bulk(
+    items: list[dict[str, Any]],
+) -> tuple[dict[int, HealthEntryBulkItem], dict[int, list]]:
+    # One validation pass over the whole list; only when it fails are the bad items split
+    # out and the rest validated again.
+    try:
+        return dict(enumerate(_bulk_items.validate_python(items))), {}
+    except ValidationError as exc:
+        errors: dict[int, list] = {}
+        # Input and ctx can echo the rejected payload back; loc, type and msg are enough.
+        for error in exc.errors(include_url=False, include_input=False, include_context=False):
+            index, *loc = error["loc"]
+            errors.setdefault(index, []).append({**error, "loc": tuple(loc)})
+    indexes = [index for index in range(len(items)) if index not in errors]
+    valid = _bulk_items.validate_python([items[index] for index in indexes])
+    return dict(zip(indexes, valid, strict=True)), errors
+
+
+def _existing_keys(db: Session, user_id: int, keys: list[str]) -> dict[str, int]:
+    found: dict[str, int] = {}
+    # Chunked to stay well under the bound-parameter limit of every backend.
+    for start in range(0, len(keys), 1000):
+        rows = db.execute(
+            select(HealthEntry.idempotency_key, HealthEntry.id).where(
+                HealthEntry.user_id == user_id,
+                HealthEntry.idempotency_key.in_(keys[start : start + 1000]),
+            )
+        )
+        found.update(rows.tuples().all())
+    return found
+
+
+@router.post("/bulk")
+def create_entries_bulk(
+    payload: HealthEntryBulkInput,
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_user),
+):
+    results: list[dict[str, Any] | None] = [None] * len(payload.items)
+    valid, errors = _validate_bulk(payload.items)
+    for index, item_errors in errors.items():
+        results[index] = {"index": index, "success": False, "errors": item_errors}
+
+    now = datetime.now(UTC)
+    # A concurrent upload of the same keys can win the race between lookup and insert; the
+    # unique index rejects ours, and the retry finds its rows as duplicates. Losing twice
+    # means another upload is still writing these keys, so the client is asked to retry.
+    for attempt in range(2):
+        first_by_key: dict[str, int] = {}
+        for index, item in valid.items():
+            if item.idempotency_key is not None:
+                first_by_key.setdefault(item.idempotency_key, index)
+        with stage("db"):
+            existing = _existing_keys(db, current_user.id, list(first_by_key))
+        pending = [
+            (
+                index,
+                {
+                    **item.model_dump(),
+                    "user_id": current_user.id,
+                    "recorded_at": item.recorded_at or now,
+                },
+            )
+            for index, item in valid.items()
+            if item.idempotency_key is None
+            or (
+                item.idempotency_key not in existing and first_by_key[item.idempotency_key] == index
+            )
+        ]
+        try:
+            with stage("db"):
+                entry_ids = (
+                    db.scalars(
+                        insert(HealthEntry).returning(HealthEntry.id, sort_by_parameter_order=True),
+                        [values for _, values in pending],
+                    ).all()
+                    if pending
+                    else []
+                )
+                db.commit()
+            break
+        except IntegrityError:
+            db.rollback()
+            if attempt:
+                raise HTTPException(
+                    status_code=status.HTTP_409_CONFLICT,
+                    detail="Another upload is storing the same idempotency keys; retry it",
+                ) from None
+
+    created = {index: entry_id for (index, _), entry_id in zip(pending, entry_ids, strict=True)}
+    for index, item in valid.items():
+        if index in created:
+            results[index] = {
+                "index": index,
+                "success": True,
+                "status": "created",
+                "entry_id": created[index],
+            }
+            continue
+        key = item.idempotency_key
+        entry_id = existing[key] if key in existing else created[first_by_key[key]]
+        results[index] = {
+            "index": index,
+            "success": True,
+            "status": "duplicate",
+            "entry_id": entry_id,
+        }
+
+    summary = {
+        "total": len(results),
+        "created": len(created),
+        "duplicates": len(valid) - len(created),
+        "failed": len(errors),
+        "results": results,
+    }
+    return success_response(summary, "Bulk ingest completed")
+
+
 @router.get("")
 def list_entries(
+    response: Response,
+    limit: int = Query(default=settings.history_page_size, ge=1, le=settings.history_max_page_size),
+    cursor: str | None = Query(default=None, description="X-Next-Cursor from the previous page."),
+    recorded_from: datetime | None = Query(default=None, description="Inclusive lower bound."),
+    recorded_to: datetime | None = Query(default=None, description="Exclusive upper bound."),
+    risk_level: list[str] | None = Query(default=None),
+    fields: Literal["full", "summary"] = Query(
+        default="full", description="`summary` returns only the timestamp, vitals and risk."
+    ),
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ):
-    entries = (
-        db.execute(select(HealthEntry).where(HealthEntry.user_id == current_user.id).order_by(desc(HealthEntry.recorded_at)))
-        .scalars()
-        .all()
-    )
-    data = [HealthEntryResponse.model_validate(entry).model_dump() for entry in entries]
+    # Newest first, keyed on (recorded_at, id) so each page is one range scan of the
+    # (user_id, recorded_at, id) index however deep the client has paged.
+    summary = fields == "summary"
+    query = select(*SUMMARY_COLUMNS) if summary else select(HealthEntry)
+    query = query.where(HealthEntry.user_id == current_user.id)
+    if cursor:
+        query = query.where(
+            tuple_(HealthEntry.recorded_at, HealthEntry.id) < _decode_cursor(cursor)
+        )
+    if recorded_from:
+        query = query.where(HealthEntry.recorded_at >= _naive_utc(recorded_from))
+    if recorded_to:
+        query = query.where(HealthEntry.recorded_at < _naive_utc(recorded_to))
+    if risk_level:
+        query = query.where(HealthEntry.risk_level.in_(risk_level))
+    query = query.order_by(HealthEntry.recorded_at.desc(), HealthEntry.id.desc()).limit(limit + 1)
+
+    result = db.execute(query)
+    entries = result.all() if summary else result.scalars().all()
+    if len(entries) > limit:
+        entries = entries[:limit]
+        response.headers["X-Next-Cursor"] = _encode_cursor(entries[-1])
+    if summary:
+        # Plain column tuples: no ORM identity map and no per-row model validation.
+        data = [row._asdict() for row in entries]
+    else:
+        data = [HealthEntryResponse.model_validate(entry).model_dump() for entry in entries]
+    return success_response(data)
+
+
+@router.get("/stats")
+def entry_stats(
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_user),
+):
+    # Aggregated in the database so totals cover the whole history, not one page of it.
+    count, average = db.execute(
+        select(func.count(HealthEntry.id), func.avg(HealthEntry.risk_score)).where(
+            HealthEntry.user_id == current_user.id
+        )
+    ).one()
+    data = {
+        "count": count,
+        "average_risk_score": round(float(average), 2) if average is not None else None,
+    }
     return success_response(data)
 
 
@@ -44,7 +264,7 @@ def list_entries(
 def get_entry(
     entry_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ):
     entry = (
         db.execute(select(HealthEntry).where(HealthEntry.id == entry_id, HealthEntry.user_id == current_user.id))
@@ -60,7 +280,7 @@ def update_entry(
     entry_id: int,
     payload: HealthEntryUpdate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ):
     entry = (
         db.execute(select(HealthEntry).where(HealthEntry.id == entry_id, HealthEntry.user_id == current_user.id))
@@ -81,7 +301,7 @@ def update_entry(
 def delete_entry(
     entry_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ):
     entry = (
         db.execute(select(HealthEntry).where(HealthEntry.id == entry_id, HealthEntry.user_id == current_user.id))
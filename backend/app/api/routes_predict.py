@@ -1,80 +1,291 @@
 from __future__ import annotations
 
+import logging
+import time
 from datetime import UTC, datetime
+from typing import Any
 
-from fastapi import APIRouter, Depends, Request
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.responses import JSONResponse
+from pydantic import ValidationError
+from sqlalchemy import insert, select, update
 from sqlalchemy.orm import Session
 
 from app.api.deps import get_current_user, get_db
-from app.core.rate_limit import rate_limiter
+from app.core.metrics import stage
+from app.core.principal_cache import Principal
 from app.core.response import success_response
 from app.models.health_entry import HealthEntry
-from app.models.user import User
-from app.schemas.predict import PredictionInput
-from app.services.nlp_service import symptom_extractor
+from app.schemas.predict import BatchPredictionInput, PredictionInput, SymptomBatchInput
+from app.services.batching import prediction_batcher
+from app.services.explanation_service import (
+    FAILED,
+    PENDING,
+    READY,
+    SHED,
+    ExplanationJob,
+    explanation_queue,
+)
+from app.services.nlp_service import ExtractionResult, symptom_extractor
+from app.services.prediction_cache import prediction_cache
 from app.services.prediction_service import prediction_engine
-from app.services.recommendation_service import recommendation_for
-from app.services.risk_service import calculate_risk
+from app.services.risk_service import RiskResult
+from app.services.scoring_service import ScoredItem, prediction_result, score_batch
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/predict", tags=["Prediction"])
 
 
+def _entry_values(
+    user_id: int,
+    payload: PredictionInput,
+    extracted: ExtractionResult,
+    predictions: list[dict],
+    risk: RiskResult,
+    top_features: list[str] | None,
+    model_version: str,
+) -> dict[str, Any]:
+    return {
+        "user_id": user_id,
+        "recorded_at": datetime.now(UTC),
+        "symptoms_text": payload.symptoms_text,
+        "symptom_tags": extracted.tags,
+        "heart_rate": payload.heart_rate,
+        "systolic_bp": payload.systolic_bp,
+        "diastolic_bp": payload.diastolic_bp,
+        "temperature": payload.temperature,
+        "spo2": payload.spo2,
+        "glucose": payload.glucose,
+        "weight": payload.weight,
+        "risk_score": risk.score,
+        "risk_level": risk.level,
+        "predictions": predictions,
+        "explanation": top_features,
+        "explanation_status": PENDING if payload.defer_explanation else READY,
+        "model_version": model_version,
+    }
+
+
+def _defer_explanations(
+    request: Request, db: Session, deferred: list[tuple[int, PredictionInput, ScoredItem]]
+) -> list[dict[str, str]]:
+    """Queue SHAP for saved entries; entries the full queue refuses are marked shed, not run inline."""
+    results: list[dict[str, str]] = []
+    shed: list[int] = []
+    for entry_id, payload, scored in deferred:
+        extracted, predictions, model_version = scored[0], scored[1], scored[-1]
+        job = ExplanationJob(
+            entry_id,
+            payload.model_dump(),
+            extracted.tags,
+            predictions[0]["condition"],
+            model_version,
+        )
+        if explanation_queue.submit(job):
+            results.append({"status": PENDING, "url": _explanation_url(request, entry_id)})
+        else:
+            shed.append(entry_id)
+            results.append({"status": SHED, "url": _explanation_url(request, entry_id)})
+    if shed:
+        with stage("db"):
+            db.execute(
+                update(HealthEntry).where(HealthEntry.id.in_(shed)).values(explanation_status=SHED)
+            )
+            db.commit()
+    return results
+
+
+def _explanation_url(request: Request, entry_id: int) -> str:
+    return request.app.url_path_for("get_explanation", entry_id=entry_id)
+
+
 @router.post("")
 def predict_condition(
     payload: PredictionInput,
     request: Request,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ):
-    rate_limiter.check(f"{current_user.id}:{request.client.host}")
+    scored = score_batch([payload], explain=not payload.defer_explanation)[0]
+    response = prediction_result(*scored)
 
-    extracted = symptom_extractor.extract(payload.symptoms_text)
-    payload_data = payload.model_dump()
-    predictions = prediction_engine.predict_top3(payload_data, extracted.tags)
-    top_conf = predictions[0]["confidence"] if predictions else 0.0
+    if payload.save_entry:
+        entry = HealthEntry(**_entry_values(current_user.id, payload, *scored))
+        with stage("db"):
+            db.add(entry)
+            db.commit()
+            db.refresh(entry)
+        response["entry_id"] = entry.id
+        if payload.defer_explanation:
+            response["explanation"] = _defer_explanations(
+                request, db, [(entry.id, payload, scored)]
+            )[0]
 
-    risk = calculate_risk(payload_data, top_conf)
-    top_features = prediction_engine.explain(payload_data, extracted.tags, predictions[0]["condition"])
+    return success_response(response, "Prediction completed")
 
-    for row in predictions:
-        row["recommended_next_steps"] = recommendation_for(row["condition"])
 
-    response = {
-        "symptom_tags": extracted.tags,
-        "nlp_source": extracted.source,
-        "predictions": predictions,
-        "risk_score": risk.score,
-        "risk_level": risk.level,
-        "emergency_warning": risk.emergency_warning,
-        "warning_message": risk.warning_message,
-        "top_contributing_features": top_features,
-        "disclaimer": "This is not medical advice. Consult a licensed clinician for diagnosis.",
+@router.post("/batch")
+def predict_batch(
+    payload: BatchPredictionInput,
+    request: Request,
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_user),
+):
+    results: list[dict[str, Any] | None] = [None] * len(payload.items)
+    valid: list[tuple[int, PredictionInput]] = []
+    for index, raw_item in enumerate(payload.items):
+        try:
+            valid.append((index, PredictionInput.model_validate(raw_item)))
+        except ValidationError as exc:
+            results[index] = {
+                "index": index,
+                "success": False,
+                "errors": exc.errors(include_url=False),
+            }
+
+    scored: dict[int, ScoredItem] = {}
+    if valid:
+        try:
+            items = [item for _, item in valid]
+            explain = [not item.defer_explanation for item in items]
+            scored = dict(
+                zip((index for index, _ in valid), score_batch(items, explain=explain), strict=True)
+            )
+        except Exception:  # noqa: BLE001
+            # Re-run item by item so one bad record cannot fail the whole batch.
+            logger.exception("Batch scoring failed, retrying items individually.")
+            for index, item in valid:
+                try:
+                    scored[index] = score_batch([item], explain=not item.defer_explanation)[0]
+                except Exception:  # noqa: BLE001
+                    logger.exception("Prediction failed for batch item %s", index)
+                    results[index] = {
+                        "index": index,
+                        "success": False,
+                        "errors": ["Prediction failed"],
+                    }
+
+    pending_entries: list[tuple[int, PredictionInput, dict[str, Any]]] = []
+    for index, item in valid:
+        if index not in scored:
+            continue
+        results[index] = {
+            "index": index,
+            "success": True,
+            "data": prediction_result(*scored[index]),
+        }
+        if item.save_entry:
+            pending_entries.append(
+                (index, item, _entry_values(current_user.id, item, *scored[index]))
+            )
+
+    if pending_entries:
+        with stage("db"):
+            entry_ids = db.scalars(
+                insert(HealthEntry).returning(HealthEntry.id, sort_by_parameter_order=True),
+                [values for _, _, values in pending_entries],
+            ).all()
+            db.commit()
+        deferred_indexes: list[int] = []
+        deferred: list[tuple[int, PredictionInput, ScoredItem]] = []
+        for (index, item, _), entry_id in zip(pending_entries, entry_ids, strict=True):
+            results[index]["data"]["entry_id"] = entry_id
+            if item.defer_explanation:
+                deferred_indexes.append(index)
+                deferred.append((entry_id, item, scored[index]))
+        for index, explanation in zip(
+            deferred_indexes, _defer_explanations(request, db, deferred), strict=True
+        ):
+            results[index]["data"]["explanation"] = explanation
+
+    succeeded = sum(1 for result in results if result and result["success"])
+    summary = {
+        "total": len(results),
+        "succeeded": succeeded,
+        "failed": len(results) - succeeded,
+        "results": results,
     }
+    return success_response(summary, "Batch prediction completed")
 
-    if payload.save_entry:
-        entry = HealthEntry(
-            user_id=current_user.id,
-            recorded_at=datetime.now(UTC),
-            symptoms_text=payload.symptoms_text,
-            symptom_tags=extracted.tags,
-            heart_rate=payload.heart_rate,
-            systolic_bp=payload.systolic_bp,
-            diastolic_bp=payload.diastolic_bp,
-            temperature=payload.temperature,
-            spo2=payload.spo2,
-            glucose=payload.glucose,
-            weight=payload.weight,
-            risk_score=risk.score,
-            risk_level=risk.level,
-            predictions=predictions,
-            explanation=top_features,
+
+@router.get("/explanations/{entry_id}")
+def get_explanation(
+    entry_id: int,
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_user),
+):
+    entry = db.execute(
+        select(HealthEntry.explanation, HealthEntry.explanation_status).where(
+            HealthEntry.id == entry_id, HealthEntry.user_id == current_user.id
+        )
+    ).one_or_none()
+    if entry is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Entry not found")
+
+    # Entries saved before explanations could be deferred have no status but are complete.
+    if entry.explanation_status == PENDING:
+        return JSONResponse(
+            status_code=status.HTTP_202_ACCEPTED,
+            content=success_response(
+                {"entry_id": entry_id, "status": PENDING}, "Explanation is being computed"
+            ),
+        )
+    if entry.explanation_status == SHED:
+        return _resubmit_explanation(db, entry_id)
+    if entry.explanation_status == FAILED:
+        data = {"entry_id": entry_id, "status": FAILED, "top_contributing_features": None}
+        return success_response(data, "Explanation could not be computed")
+    data = {"entry_id": entry_id, "status": READY, "top_contributing_features": entry.explanation}
+    return success_response(data)
+
+
+def _resubmit_explanation(db: Session, entry_id: int) -> JSONResponse:
+    # Claim the shed entry first so concurrent polls submit it at most once.
+    claimed = db.execute(
+        update(HealthEntry)
+        .where(HealthEntry.id == entry_id, HealthEntry.explanation_status == SHED)
+        .values(explanation_status=PENDING)
+    ).rowcount
+    db.commit()
+    if claimed and not explanation_queue.submit(
+        ExplanationJob.from_entry(db.get(HealthEntry, entry_id))
+    ):
+        db.execute(
+            update(HealthEntry).where(HealthEntry.id == entry_id).values(explanation_status=SHED)
         )
-        db.add(entry)
         db.commit()
-        db.refresh(entry)
-        response["entry_id"] = entry.id
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="The explanation queue is full. Please retry shortly.",
+            headers={"Retry-After": "1"},
+        )
+    return JSONResponse(
+        status_code=status.HTTP_202_ACCEPTED,
+        content=success_response(
+            {"entry_id": entry_id, "status": PENDING}, "Explanation is being computed"
+        ),
+    )
+
+
+@router.get("/explanations")
+def explanation_stats(_: Principal = Depends(get_current_user)):
+    return success_response(explanation_queue.stats())
+
+
+@router.get("/model")
+def model_status(_: Principal = Depends(get_current_user)):
+    return success_response(prediction_engine.status())
 
-    return success_response(response, "Prediction completed")
+
+@router.get("/batching")
+def batching_stats(_: Principal = Depends(get_current_user)):
+    return success_response(prediction_batcher.stats())
+
+
+@router.get("/cache")
+def cache_stats(_: Principal = Depends(get_current_user)):
+    return success_response(prediction_cache.stats())
 
 
 @router.post("/extract-symptoms")
@@ -82,3 +293,19 @@ def extract_symptoms(payload: dict[str, str]):
     text = payload.get("symptoms_text", "")
     extracted = symptom_extractor.extract(text)
     return success_response({"symptom_tags": extracted.tags, "source": extracted.source})
+
+
+@router.post("/extract-symptoms/batch")
+def extract_symptoms_batch(payload: SymptomBatchInput, _: Principal = Depends(get_current_user)):
+    # One TF-IDF transform, one label product and batched encoding across all texts.
+    started = time.perf_counter()
+    with stage("nlp"):
+        extracted = symptom_extractor.extract_batch(payload.texts)
+    elapsed = time.perf_counter() - started
+    data = {
+        "results": [{"symptom_tags": result.tags, "source": result.source} for result in extracted],
+        "count": len(extracted),
+        "elapsed_ms": round(elapsed * 1000, 3),
+        "texts_per_second": round(len(extracted) / elapsed, 1) if elapsed else None,
+    }
+    return success_response(data, "Symptom extraction completed")
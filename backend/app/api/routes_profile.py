@@ -3,7 +3,8 @@ from __future__ import annotations
 from fastapi import APIRouter, Depends
 from sqlalchemy.orm import Session
 
-from app.api.deps import get_current_user, get_db
+from app.api.deps import get_current_user, get_current_user_record, get_db
+from app.core.principal_cache import Principal
 from app.core.response import success_response
 from app.models.user import User
 from app.schemas.auth import UserProfileResponse
@@ -13,7 +14,7 @@ router = APIRouter(prefix="/profile", tags=["Profile"])
 
 
 @router.get("/me")
-def get_profile(current_user: User = Depends(get_current_user)):
+def get_profile(current_user: Principal = Depends(get_current_user)):
     return success_response(UserProfileResponse.model_validate(current_user).model_dump())
 
 
@@ -21,7 +22,7 @@ def get_profile(current_user: User = Depends(get_current_user)):
 def update_profile(
     payload: ProfileUpdateRequest,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: User = Depends(get_current_user_record),
 ):
     updates = payload.model_dump(exclude_unset=True)
     for field, value in updates.items():
@@ -16,26 +16,87 @@ class Settings(BaseSettings):
     algorithm: str = Field(default="HS256", alias="ALGORITHM")
     access_token_expire_minutes: int = Field(default=30, alias="ACCESS_TOKEN_EXPIRE_MINUTES")
     refresh_token_expire_days: int = Field(default=7, alias="REFRESH_TOKEN_EXPIRE_DAYS")
+    refresh_token_purge_interval_seconds: float = Field(
+        default=3600.0, alias="REFRESH_TOKEN_PURGE_INTERVAL_SECONDS"
+    )
+    refresh_token_purge_batch_size: int = Field(
+        default=5000, alias="REFRESH_TOKEN_PURGE_BATCH_SIZE"
+    )
+    refresh_token_purge_pause_seconds: float = Field(
+        default=0.05, alias="REFRESH_TOKEN_PURGE_PAUSE_SECONDS"
+    )
+    bcrypt_rounds: int = Field(default=12, alias="BCRYPT_ROUNDS")
+    password_hash_executor: str = Field(default="thread", alias="PASSWORD_HASH_EXECUTOR")
+    password_hash_workers: int = Field(default=2, alias="PASSWORD_HASH_WORKERS")
+    password_hash_max_pending: int = Field(default=8, alias="PASSWORD_HASH_MAX_PENDING")
     cors_origins: str = Field(default="http://localhost:5173", alias="CORS_ORIGINS")
     database_url: str = Field(default="sqlite:///./local.db", alias="DATABASE_URL")
     model_dir: str = Field(default="ml/artifacts", alias="MODEL_DIR")
+    model_auto_train: bool | None = Field(default=None, alias="MODEL_AUTO_TRAIN")
+    warm_up_on_startup: bool = Field(default=True, alias="WARM_UP_ON_STARTUP")
+    db_create_all_on_startup: bool = Field(default=True, alias="DB_CREATE_ALL_ON_STARTUP")
+    model_reload_poll_seconds: float = Field(default=10.0, alias="MODEL_RELOAD_POLL_SECONDS")
+    inference_mode: str = Field(default="sklearn", alias="INFERENCE_MODE")
+    model_variant: str = Field(default="", alias="MODEL_VARIANT")
+    symptom_vocabulary_path: str = Field(default="", alias="SYMPTOM_VOCABULARY_PATH")
+    symptom_encoder_mode: str = Field(default="auto", alias="SYMPTOM_ENCODER_MODE")
+    symptom_encoder_dir: str = Field(
+        default="ml/encoders/distilbert-base-uncased", alias="SYMPTOM_ENCODER_DIR"
+    )
+    symptom_encoder_cache_dir: str = Field(
+        default="ml/encoders/cache", alias="SYMPTOM_ENCODER_CACHE_DIR"
+    )
+    symptom_encoder_threads: int = Field(default=0, alias="SYMPTOM_ENCODER_THREADS")
+    symptom_encoder_quantize: bool = Field(default=True, alias="SYMPTOM_ENCODER_QUANTIZE")
+    symptom_encoder_max_tokens: int = Field(default=64, alias="SYMPTOM_ENCODER_MAX_TOKENS")
+    symptom_encoder_batch_size: int = Field(default=16, alias="SYMPTOM_ENCODER_BATCH_SIZE")
+    symptom_encoder_budget_ms: float = Field(default=0.0, alias="SYMPTOM_ENCODER_BUDGET_MS")
+    prediction_batching_enabled: bool = Field(default=False, alias="PREDICTION_BATCHING_ENABLED")
+    prediction_batch_window_ms: float = Field(default=5.0, alias="PREDICTION_BATCH_WINDOW_MS")
+    prediction_max_batch_size: int = Field(default=32, alias="PREDICTION_MAX_BATCH_SIZE")
+    prediction_cache_enabled: bool = Field(default=False, alias="PREDICTION_CACHE_ENABLED")
+    prediction_cache_max_entries: int = Field(default=10_000, alias="PREDICTION_CACHE_MAX_ENTRIES")
+    prediction_cache_max_bytes: int = Field(
+        default=64 * 1024 * 1024, alias="PREDICTION_CACHE_MAX_BYTES"
+    )
+    prediction_cache_ttl_seconds: float = Field(default=600.0, alias="PREDICTION_CACHE_TTL_SECONDS")
+    history_page_size: int = Field(default=50, alias="HISTORY_PAGE_SIZE")
+    history_max_page_size: int = Field(default=500, alias="HISTORY_MAX_PAGE_SIZE")
+    explanation_workers: int = Field(default=2, alias="EXPLANATION_WORKERS")
+    explanation_max_pending: int = Field(default=256, alias="EXPLANATION_MAX_PENDING")
+    principal_cache_enabled: bool = Field(default=True, alias="PRINCIPAL_CACHE_ENABLED")
+    principal_cache_max_entries: int = Field(default=10_000, alias="PRINCIPAL_CACHE_MAX_ENTRIES")
+    principal_cache_ttl_seconds: float = Field(default=30.0, alias="PRINCIPAL_CACHE_TTL_SECONDS")
+    rate_limit_enabled: bool = Field(default=True, alias="RATE_LIMIT_ENABLED")
     rate_limit_per_minute: int = Field(default=20, alias="RATE_LIMIT_PER_MINUTE")
+    auth_rate_limit_per_minute: int = Field(default=10, alias="AUTH_RATE_LIMIT_PER_MINUTE")
+    api_rate_limit_per_minute: int = Field(default=120, alias="API_RATE_LIMIT_PER_MINUTE")
+    rate_limit_backend: str = Field(default="memory", alias="RATE_LIMIT_BACKEND")
+    rate_limit_sqlite_path: str = Field(default="rate_limits.db", alias="RATE_LIMIT_SQLITE_PATH")
+    rate_limit_max_keys: int = Field(default=100_000, alias="RATE_LIMIT_MAX_KEYS")
+    metrics_enabled: bool = Field(default=True, alias="METRICS_ENABLED")
+    server_timing_enabled: bool = Field(default=True, alias="SERVER_TIMING_ENABLED")
+    metrics_multiproc_dir: str | None = Field(default=None, alias="METRICS_MULTIPROC_DIR")
+    metrics_flush_seconds: float = Field(default=5.0, alias="METRICS_FLUSH_SECONDS")
 
     @property
     def cors_list(self) -> list[str]:
         return [origin.strip() for origin in self.cors_origins.split(",") if origin.strip()]
 
     @property
-    def backend_root(self) -> Path:
-        return Path(__file__).resolve().parents[2]
+    def allow_model_auto_train(self) -> bool:
+        # Training inside an API worker is a development convenience only.
+        if self.model_auto_train is None:
+            return self.environment != "production"
+        return self.model_auto_train
 
     @property
-    def model_path(self) -> Path:
-        return self.backend_root / self.model_dir / "model.pkl"
+    def backend_root(self) -> Path:
+        return Path(__file__).resolve().parents[2]
 
     @property
-    def vectorizer_path(self) -> Path:
-        return self.backend_root / self.model_dir / "vectorizer.pkl"
+    def model_root(self) -> Path:
+        return self.backend_root / self.model_dir
 
 
 @lru_cache
@@ -0,0 +1,330 @@
+from __future__ import annotations
+
+import bisect
+import json
+import logging
+import os
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any
+
+from starlette.routing import Match
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+from app.core.readiness import readiness
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# name -> (type, help, label names)
+FAMILIES: dict[str, tuple[str, str, tuple[str, ...]]] = {
+    "proactivecare_http_requests_total": (
+        "counter",
+        "HTTP requests handled.",
+        ("method", "route", "status"),
+    ),
+    "proactivecare_http_request_errors_total": (
+        "counter",
+        "HTTP requests that ended in a 5xx or an unhandled exception.",
+        ("method", "route"),
+    ),
+    "proactivecare_http_requests_in_flight": (
+        "gauge",
+        "HTTP requests currently being handled.",
+        ("method", "route"),
+    ),
+    "proactivecare_http_request_duration_seconds": (
+        "histogram",
+        "Time from request start to the last response byte.",
+        ("method", "route"),
+    ),
+    "proactivecare_stage_duration_seconds": (
+        "histogram",
+        "Time spent in each prediction stage.",
+        ("stage",),
+    ),
+}
+
+_request_timings: ContextVar[list[tuple[str, float]] | None] = ContextVar(
+    "request_timings", default=None
+)
+
+
+class Metrics:
+    """Counters, gauges and histograms rendered in the Prometheus text format.
+
+    With ``METRICS_MULTIPROC_DIR`` set, every worker periodically writes its own totals to
+    ``<dir>/metrics-<pid>.json`` and a scrape served by any worker sums all files, so the
+    numbers do not depend on which worker answered. Gauges from workers that have exited
+    are dropped; their counters and histograms are kept.
+    """
+
+    def __init__(self, enabled: bool, multiproc_dir: str | None, flush_seconds: float) -> None:
+        self.enabled = enabled
+        self.multiproc_dir = Path(multiproc_dir) if multiproc_dir else None
+        self.flush_seconds = flush_seconds
+        self._values: dict[str, dict[tuple[str, ...], Any]] = {name: {} for name in FAMILIES}
+        self._lock = threading.Lock()
+        self._flusher: threading.Thread | None = None
+
+    def inc(self, name: str, labels: tuple[str, ...], value: float = 1.0) -> None:
+        with self._lock:
+            series = self._values[name]
+            series[labels] = series.get(labels, 0.0) + value
+
+    def observe(self, name: str, labels: tuple[str, ...], seconds: float) -> None:
+        with self._lock:
+            series = self._values[name]
+            state = series.get(labels)
+            if state is None:
+                # Per-bucket (non-cumulative) counts, then +Inf, sum and count.
+                state = series[labels] = [0] * (len(LATENCY_BUCKETS) + 1) + [0.0, 0]
+            state[bisect.bisect_left(LATENCY_BUCKETS, seconds)] += 1
+            state[-2] += seconds
+            state[-1] += 1
+
+    @contextmanager
+    def track_in_flight(self, labels: tuple[str, ...]) -> Iterator[None]:
+        self.inc("proactivecare_http_requests_in_flight", labels)
+        try:
+            yield
+        finally:
+            self.inc("proactivecare_http_requests_in_flight", labels, -1.0)
+
+    def snapshot(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "pid": os.getpid(),
+                "values": {
+                    name: [
+                        [list(labels), list(value) if isinstance(value, list) else value]
+                        for labels, value in series.items()
+                    ]
+                    for name, series in self._values.items()
+                },
+            }
+
+    def flush(self) -> None:
+        if self.multiproc_dir is None:
+            return
+        self.multiproc_dir.mkdir(parents=True, exist_ok=True)
+        target = self.multiproc_dir / f"metrics-{os.getpid()}.json"
+        tmp = target.with_suffix(".tmp")
+        tmp.write_text(json.dumps(self.snapshot()), encoding="utf-8")
+        os.replace(tmp, target)
+
+    def start_flusher(self) -> None:
+        if self.multiproc_dir is None or self._flusher is not None:
+            return
+
+        def run() -> None:
+            while True:
+                time.sleep(self.flush_seconds)
+                try:
+                    self.flush()
+                except OSError:
+                    logger.exception("Could not write metrics to %s.", self.multiproc_dir)
+
+        self._flusher = threading.Thread(target=run, name="metrics-flush", daemon=True)
+        self._flusher.start()
+
+    def render(self) -> str:
+        snapshots = [self.snapshot()]
+        if self.multiproc_dir is not None:
+            self.flush()
+            snapshots = [snapshots[0], *self._other_workers(snapshots[0]["pid"])]
+        merged = _merge(snapshots)
+
+        lines: list[str] = []
+        for name, (kind, help_text, label_names) in FAMILIES.items():
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in sorted(merged[name].items()):
+                label_text = ",".join(
+                    f'{key}="{_escape(val)}"' for key, val in zip(label_names, labels, strict=True)
+                )
+                if kind != "histogram":
+                    lines.append(f"{name}{{{label_text}}} {_number(value)}")
+                    continue
+                cumulative = 0
+                for bound, count in zip((*LATENCY_BUCKETS, "+Inf"), value[:-2], strict=True):
+                    cumulative += count
+                    lines.append(f'{name}_bucket{{{label_text},le="{bound}"}} {cumulative}')
+                lines.append(f"{name}_sum{{{label_text}}} {_number(value[-2])}")
+                lines.append(f"{name}_count{{{label_text}}} {value[-1]}")
+        return "\n".join(lines) + "\n"
+
+    def _other_workers(self, own_pid: int) -> list[dict[str, Any]]:
+        snapshots = []
+        for path in self.multiproc_dir.glob("metrics-*.json"):
+            try:
+                snapshot = json.loads(path.read_text(encoding="utf-8"))
+            except (OSError, json.JSONDecodeError):
+                continue
+            if snapshot["pid"] == own_pid:
+                continue
+            if not _pid_alive(snapshot["pid"]):
+                snapshot["values"] = {
+                    name: series
+                    for name, series in snapshot["values"].items()
+                    if FAMILIES[name][0] != "gauge"
+                }
+            snapshots.append(snapshot)
+        return snapshots
+
+
+def _merge(snapshots: list[dict[str, Any]]) -> dict[str, dict[tuple[str, ...], Any]]:
+    merged: dict[str, dict[tuple[str, ...], Any]] = {name: {} for name in FAMILIES}
+    for snapshot in snapshots:
+        for name, series in snapshot["values"].items():
+            if name not in merged:
+                continue
+            for labels, value in series:
+                key = tuple(labels)
+                if isinstance(value, list):
+                    current = merged[name].get(key)
+                    merged[name][key] = (
+                        value
+                        if current is None
+                        else [a + b for a, b in zip(current, value, strict=True)]
+                    )
+                else:
+                    merged[name][key] = merged[name].get(key, 0.0) + value
+    return merged
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _number(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+@contextmanager
+def _timed_stage(name: str) -> Iterator[None]:
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        metrics.observe("proactivecare_stage_duration_seconds", (name,), elapsed)
+        timings = _request_timings.get()
+        if timings is not None:
+            timings.append((name, elapsed))
+
+
+def stage(name: str):
+    """Times a block into the stage histogram and the current request's Server-Timing header."""
+    if not metrics.enabled:
+        return nullcontext()
+    return _timed_stage(name)
+
+
+@contextmanager
+def collect_stages() -> Iterator[list[tuple[str, float]]]:
+    """Collects the stages timed in a block that runs outside any request, e.g. on a worker."""
+    timings: list[tuple[str, float]] = []
+    token = _request_timings.set(timings)
+    try:
+        yield timings
+    finally:
+        _request_timings.reset(token)
+
+
+def record_stages(timings: list[tuple[str, float]]) -> None:
+    """Adds stages timed elsewhere to the current request's Server-Timing header only."""
+    current = _request_timings.get()
+    if current is not None:
+        current.extend(timings)
+
+
+class MetricsMiddleware:
+    ROUTE_CACHE_SIZE = 4096
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+        self._routes: dict[tuple[str, str], str] = {}
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http":
+            readiness.mark_first_request()
+        if scope["type"] != "http" or not metrics.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        labels = (method, self._route_for(scope))
+        timings: list[tuple[str, float]] = []
+        token = _request_timings.set(timings)
+        started = time.perf_counter()
+        status = 500
+
+        async def send_with_timing(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if settings.server_timing_enabled:
+                    entries = [f"{name};dur={seconds * 1000:.2f}" for name, seconds in timings]
+                    entries.append(f"total;dur={(time.perf_counter() - started) * 1000:.2f}")
+                    message.setdefault("headers", [])
+                    message["headers"] = [
+                        *message["headers"],
+                        (b"server-timing", ", ".join(entries).encode()),
+                    ]
+            await send(message)
+
+        try:
+            with metrics.track_in_flight(labels):
+                await self.app(scope, receive, send_with_timing)
+        finally:
+            _request_timings.reset(token)
+            metrics.inc("proactivecare_http_requests_total", (*labels, str(status)))
+            if status >= 500:
+                metrics.inc("proactivecare_http_request_errors_total", labels)
+            metrics.observe(
+                "proactivecare_http_request_duration_seconds", labels, time.perf_counter() - started
+            )
+
+    def _route_for(self, scope: Scope) -> str:
+        key = (scope["method"], scope["path"])
+        route = self._routes.get(key)
+        if route is None:
+            if len(self._routes) >= self.ROUTE_CACHE_SIZE:
+                self._routes.clear()
+            route = self._routes[key] = self._match_route(scope)
+        return route
+
+    def _match_route(self, scope: Scope) -> str:
+        # Label by route template, never the raw path, so ids in URLs do not explode cardinality.
+        partial = None
+        for route in scope["app"].router.routes:
+            match, _ = route.matches(scope)
+            if match == Match.FULL:
+                return getattr(route, "path", "unmatched")
+            if match == Match.PARTIAL and partial is None:
+                partial = getattr(route, "path", None)
+        return partial or "unmatched"
+
+
+metrics = Metrics(
+    enabled=settings.metrics_enabled,
+    multiproc_dir=settings.metrics_multiproc_dir,
+    flush_seconds=settings.metrics_flush_seconds,
+)
@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any
+
+from sqlalchemy import event
+
+from app.core.config import settings
+from app.models.user import User
+
+
+@dataclass(frozen=True, slots=True)
+class Principal:
+    """Read-only snapshot of the authenticated user, safe to share between requests."""
+
+    id: int
+    email: str
+    age: int | None
+    sex: str | None
+    height: float | None
+    weight: float | None
+    known_conditions: tuple[str, ...] | None
+    medications: tuple[str, ...] | None
+    updated_at: datetime | None
+
+    @classmethod
+    def from_user(cls, user: User) -> Principal:
+        return cls(
+            id=user.id,
+            email=user.email,
+            age=user.age,
+            sex=user.sex,
+            height=user.height,
+            weight=user.weight,
+            known_conditions=(
+                tuple(user.known_conditions) if user.known_conditions is not None else None
+            ),
+            medications=tuple(user.medications) if user.medications is not None else None,
+            updated_at=user.updated_at,
+        )
+
+
+class PrincipalCache:
+    """Bounded LRU + TTL cache from a verified access token to its claims and user snapshot.
+
+    Keys are whole token strings, so a hit always means this exact, signed token was verified
+    earlier. An entry never outlives the token's ``exp``. A user's entries are dropped when
+    the user row is updated or deleted through the ORM and on logout; other workers keep
+    their copy for at most ``ttl_seconds``.
+    """
+
+    def __init__(self, enabled: bool, max_entries: int, ttl_seconds: float) -> None:
+        self.enabled = enabled
+        self.max_entries = max(1, max_entries)
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[str, tuple[float, dict[str, Any], Principal]] = OrderedDict()
+        self._tokens_by_user: dict[int, set[str]] = {}
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._invalidations = 0
+
+    def get(self, token: str) -> tuple[dict[str, Any], Principal] | None:
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is None or entry[0] <= time.time():
+                if entry is not None:
+                    self._drop(token)
+                self._misses += 1
+                return None
+            self._entries.move_to_end(token)
+            self._hits += 1
+            return entry[1], entry[2]
+
+    def put(self, token: str, claims: dict[str, Any], principal: Principal) -> None:
+        if not self.enabled:
+            return
+        expires = min(time.time() + self.ttl_seconds, float(claims.get("exp", 0)))
+        with self._lock:
+            self._drop(token)
+            self._entries[token] = (expires, claims, principal)
+            self._tokens_by_user.setdefault(principal.id, set()).add(token)
+            while len(self._entries) > self.max_entries:
+                self._drop(next(iter(self._entries)))
+
+    def invalidate_user(self, user_id: int) -> None:
+        with self._lock:
+            tokens = self._tokens_by_user.pop(user_id, set())
+            for token in tokens:
+                self._entries.pop(token, None)
+            self._invalidations += len(tokens)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._tokens_by_user.clear()
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "enabled": self.enabled,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / lookups, 4) if lookups else None,
+                "invalidations": self._invalidations,
+            }
+
+    def _drop(self, token: str) -> None:
+        entry = self._entries.pop(token, None)
+        if entry is None:
+            return
+        tokens = self._tokens_by_user.get(entry[2].id)
+        if tokens is not None:
+            tokens.discard(token)
+            if not tokens:
+                del self._tokens_by_user[entry[2].id]
+
+
+principal_cache = PrincipalCache(
+    enabled=settings.principal_cache_enabled,
+    max_entries=settings.principal_cache_max_entries,
+    ttl_seconds=settings.principal_cache_ttl_seconds,
+)
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_changed_user(_mapper, _connection, target: User) -> None:
+    principal_cache.invalidate_user(target.id)
@@ -1,33 +1,370 @@
 from __future__ import annotations
 
-from collections import defaultdict, deque
-from datetime import UTC, datetime, timedelta
+import json
+import math
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Protocol
 
-from fastapi import HTTPException, status
+from jose import JWTError, jwt
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
 from app.core.config import settings
+from app.core.response import error_response
 
+RATE_LIMIT_BACKENDS = ("memory", "sqlite")
 
-class InMemoryRateLimiter:
-    def __init__(self, limit_per_minute: int) -> None:
-        self.limit_per_minute = limit_per_minute
-        self.requests: dict[str, deque[datetime]] = defaultdict(deque)
 
-    def check(self, key: str) -> None:
-        now = datetime.now(UTC)
-        window_start = now - timedelta(minutes=1)
-        queue = self.requests[key]
+@dataclass(slots=True)
+class RateLimitDecision:
+    allowed: bool
+    limit: int
+    remaining: int
+    # Seconds until the bucket is full again, and until the next request would be allowed.
+    reset_after: float
+    retry_after: float
 
-        while queue and queue[0] < window_start:
-            queue.popleft()
+    def headers(self) -> dict[str, str]:
+        headers = {
+            "RateLimit-Limit": str(self.limit),
+            "RateLimit-Remaining": str(self.remaining),
+            "RateLimit-Reset": str(math.ceil(self.reset_after)),
+        }
+        if not self.allowed:
+            headers["Retry-After"] = str(max(1, math.ceil(self.retry_after)))
+        return headers
 
-        if len(queue) >= self.limit_per_minute:
-            raise HTTPException(
-                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
-                detail=f"Rate limit exceeded. Max {self.limit_per_minute} prediction requests per minute.",
+
+class RateLimitBackend(Protocol):
+    def update(self, key: str, now: float, interval: float, period: float) -> tuple[bool, float]:
+        """Apply one request to ``key``; return whether it is allowed and the key's new TAT."""
+
+
+def _gcra(tat: float | None, now: float, interval: float, period: float) -> tuple[bool, float]:
+    # Generic cell rate algorithm: the only state is the theoretical arrival time (TAT) of the
+    # next request. A request is allowed while that stays within one period of now.
+    current = now if tat is None else max(tat, now)
+    if current + interval - now > period:
+        return False, current
+    return True, current + interval
+
+
+class MemoryBackend:
+    """One float per key in a dict kept in last-use order.
+
+    A key whose TAT has passed is indistinguishable from a key never seen, so idle keys are
+    dropped every ``sweep_every`` checks. ``max_keys`` caps memory even when every key is
+    still active, at the cost of forgetting the least recently used ones.
+    """
+
+    def __init__(self, max_keys: int, sweep_every: int = 256) -> None:
+        self.max_keys = max(1, max_keys)
+        self.sweep_every = sweep_every
+        self._tats: dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._updates = 0
+
+    def __len__(self) -> int:
+        return len(self._tats)
+
+    def update(self, key: str, now: float, interval: float, period: float) -> tuple[bool, float]:
+        with self._lock:
+            tats = self._tats
+            allowed, tat = _gcra(tats.pop(key, None), now, interval, period)
+            tats[key] = tat
+            self._updates += 1
+            if self._updates % self.sweep_every == 0:
+                self._sweep(now)
+            if len(tats) > self.max_keys:
+                # Dicts iterate in insertion order and keys are re-inserted on use, so the
+                # first one is the least recently used.
+                del tats[next(iter(tats))]
+            return allowed, tat
+
+    def _sweep(self, now: float) -> None:
+        # Policies have different periods, so a key used early can expire after one used later:
+        # idle keys sit anywhere in the dict and every one has to be checked.
+        tats = self._tats
+        for key in [key for key, tat in tats.items() if tat <= now]:
+            del tats[key]
+
+
+class SQLiteBackend:
+    """Buckets in a SQLite file so every worker process on a host shares one limit.
+
+    Each check is a single ``BEGIN IMMEDIATE`` transaction, which serialises writers across
+    processes. Idle rows are purged every ``purge_every`` checks.
+    """
+
+    def __init__(self, path: str | Path, purge_every: int = 1000) -> None:
+        self.path = str(path)
+        self.purge_every = purge_every
+        self._local = threading.local()
+        self._checks = 0
+        with self._connect() as connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS rate_limits "
+                "(key TEXT PRIMARY KEY, tat REAL NOT NULL) WITHOUT ROWID"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            # Losing the last few updates in a power cut only resets some buckets.
+            connection.execute("PRAGMA synchronous=OFF")
+            self._local.connection = connection
+        return connection
+
+    def __len__(self) -> int:
+        return self._connect().execute("SELECT COUNT(*) FROM rate_limits").fetchone()[0]
+
+    def update(self, key: str, now: float, interval: float, period: float) -> tuple[bool, float]:
+        connection = self._connect()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            row = connection.execute("SELECT tat FROM rate_limits WHERE key = ?", (key,)).fetchone()
+            allowed, tat = _gcra(row[0] if row else None, now, interval, period)
+            if allowed:
+                connection.execute(
+                    "INSERT INTO rate_limits (key, tat) VALUES (?, ?) "
+                    "ON CONFLICT(key) DO UPDATE SET tat = excluded.tat",
+                    (key, tat),
+                )
+            self._checks += 1
+            if self._checks % self.purge_every == 0:
+                connection.execute("DELETE FROM rate_limits WHERE tat <= ?", (now,))
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        return allowed, tat
+
+
+class RateLimiter:
+    def __init__(self, backend: RateLimitBackend, limit: int, period: float = 60.0) -> None:
+        if limit < 1:
+            raise ValueError(f"Rate limits must allow at least one request per period, got {limit}")
+        self.backend = backend
+        self.limit = limit
+        self.period = period
+        self.interval = period / limit
+
+    def hit(self, key: str) -> RateLimitDecision:
+        now = time.time()
+        allowed, tat = self.backend.update(key, now, self.interval, self.period)
+        return RateLimitDecision(
+            allowed=allowed,
+            limit=self.limit,
+            remaining=max(0, int((self.period - (tat - now)) / self.interval + 1e-9)),
+            reset_after=max(0.0, tat - now),
+            retry_after=0.0 if allowed else tat + self.interval - self.period - now,
+        )
+
+
+def build_backend(name: str, sqlite_path: str, max_keys: int) -> RateLimitBackend:
+    if name == "memory":
+        return MemoryBackend(max_keys)
+    if name == "sqlite":
+        path = Path(sqlite_path)
+        return SQLiteBackend(path if path.is_absolute() else settings.backend_root / path)
+    raise ValueError(
+        f"RATE_LIMIT_BACKEND must be one of {', '.join(RATE_LIMIT_BACKENDS)}, got {name!r}"
+    )
+
+
+@dataclass
+class RateLimitPolicy:
+    """One limit applied to a set of routes, with a separate bucket per key kind.
+
+    ``keys`` names what a bucket is keyed on: ``ip`` (client address), ``email`` (the
+    ``email`` field of a JSON body) or ``subject`` (the ``sub`` claim of a verified bearer
+    token, falling back to the client address without one). A request must fit every bucket.
+    ``routes`` holds ``(method, path)`` pairs; ``prefix`` matches any path below it. A policy
+    without a limiter still claims its routes but lets every request through.
+    """
+
+    name: str
+    limiter: RateLimiter | None
+    keys: tuple[str, ...]
+    routes: frozenset[tuple[str, str]] = frozenset()
+    prefix: str | None = None
+
+    def matches(self, method: str, path: str) -> bool:
+        if (method, path) in self.routes:
+            return True
+        return self.prefix is not None and path.startswith(self.prefix)
+
+
+def _limiter(backend: RateLimitBackend, limit: int) -> RateLimiter | None:
+    # A limit of 0 switches the policy off rather than dividing the period by zero.
+    return RateLimiter(backend, limit) if limit != 0 else None
+
+
+def default_policies(backend: RateLimitBackend, api_prefix: str) -> list[RateLimitPolicy]:
+    # First match wins, so specific routes come before the catch-all API policy.
+    auth = _limiter(backend, settings.auth_rate_limit_per_minute)
+    return [
+        RateLimitPolicy(
+            "auth",
+            auth,
+            ("ip", "email"),
+            frozenset(("POST", f"{api_prefix}/auth/{name}") for name in ("login", "register")),
+        ),
+        RateLimitPolicy(
+            "token",
+            auth,
+            ("ip",),
+            frozenset(("POST", f"{api_prefix}/auth/{name}") for name in ("refresh", "logout")),
+        ),
+        RateLimitPolicy(
+            "predict",
+            _limiter(backend, settings.rate_limit_per_minute),
+            ("subject",),
+            frozenset(("POST", f"{api_prefix}/predict{path}") for path in ("", "/batch")),
+        ),
+        RateLimitPolicy(
+            "api",
+            _limiter(backend, settings.api_rate_limit_per_minute),
+            ("subject",),
+            prefix=f"{api_prefix}/",
+        ),
+    ]
+
+
+class RateLimitMiddleware:
+    """Rejects requests over their route's limit before routing, auth or the database run.
+
+    Only the body of routes keyed on ``email`` is read here, up to ``MAX_BODY_BYTES``, and it
+    is replayed to the app unchanged. A token's subject picks the bucket only when its
+    signature and expiry verify; any other token is keyed on the client address, so a forged
+    ``sub`` can neither drain another user's bucket nor dodge its own.
+    """
+
+    MAX_BODY_BYTES = 64 * 1024
+
+    def __init__(self, app: ASGIApp, policies: list[RateLimitPolicy]) -> None:
+        self.app = app
+        self.policies = policies
+        self._routes: dict[tuple[str, str], RateLimitPolicy | None] = {}
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        policy = self._policy_for(scope["method"], scope["path"])
+        if policy is None or policy.limiter is None:
+            await self.app(scope, receive, send)
+            return
+
+        body = b""
+        if "email" in policy.keys:
+            body, receive = await self._buffer_body(receive)
+        decisions = [
+            policy.limiter.hit(f"{policy.name}:{kind}:{value}")
+            for kind, value in self._keys(policy, scope, body)
+        ]
+        if not decisions:
+            await self.app(scope, receive, send)
+            return
+
+        denied = next((decision for decision in decisions if not decision.allowed), None)
+        reported = denied or min(decisions, key=lambda decision: decision.remaining)
+        headers = [
+            (name.lower().encode(), value.encode()) for name, value in reported.headers().items()
+        ]
+        if denied is not None:
+            content = json.dumps(
+                error_response(f"Rate limit exceeded. Max {denied.limit} requests per minute.")
+            ).encode()
+            await send(
+                {
+                    "type": "http.response.start",
+                    "status": 429,
+                    "headers": [(b"content-type", b"application/json"), *headers],
+                }
             )
+            await send({"type": "http.response.body", "body": content})
+            return
+
+        async def send_with_headers(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                message["headers"] = [*message.get("headers", []), *headers]
+            await send(message)
+
+        await self.app(scope, receive, send_with_headers)
+
+    def _policy_for(self, method: str, path: str) -> RateLimitPolicy | None:
+        key = (method, path)
+        if key not in self._routes:
+            if len(self._routes) >= 4096:
+                self._routes.clear()
+            self._routes[key] = next((p for p in self.policies if p.matches(method, path)), None)
+        return self._routes[key]
+
+    def _keys(self, policy: RateLimitPolicy, scope: Scope, body: bytes) -> list[tuple[str, str]]:
+        client = scope.get("client")
+        ip = client[0] if client else "unknown"
+        keys = []
+        for kind in policy.keys:
+            if kind == "ip":
+                keys.append(("ip", ip))
+            elif kind == "email":
+                email = _body_email(body)
+                if email:
+                    keys.append(("email", email))
+            elif kind == "subject":
+                subject = _token_subject(scope)
+                keys.append(("sub", subject) if subject else ("ip", ip))
+        return keys
+
+    async def _buffer_body(self, receive: Receive) -> tuple[bytes, Receive]:
+        messages: list[Message] = []
+        size = 0
+        while True:
+            message = await receive()
+            messages.append(message)
+            if message["type"] != "http.request":
+                break
+            size += len(message.get("body", b""))
+            if not message.get("more_body", False) or size > self.MAX_BODY_BYTES:
+                break
+        body = b"".join(m.get("body", b"") for m in messages if m["type"] == "http.request")
+
+        async def replay() -> Message:
+            return messages.pop(0) if messages else await receive()
+
+        return (body if size <= self.MAX_BODY_BYTES else b""), replay
+
+
+def _body_email(body: bytes) -> str | None:
+    try:
+        email = json.loads(body).get("email")
+    except (ValueError, AttributeError):
+        return None
+    return email.strip().lower() if isinstance(email, str) and email.strip() else None
+
 
-        queue.append(now)
+def _token_subject(scope: Scope) -> str | None:
+    for name, value in scope["headers"]:
+        if name == b"authorization":
+            scheme, _, token = value.decode("latin-1").partition(" ")
+            if scheme.lower() != "bearer" or not token:
+                return None
+            try:
+                subject = jwt.decode(
+                    token, settings.secret_key, algorithms=[settings.algorithm]
+                ).get("sub")
+            except JWTError:
+                return None
+            return str(subject) if subject is not None else None
+    return None
 
 
-rate_limiter = InMemoryRateLimiter(settings.rate_limit_per_minute)
+rate_limit_backend = build_backend(
+    settings.rate_limit_backend, settings.rate_limit_sqlite_path, settings.rate_limit_max_keys
+)
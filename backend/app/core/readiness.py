@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+
+class Readiness:
+    """Tracks background initialization of heavy components for the /ready probe."""
+
+    def __init__(self) -> None:
+        self.started_at = time.monotonic()
+        self.first_request_after: float | None = None
+        self._components: dict[str, dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def register(self, *names: str) -> None:
+        with self._lock:
+            for name in names:
+                self._components.setdefault(
+                    name, {"status": "pending", "seconds": None, "error": None}
+                )
+
+    @contextmanager
+    def track(self, name: str) -> Iterator[None]:
+        self.register(name)
+        self._update(name, status="loading")
+        started = time.monotonic()
+        try:
+            yield
+        except Exception as exc:
+            self._update(
+                name, status="failed", seconds=round(time.monotonic() - started, 3), error=str(exc)
+            )
+            raise
+        self._update(name, status="ready", seconds=round(time.monotonic() - started, 3))
+
+    def mark_first_request(self) -> None:
+        if self.first_request_after is not None:
+            return
+        with self._lock:
+            if self.first_request_after is None:
+                self.first_request_after = time.monotonic() - self.started_at
+                logger.info("First request served %.3fs after import.", self.first_request_after)
+
+    @property
+    def is_ready(self) -> bool:
+        with self._lock:
+            return all(component["status"] == "ready" for component in self._components.values())
+
+    def report(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "ready": all(
+                    component["status"] == "ready" for component in self._components.values()
+                ),
+                "components": {
+                    name: dict(component) for name, component in self._components.items()
+                },
+                "uptime_seconds": round(time.monotonic() - self.started_at, 3),
+                "first_request_after_seconds": (
+                    round(self.first_request_after, 3)
+                    if self.first_request_after is not None
+                    else None
+                ),
+            }
+
+    def _update(self, name: str, **fields: Any) -> None:
+        with self._lock:
+            self._components[name].update(fields)
+
+
+readiness = Readiness()
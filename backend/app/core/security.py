@@ -1,6 +1,11 @@
 from __future__ import annotations
 
+import threading
+from collections.abc import Callable
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import UTC, datetime, timedelta
+from functools import lru_cache
+from typing import Any, TypeVar
 from uuid import uuid4
 
 from jose import JWTError, jwt
@@ -8,20 +13,122 @@ from passlib.context import CryptContext
 
 from app.core.config import settings
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+T = TypeVar("T")
+PASSWORD_HASH_EXECUTORS = ("thread", "process")
+
+
+class HasherSaturated(RuntimeError):
+    """Every hashing worker is busy and the wait queue is full; the caller should retry."""
+
+    retry_after = 1
+
+
+@lru_cache
+def _crypt_context(rounds: int) -> CryptContext:
+    # Pinning min and max to the configured cost makes any other cost "needs update", so a
+    # changed BCRYPT_ROUNDS is applied to each user on their next login.
+    return CryptContext(
+        schemes=["bcrypt"],
+        deprecated="auto",
+        bcrypt__default_rounds=rounds,
+        bcrypt__min_rounds=rounds,
+        bcrypt__max_rounds=rounds,
+    )
+
+
+def _hash(password: str, rounds: int) -> str:
+    return _crypt_context(rounds).hash(password)
+
+
+def _verify_and_update(password: str, hashed: str, rounds: int) -> tuple[bool, str | None]:
+    return _crypt_context(rounds).verify_and_update(password, hashed)
+
+
+class PasswordHasher:
+    """Runs bcrypt on its own small pool instead of the request thread pool.
+
+    At most ``workers`` hashes run at once and ``max_pending`` more may wait; beyond that
+    callers get a 503 straight away, so a login storm cannot hold more than
+    ``workers + max_pending`` request threads. ``workers=0`` hashes inline.
+    """
+
+    def __init__(self, rounds: int, executor: str, workers: int, max_pending: int) -> None:
+        if executor not in PASSWORD_HASH_EXECUTORS:
+            raise ValueError(
+                f"PASSWORD_HASH_EXECUTOR must be one of {', '.join(PASSWORD_HASH_EXECUTORS)}, "
+                f"got {executor!r}"
+            )
+        self.rounds = rounds
+        self.executor_kind = executor
+        self.workers = workers
+        self.max_pending = max(0, max_pending)
+        self._executor: Executor | None = None
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._rejected = 0
+
+    def hash(self, password: str) -> str:
+        return self._run(_hash, password, self.rounds)
+
+    def verify(self, password: str, hashed: str) -> bool:
+        return self.verify_and_update(password, hashed)[0]
+
+    def verify_and_update(self, password: str, hashed: str) -> tuple[bool, str | None]:
+        """Check a password; also return a new hash when the stored one uses an old cost."""
+        return self._run(_verify_and_update, password, hashed, self.rounds)
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "executor": self.executor_kind if self.workers > 0 else "inline",
+                "workers": self.workers,
+                "max_pending": self.max_pending,
+                "in_flight": self._in_flight,
+                "rejected": self._rejected,
+            }
+
+    def _run(self, fn: Callable[..., T], *args: Any) -> T:
+        if self.workers <= 0:
+            return fn(*args)
+        with self._lock:
+            if self._in_flight >= self.workers + self.max_pending:
+                self._rejected += 1
+                raise HasherSaturated("Too many sign-in requests in progress. Please retry shortly.")
+            self._in_flight += 1
+            if self._executor is None:
+                self._executor = (
+                    ProcessPoolExecutor(max_workers=self.workers)
+                    if self.executor_kind == "process"
+                    else ThreadPoolExecutor(
+                        max_workers=self.workers, thread_name_prefix="password-hash"
+                    )
+                )
+        try:
+            return self._executor.submit(fn, *args).result()
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+
+
+password_hasher = PasswordHasher(
+    rounds=settings.bcrypt_rounds,
+    executor=settings.password_hash_executor,
+    workers=settings.password_hash_workers,
+    max_pending=settings.password_hash_max_pending,
+)
 
 
 def hash_password(password: str) -> str:
-    return pwd_context.hash(password)
+    return password_hasher.hash(password)
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+    return password_hasher.verify(plain_password, hashed_password)
 
 
 def create_access_token(subject: str) -> tuple[str, datetime]:
     expire = datetime.now(UTC) + timedelta(minutes=settings.access_token_expire_minutes)
-    payload = {"sub": subject, "type": "access", "exp": expire}
+    payload = {"sub": subject, "type": "access", "jti": str(uuid4()), "exp": expire}
     return jwt.encode(payload, settings.secret_key, algorithm=settings.algorithm), expire
 
 
@@ -1,40 +1,93 @@
 from __future__ import annotations
 
 import logging
+import threading
 
 from fastapi import FastAPI, HTTPException, Request
 from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
 
 from app.api.router import api_router
 from app.core.config import settings
 from app.core.logging import configure_logging
+from app.core.metrics import MetricsMiddleware, metrics
+from app.core.rate_limit import RateLimitMiddleware, default_policies, rate_limit_backend
+from app.core.readiness import readiness
 from app.core.response import error_response, success_response
+from app.core.security import HasherSaturated
 from app.db.base import Base
 from app.db.session import engine
+from app.services.nlp_service import symptom_extractor
+from app.services.prediction_service import prediction_engine
+from app.services.refresh_token_service import refresh_token_purger
 
 configure_logging()
 logger = logging.getLogger(__name__)
 
+API_PREFIX = "/api/v1"
+
 app = FastAPI(
     title=settings.app_name,
     version="1.0.0",
     description="ProactiveCare AI backend for health monitoring and explainable predictions.",
 )
 
+# Added first so it sits inside CORS: preflights skip it and 429s still get CORS headers.
+if settings.rate_limit_enabled:
+    app.add_middleware(
+        RateLimitMiddleware, policies=default_policies(rate_limit_backend, API_PREFIX)
+    )
 app.add_middleware(
     CORSMiddleware,
     allow_origins=settings.cors_list,
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[
+        "Server-Timing",
+        "RateLimit-Limit",
+        "RateLimit-Remaining",
+        "RateLimit-Reset",
+        "Retry-After",
+        "X-Next-Cursor",
+    ],
 )
+app.add_middleware(MetricsMiddleware)
+
+
+def _warm_up() -> None:
+    try:
+        if settings.db_create_all_on_startup:
+            with readiness.track("database"):
+                Base.metadata.create_all(bind=engine)
+        with readiness.track("prediction_engine"):
+            prediction_engine.warm_up()
+        with readiness.track("symptom_extractor"):
+            symptom_extractor.ensure_loaded()
+            symptom_extractor.extract("warm-up: mild cough")
+    except Exception:  # noqa: BLE001
+        logger.exception("Background warm-up failed; see /ready for details.")
+        return
+    prediction_engine.watch_registry(settings.model_reload_poll_seconds)
+    logger.info("Warm-up finished %.3fs after import.", readiness.report()["uptime_seconds"])
 
 
 @app.on_event("startup")
 def startup_event() -> None:
-    Base.metadata.create_all(bind=engine)
+    # Fail fast on a misconfigured production worker; everything slow happens in the background.
+    prediction_engine.check_artifacts()
+    metrics.start_flusher()
+    refresh_token_purger.start(settings.refresh_token_purge_interval_seconds)
+    if settings.warm_up_on_startup:
+        components = ["prediction_engine", "symptom_extractor"]
+        if settings.db_create_all_on_startup:
+            components.insert(0, "database")
+        readiness.register(*components)
+        threading.Thread(target=_warm_up, name="warm-up", daemon=True).start()
+    elif settings.db_create_all_on_startup:
+        # Without warm-up the models load lazily on first use, so nothing is left to wait for.
+        Base.metadata.create_all(bind=engine)
     logger.info("Application started.")
 
 
@@ -43,6 +96,16 @@ async def http_exception_handler(_: Request, exc: HTTPException):
     return JSONResponse(
         status_code=exc.status_code,
         content=error_response(message=str(exc.detail)),
+        headers=exc.headers,
+    )
+
+
+@app.exception_handler(HasherSaturated)
+async def hasher_saturated_handler(_: Request, exc: HasherSaturated):
+    return JSONResponse(
+        status_code=503,
+        content=error_response(message=str(exc)),
+        headers={"Retry-After": str(exc.retry_after)},
     )
 
 
@@ -65,4 +128,21 @@ def health_check():
     return success_response({"status": "healthy"})
 
 
-app.include_router(api_router, prefix="/api/v1")
+@app.get("/ready")
+def readiness_check():
+    report = readiness.report()
+    if not report["ready"]:
+        return JSONResponse(
+            status_code=503, content=error_response(message="Starting", errors=report)
+        )
+    return success_response(report)
+
+
+@app.get("/metrics", include_in_schema=False)
+def metrics_endpoint():
+    return PlainTextResponse(
+        metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+
+app.include_router(api_router, prefix=API_PREFIX)
@@ -2,7 +2,7 @@ from __future__ import annotations
 
 from datetime import UTC, datetime
 
-from sqlalchemy import JSON, DateTime, Float, ForeignKey, Integer, String, Text
+from sqlalchemy import JSON, DateTime, Float, ForeignKey, Index, Integer, String, Text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.db.base import Base
@@ -10,9 +10,16 @@ from app.db.base import Base
 
 class HealthEntry(Base):
     __tablename__ = "health_entries"
+    __table_args__ = (
+        # History pages are range scans over one user's entries, newest first.
+        Index("ix_health_entries_user_id_recorded_at_id", "user_id", "recorded_at", "id"),
+        Index(
+            "ix_health_entries_user_id_idempotency_key", "user_id", "idempotency_key", unique=True
+        ),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
-    user_id: Mapped[int] = mapped_column(Integer, ForeignKey("users.id", ondelete="CASCADE"), index=True)
+    user_id: Mapped[int] = mapped_column(Integer, ForeignKey("users.id", ondelete="CASCADE"))
 
     recorded_at: Mapped[datetime] = mapped_column(DateTime, default=lambda: datetime.now(UTC))
     symptoms_text: Mapped[str] = mapped_column(Text)
@@ -30,6 +37,9 @@ class HealthEntry(Base):
     risk_level: Mapped[str | None] = mapped_column(String(20), nullable=True)
     predictions: Mapped[list[dict] | None] = mapped_column(JSON, nullable=True)
     explanation: Mapped[list[str] | None] = mapped_column(JSON, nullable=True)
+    explanation_status: Mapped[str | None] = mapped_column(String(16), nullable=True)
+    model_version: Mapped[str | None] = mapped_column(String(64), nullable=True, index=True)
+    idempotency_key: Mapped[str | None] = mapped_column(String(128), nullable=True)
 
     created_at: Mapped[datetime] = mapped_column(DateTime, default=lambda: datetime.now(UTC))
     updated_at: Mapped[datetime] = mapped_column(
@@ -1,11 +1,14 @@
 from __future__ import annotations
 
 from datetime import datetime
+from typing import Any
 
 from pydantic import BaseModel, Field
 
 from app.schemas.common import BaseSchema
 
+MAX_BULK_ENTRIES = 5000
+
 
 class HealthEntryBase(BaseModel):
     recorded_at: datetime | None = None
@@ -27,6 +30,16 @@ class HealthEntryCreate(HealthEntryBase):
     explanation: list[str] | None = None
 
 
+class HealthEntryBulkItem(HealthEntryCreate):
+    # Scoped to the user; resending a key returns the entry it created instead of a copy.
+    idempotency_key: str | None = Field(default=None, min_length=1, max_length=128)
+
+
+class HealthEntryBulkInput(BaseModel):
+    # Items are validated in the route so a bad record only fails itself.
+    items: list[dict[str, Any]] = Field(min_length=1, max_length=MAX_BULK_ENTRIES)
+
+
 class HealthEntryUpdate(BaseModel):
     symptoms_text: str | None = Field(default=None, min_length=3, max_length=5000)
     symptom_tags: list[str] | None = None
@@ -56,3 +69,6 @@ class HealthEntryResponse(BaseSchema):
     risk_level: str | None = None
     predictions: list[dict] | None = None
     explanation: list[str] | None = None
+    explanation_status: str | None = None
+    model_version: str | None = None
+    idempotency_key: str | None = None
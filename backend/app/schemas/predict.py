@@ -1,6 +1,12 @@
 from __future__ import annotations
 
-from pydantic import BaseModel, Field
+from typing import Any
+
+from pydantic import BaseModel, Field, model_validator
+from pydantic_core import PydanticCustomError
+
+MAX_BATCH_SIZE = 500
+MAX_EXTRACT_BATCH_SIZE = 2000
 
 
 class PredictionInput(BaseModel):
@@ -13,6 +19,27 @@ class PredictionInput(BaseModel):
     glucose: float | None = Field(default=None, ge=20, le=600)
     weight: float | None = Field(default=None, ge=1, le=500)
     save_entry: bool = True
+    # Return predictions now and compute the SHAP explanation in the background.
+    defer_explanation: bool = False
+
+    @model_validator(mode="after")
+    def deferred_explanations_need_an_entry(self) -> PredictionInput:
+        if self.defer_explanation and not self.save_entry:
+            # A custom error keeps the exception object out of ``errors()`` so it stays JSON-serializable.
+            raise PydanticCustomError(
+                "defer_explanation_without_entry",
+                "defer_explanation requires save_entry, the explanation is stored on the entry",
+            )
+        return self
+
+
+class BatchPredictionInput(BaseModel):
+    # Items are validated one by one in the route so a bad record only fails itself.
+    items: list[dict[str, Any]] = Field(min_length=1, max_length=MAX_BATCH_SIZE)
+
+
+class SymptomBatchInput(BaseModel):
+    texts: list[str] = Field(min_length=1, max_length=MAX_EXTRACT_BATCH_SIZE)
 
 
 class ConditionPrediction(BaseModel):
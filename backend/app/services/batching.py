@@ -0,0 +1,156 @@
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from collections import Counter, deque
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import Any
+
+from app.core.config import settings
+from app.core.metrics import collect_stages, record_stages, stage
+from app.services.prediction_service import PredictionEngine, prediction_engine
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class _PendingRequest:
+    payloads: list[dict[str, Any]]
+    tag_lists: list[list[str]]
+    enqueued_at: float
+    future: Future = field(default_factory=Future)
+
+
+class PredictionBatcher:
+    """Coalesces concurrent featurize + predict calls into one batched inference.
+
+    Route handlers run on the threadpool, so callers block on a future while a single
+    worker thread drains the queue every ``window_ms`` or once ``max_batch_size`` rows wait.
+    """
+
+    def __init__(
+        self, engine: PredictionEngine, enabled: bool, window_ms: float, max_batch_size: int
+    ) -> None:
+        self.engine = engine
+        self.enabled = enabled
+        self.window_s = max(0.0, window_ms) / 1000
+        self.max_batch_size = max(1, max_batch_size)
+
+        self._pending: deque[_PendingRequest] = deque()
+        self._pending_rows = 0
+        self._condition = threading.Condition()
+        self._worker: threading.Thread | None = None
+
+        self._batches = 0
+        self._rows = 0
+        self._largest_batch = 0
+        self._wait_seconds = 0.0
+        self._batch_sizes: Counter[int] = Counter()
+
+    def run(self, payloads: list[dict[str, Any]], tag_lists: list[list[str]]):
+        if not self.enabled or len(payloads) >= self.max_batch_size:
+            features = self.engine.featurize(payloads, tag_lists)
+            return features, self.engine.predict_top3_features(features)
+
+        request = _PendingRequest(payloads, tag_lists, time.perf_counter())
+        with self._condition:
+            self._ensure_worker()
+            self._pending.append(request)
+            self._pending_rows += len(payloads)
+            self._condition.notify()
+        with stage("batch_wait"):
+            features, predictions, timings = request.future.result()
+        # The worker timed featurize/predict_proba on its own thread; report them for this caller.
+        record_stages(timings)
+        return features, predictions
+
+    def stats(self) -> dict[str, Any]:
+        with self._condition:
+            return {
+                "enabled": self.enabled,
+                "window_ms": self.window_s * 1000,
+                "max_batch_size": self.max_batch_size,
+                "queue_depth": len(self._pending),
+                "queued_rows": self._pending_rows,
+                "batches": self._batches,
+                "rows": self._rows,
+                "mean_batch_size": round(self._rows / self._batches, 3) if self._batches else 0.0,
+                "largest_batch": self._largest_batch,
+                "mean_queue_wait_ms": (
+                    round(self._wait_seconds * 1000 / self._rows, 3) if self._rows else 0.0
+                ),
+                "batch_size_counts": {
+                    str(size): count for size, count in sorted(self._batch_sizes.items())
+                },
+            }
+
+    def _ensure_worker(self) -> None:
+        if self._worker is None or not self._worker.is_alive():
+            self._worker = threading.Thread(
+                target=self._work, name="prediction-batcher", daemon=True
+            )
+            self._worker.start()
+
+    def _take_batch(self) -> list[_PendingRequest]:
+        with self._condition:
+            while not self._pending:
+                self._condition.wait()
+
+            deadline = self._pending[0].enqueued_at + self.window_s
+            while self._pending_rows < self.max_batch_size:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                self._condition.wait(remaining)
+
+            batch: list[_PendingRequest] = []
+            rows = 0
+            while self._pending and (
+                not batch or rows + len(self._pending[0].payloads) <= self.max_batch_size
+            ):
+                request = self._pending.popleft()
+                batch.append(request)
+                rows += len(request.payloads)
+            self._pending_rows -= rows
+            return batch
+
+    def _work(self) -> None:
+        while True:
+            batch = self._take_batch()
+            started = time.perf_counter()
+            payloads = [payload for request in batch for payload in request.payloads]
+            tag_lists = [tags for request in batch for tags in request.tag_lists]
+            try:
+                with collect_stages() as timings:
+                    features = self.engine.featurize(payloads, tag_lists)
+                    predictions = self.engine.predict_top3_features(features)
+            except Exception as exc:  # noqa: BLE001
+                logger.exception("Batched prediction failed for %s requests.", len(batch))
+                for request in batch:
+                    request.future.set_exception(exc)
+                continue
+
+            offset = 0
+            for request in batch:
+                end = offset + len(request.payloads)
+                request.future.set_result((features[offset:end], predictions[offset:end], timings))
+                offset = end
+
+            with self._condition:
+                self._batches += 1
+                self._rows += len(payloads)
+                self._largest_batch = max(self._largest_batch, len(payloads))
+                self._batch_sizes[len(payloads)] += 1
+                self._wait_seconds += sum(
+                    (started - request.enqueued_at) * len(request.payloads) for request in batch
+                )
+
+
+prediction_batcher = PredictionBatcher(
+    prediction_engine,
+    enabled=settings.prediction_batching_enabled,
+    window_ms=settings.prediction_batch_window_ms,
+    max_batch_size=settings.prediction_max_batch_size,
+)
@@ -0,0 +1,146 @@
+from __future__ import annotations
+
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any
+
+from sqlalchemy import update
+
+from app.core.config import settings
+from app.core.metrics import stage
+from app.db.session import SessionLocal
+from app.models.health_entry import HealthEntry
+from app.services.prediction_service import PredictionEngine, prediction_engine
+
+logger = logging.getLogger(__name__)
+
+PENDING = "pending"
+READY = "ready"
+FAILED = "failed"
+# The queue was full when the entry was saved; fetching the explanation resubmits it.
+SHED = "shed"
+
+_PAYLOAD_COLUMNS = (
+    "symptoms_text",
+    "heart_rate",
+    "systolic_bp",
+    "diastolic_bp",
+    "temperature",
+    "spo2",
+    "glucose",
+    "weight",
+)
+
+
+@dataclass
+class ExplanationJob:
+    entry_id: int
+    payload: dict[str, Any]
+    symptom_tags: list[str]
+    top_condition: str
+    # The served version that scored the entry; the explanation must come from the same model.
+    model_version: str
+
+    @classmethod
+    def from_entry(cls, entry: HealthEntry) -> ExplanationJob:
+        return cls(
+            entry_id=entry.id,
+            payload={name: getattr(entry, name) for name in _PAYLOAD_COLUMNS},
+            symptom_tags=list(entry.symptom_tags or []),
+            top_condition=entry.predictions[0]["condition"],
+            model_version=entry.model_version,
+        )
+
+
+class ExplanationQueue:
+    """Computes SHAP explanations for saved entries off the request path.
+
+    At most ``max_pending`` jobs wait for the ``workers`` threads. When the queue is full
+    ``submit`` refuses the job and the caller marks the entry shed instead of running SHAP on
+    the request thread; the client picks it up later by fetching the explanation again.
+    """
+
+    def __init__(
+        self, engine: PredictionEngine, session_factory, workers: int, max_pending: int
+    ) -> None:
+        self.engine = engine
+        self.session_factory = session_factory
+        self.workers = max(1, workers)
+        self.max_pending = max(1, max_pending)
+        self._executor: ThreadPoolExecutor | None = None
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._completed = 0
+        self._shed = 0
+
+    def submit(self, job: ExplanationJob) -> bool:
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self._shed += 1
+                return False
+            self._pending += 1
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.workers, thread_name_prefix="explain"
+                )
+        self._executor.submit(self._run_queued, job)
+        return True
+
+    def run(self, job: ExplanationJob) -> list[str]:
+        model = self.engine.loaded_model(job.model_version)
+        if model is None:
+            raise LookupError(f"Model {job.model_version} is no longer loaded")
+        with stage("shap_deferred"):
+            explanation = self.engine.explain(
+                job.payload, job.symptom_tags, job.top_condition, model=model
+            )
+        self._set_status(job.entry_id, READY, explanation=explanation)
+        return explanation
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "max_pending": self.max_pending,
+                "pending": self._pending,
+                "completed": self._completed,
+                "shed": self._shed,
+            }
+
+    def _set_status(self, entry_id: int, status: str, **values: Any) -> None:
+        db = self.session_factory()
+        try:
+            db.execute(
+                update(HealthEntry)
+                .where(HealthEntry.id == entry_id)
+                .values(explanation_status=status, **values)
+            )
+            db.commit()
+        finally:
+            db.close()
+
+    def _run_queued(self, job: ExplanationJob) -> None:
+        try:
+            self.run(job)
+        except Exception:  # noqa: BLE001
+            logger.exception("Deferred explanation failed for entry %s.", job.entry_id)
+            try:
+                self._set_status(job.entry_id, FAILED)
+            except Exception:  # noqa: BLE001
+                logger.exception(
+                    "Could not mark the explanation for entry %s as failed.", job.entry_id
+                )
+        finally:
+            with self._lock:
+                self._pending -= 1
+                self._completed += 1
+
+
+explanation_queue = ExplanationQueue(
+    prediction_engine,
+    SessionLocal,
+    workers=settings.explanation_workers,
+    max_pending=settings.explanation_max_pending,
+)
@@ -1,12 +1,16 @@
 from __future__ import annotations
 
 import logging
-import re
+import threading
 from dataclasses import dataclass
 
 import numpy as np
 from sklearn.feature_extraction.text import TfidfVectorizer
 
+from app.core.config import settings
+from app.services.symptom_encoder import SymptomEncoder, load_symptom_encoder
+from app.services.symptom_matcher import PhraseMatcher, load_vocabulary, merge_vocabularies
+
 logger = logging.getLogger(__name__)
 
 SYMPTOM_KEYWORDS: dict[str, list[str]] = {
@@ -23,6 +27,14 @@ SYMPTOM_KEYWORDS: dict[str, list[str]] = {
 }
 
 
+def symptom_vocabulary(path: str | None = None) -> dict[str, list[str]]:
+    """Built-in keywords, extended with the tags and synonyms in ``SYMPTOM_VOCABULARY_PATH``."""
+    path = path if path is not None else settings.symptom_vocabulary_path
+    if not path:
+        return SYMPTOM_KEYWORDS
+    return merge_vocabularies(SYMPTOM_KEYWORDS, load_vocabulary(settings.backend_root / path))
+
+
 @dataclass
 class ExtractionResult:
     tags: list[str]
@@ -30,70 +42,95 @@ class ExtractionResult:
 
 
 class SymptomExtractor:
-    def __init__(self) -> None:
-        self.labels = list(SYMPTOM_KEYWORDS.keys())
-        corpus = [" ".join(SYMPTOM_KEYWORDS[label]) for label in self.labels]
+    def __init__(self, lazy: bool = False, vocabulary: dict[str, list[str]] | None = None) -> None:
+        self.vocabulary = vocabulary if vocabulary is not None else symptom_vocabulary()
+        self.labels = list(self.vocabulary.keys())
+        self.matcher = PhraseMatcher(self.vocabulary)
+        corpus = self._label_texts()
         self.vectorizer = TfidfVectorizer(ngram_range=(1, 2), min_df=1)
         self.label_vectors = self.vectorizer.fit_transform(corpus)
-        self._bert_encoder = self._load_distilbert_encoder()
+        self._bert_encoder: SymptomEncoder | None = None
+        self._label_embeddings: np.ndarray | None = None
+        self._encoder_loaded = False
+        self._load_lock = threading.Lock()
+        if not lazy:
+            self.ensure_loaded()
+
+    def ensure_loaded(self) -> None:
+        # Importing torch/transformers is the slow part, so it waits for warm-up or first use.
+        if not self._encoder_loaded:
+            with self._load_lock:
+                if not self._encoder_loaded:
+                    self._bert_encoder = self._load_distilbert_encoder()
+                    self._encoder_loaded = True
 
     def _load_distilbert_encoder(self):
-        try:
-            import torch
-            from transformers import AutoModel, AutoTokenizer
-
-            if not torch.cuda.is_available():
-                logger.info("GPU unavailable. DistilBERT extractor disabled.")
-                return None
-
-            tokenizer = AutoTokenizer.from_pretrained("distilbert-base-uncased")
-            model = AutoModel.from_pretrained("distilbert-base-uncased")
-            model.eval()
-            return {"torch": torch, "tokenizer": tokenizer, "model": model}
-        except Exception as exc:  # noqa: BLE001
-            logger.warning("DistilBERT symptom extractor unavailable: %s", exc)
+        encoder = load_symptom_encoder(
+            settings.symptom_encoder_mode,
+            settings.backend_root / settings.symptom_encoder_dir,
+            threads=settings.symptom_encoder_threads,
+            quantize=settings.symptom_encoder_quantize,
+            max_tokens=settings.symptom_encoder_max_tokens,
+            batch_size=settings.symptom_encoder_batch_size,
+            budget_ms=settings.symptom_encoder_budget_ms,
+        )
+        if encoder is None:
             return None
+        cache_dir = settings.backend_root / settings.symptom_encoder_cache_dir
+        self._label_embeddings = encoder.label_embeddings(self._label_texts(), cache_dir)
+        logger.info(
+            "DistilBERT symptom extractor on %s, ~%.1f ms per text.",
+            encoder.description,
+            encoder.ms_per_text,
+        )
+        if 0 < encoder.budget_ms < encoder.ms_per_text:
+            logger.warning(
+                "DistilBERT needs ~%.1f ms per text, over the %.0f ms budget; it will be skipped.",
+                encoder.ms_per_text,
+                encoder.budget_ms,
+            )
+        return encoder
+
+    def _label_texts(self) -> list[str]:
+        return [" ".join(self.vocabulary[label]) for label in self.labels]
 
     def _keyword_extract(self, text: str) -> set[str]:
-        lowered = text.lower()
-        found = set()
-        for tag, phrases in SYMPTOM_KEYWORDS.items():
-            if any(re.search(rf"\b{re.escape(p)}\b", lowered) for p in phrases):
-                found.add(tag)
-        return found
+        return self.matcher.match(text.lower())
 
     def _tfidf_extract(self, text: str) -> set[str]:
-        vec = self.vectorizer.transform([text.lower()])
-        scores = (self.label_vectors @ vec.T).toarray().ravel()
-        return {self.labels[idx] for idx, score in enumerate(scores) if score >= 0.12}
+        return self._tfidf_extract_batch([text])[0]
+
+    def _tfidf_extract_batch(self, texts: list[str]) -> list[set[str]]:
+        vecs = self.vectorizer.transform([text.lower() for text in texts])
+        scores = (vecs @ self.label_vectors.T).toarray()
+        return [{self.labels[idx] for idx in np.flatnonzero(row >= 0.12)} for row in scores]
 
     def _bert_extract(self, text: str) -> set[str]:
-        if not self._bert_encoder:
-            return set()
+        return self._bert_extract_batch([text])[0]
 
+    def _bert_extract_batch(self, texts: list[str]) -> list[set[str]]:
+        self.ensure_loaded()
         encoder = self._bert_encoder
-        torch = encoder["torch"]
-        tokenizer = encoder["tokenizer"]
-        model = encoder["model"]
+        if not encoder or not encoder.fits(len(texts)):
+            return [set() for _ in texts]
 
-        with torch.no_grad():
-            text_tokens = tokenizer(text, return_tensors="pt", truncation=True, padding=True)
-            text_emb = model(**text_tokens).last_hidden_state.mean(dim=1)
-
-            label_texts = [" ".join(SYMPTOM_KEYWORDS[label]) for label in self.labels]
-            label_tokens = tokenizer(label_texts, return_tensors="pt", truncation=True, padding=True)
-            label_emb = model(**label_tokens).last_hidden_state.mean(dim=1)
-
-            similarities = torch.nn.functional.cosine_similarity(text_emb, label_emb)
-            values = similarities.detach().cpu().numpy()
-
-        return {self.labels[i] for i, v in enumerate(values) if float(v) > 0.55}
+        similarities = encoder.encode(texts) @ self._label_embeddings.T
+        return [{self.labels[idx] for idx in np.flatnonzero(row > 0.55)} for row in similarities]
 
     def extract(self, text: str) -> ExtractionResult:
-        keyword_tags = self._keyword_extract(text)
-        tfidf_tags = self._tfidf_extract(text)
-        bert_tags = self._bert_extract(text)
-
+        return self.extract_batch([text])[0]
+
+    def extract_batch(self, texts: list[str]) -> list[ExtractionResult]:
+        tfidf_batch = self._tfidf_extract_batch(texts)
+        bert_batch = self._bert_extract_batch(texts)
+        return [
+            self._combine(self._keyword_extract(text), tfidf_tags, bert_tags)
+            for text, tfidf_tags, bert_tags in zip(texts, tfidf_batch, bert_batch, strict=True)
+        ]
+
+    def _combine(
+        self, keyword_tags: set[str], tfidf_tags: set[str], bert_tags: set[str]
+    ) -> ExtractionResult:
         tags = sorted(keyword_tags | tfidf_tags | bert_tags)
         if not tags:
             tags = ["general_malaise"]
@@ -101,4 +138,4 @@ class SymptomExtractor:
         return ExtractionResult(tags=tags, source=source)
 
 
-symptom_extractor = SymptomExtractor()
+symptom_extractor = SymptomExtractor(lazy=True)
@@ -0,0 +1,215 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import pickle
+import re
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+from concurrent.futures import Future
+from typing import Any
+
+from app.core.config import settings
+from app.services.prediction_service import PredictionEngine, prediction_engine
+
+VITAL_PRECISION: dict[str, int] = {
+    "heart_rate": 0,
+    "systolic_bp": 0,
+    "diastolic_bp": 0,
+    "temperature": 1,
+    "spo2": 1,
+    "glucose": 1,
+    "weight": 1,
+}
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def canonical_inputs(payload: dict[str, Any]) -> dict[str, Any]:
+    canonical: dict[str, Any] = {
+        "symptoms_text": _WHITESPACE.sub(" ", payload["symptoms_text"]).strip().lower()
+    }
+    for name, digits in VITAL_PRECISION.items():
+        value = payload.get(name)
+        if value is not None:
+            value = round(float(value), digits)
+            canonical[name] = int(value) if digits == 0 else value
+        else:
+            canonical[name] = None
+    return canonical
+
+
+class PredictionCache:
+    """LRU + TTL cache of inference results keyed on canonical inputs and the model version.
+
+    Values are stored pickled, which bounds memory by exact byte size and hands every
+    caller its own copy. Concurrent misses for one key are collapsed into a single compute.
+    """
+
+    def __init__(
+        self,
+        engine: PredictionEngine,
+        enabled: bool,
+        max_entries: int,
+        max_bytes: int,
+        ttl_seconds: float,
+    ) -> None:
+        self.engine = engine
+        self.enabled = enabled
+        self.max_entries = max(1, max_entries)
+        self.max_bytes = max(1, max_bytes)
+        self.ttl_seconds = ttl_seconds
+
+        self._entries: OrderedDict[str, tuple[float, bytes]] = OrderedDict()
+        self._in_flight: dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._bytes = 0
+        self._version: str | None = None
+
+        self._hits = 0
+        self._misses = 0
+        self._coalesced = 0
+        self._evictions = 0
+        self._expirations = 0
+        self._invalidations = 0
+
+    def key_for(self, canonical: dict[str, Any]) -> str:
+        return hashlib.sha256(json.dumps(canonical, sort_keys=True).encode()).hexdigest()
+
+    def get_or_compute_many(
+        self, keys: list[str], compute: Callable[[list[int]], list[Any]]
+    ) -> list[Any]:
+        results: list[Any] = [None] * len(keys)
+        owned: dict[str, list[int]] = {}
+        waiting: list[tuple[int, Future]] = []
+
+        # The engine's version is read outside our lock so a model swap never waits on the cache.
+        current = self.engine.model_version
+        with self._lock:
+            self._check_version(current)
+            now = time.monotonic()
+            for index, key in enumerate(keys):
+                blob = self._lookup(key, now)
+                if blob is not None:
+                    self._hits += 1
+                    results[index] = pickle.loads(blob)
+                elif key in owned:
+                    owned[key].append(index)
+                elif key in self._in_flight:
+                    self._coalesced += 1
+                    waiting.append((index, self._in_flight[key]))
+                else:
+                    self._misses += 1
+                    owned[key] = [index]
+                    self._in_flight[key] = Future()
+            version = self._version
+
+        if owned:
+            self._compute_owned(owned, compute, results, version)
+
+        for index, future in waiting:
+            results[index] = pickle.loads(future.result())
+        return results
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self._invalidations += 1
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            lookups = self._hits + self._misses + self._coalesced
+            return {
+                "enabled": self.enabled,
+                "model_version": self._version,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self._hits,
+                "misses": self._misses,
+                "coalesced": self._coalesced,
+                "hit_ratio": round((self._hits + self._coalesced) / lookups, 4) if lookups else 0.0,
+                "evictions": self._evictions,
+                "expirations": self._expirations,
+                "invalidations": self._invalidations,
+                "in_flight": len(self._in_flight),
+            }
+
+    def _compute_owned(
+        self,
+        owned: dict[str, list[int]],
+        compute: Callable[[list[int]], list[Any]],
+        results: list[Any],
+        version: str,
+    ) -> None:
+        keys = list(owned)
+        try:
+            values = compute([owned[key][0] for key in keys])
+            blobs = [pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL) for value in values]
+        except BaseException as exc:
+            with self._lock:
+                for key in keys:
+                    self._in_flight.pop(key).set_exception(exc)
+            raise
+
+        current = self.engine.model_version
+        with self._lock:
+            # Results computed against a model that has since been swapped are not stored.
+            store = version == current
+            expires_at = time.monotonic() + self.ttl_seconds
+            for key, blob in zip(keys, blobs, strict=True):
+                if store:
+                    self._store(key, blob, expires_at)
+                self._in_flight.pop(key).set_result(blob)
+
+        for key, blob in zip(keys, blobs, strict=True):
+            for index in owned[key]:
+                results[index] = pickle.loads(blob)
+
+    def _check_version(self, current: str) -> None:
+        if current != self._version:
+            if self._version is not None:
+                self._entries.clear()
+                self._bytes = 0
+                self._invalidations += 1
+            self._version = current
+
+    def _lookup(self, key: str, now: float) -> bytes | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, blob = entry
+        if expires_at <= now:
+            del self._entries[key]
+            self._bytes -= len(blob)
+            self._expirations += 1
+            return None
+        self._entries.move_to_end(key)
+        return blob
+
+    def _store(self, key: str, blob: bytes, expires_at: float) -> None:
+        if len(blob) > self.max_bytes:
+            return
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self._bytes -= len(previous[1])
+        self._entries[key] = (expires_at, blob)
+        self._bytes += len(blob)
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            _, (_, evicted) = self._entries.popitem(last=False)
+            self._bytes -= len(evicted)
+            self._evictions += 1
+
+
+prediction_cache = PredictionCache(
+    prediction_engine,
+    enabled=settings.prediction_cache_enabled,
+    max_entries=settings.prediction_cache_max_entries,
+    max_bytes=settings.prediction_cache_max_bytes,
+    ttl_seconds=settings.prediction_cache_ttl_seconds,
+)
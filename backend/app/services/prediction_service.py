@@ -1,6 +1,10 @@
 from __future__ import annotations
 
 import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import UTC, datetime
 from pathlib import Path
 from typing import Any
 
@@ -9,86 +13,494 @@ import numpy as np
 import pandas as pd
 
 from app.core.config import settings
+from app.core.metrics import stage
+from ml.compact import FOREST_ARRAYS, flatten_forest
+from ml.registry import ModelArtifacts, ModelRegistry
 
 logger = logging.getLogger(__name__)
 
+INFERENCE_MODES = ("sklearn", "compiled")
+
+
+def _model_inputs(payload: dict[str, Any], symptom_tags: list[str]) -> dict[str, Any]:
+    text = payload["symptoms_text"]
+    if symptom_tags:
+        text = f"{text}. symptoms: {', '.join(symptom_tags)}"
+    return {
+        "symptoms_text": text,
+        "heart_rate": payload.get("heart_rate") or 0,
+        "systolic_bp": payload.get("systolic_bp") or 0,
+        "diastolic_bp": payload.get("diastolic_bp") or 0,
+        "temperature": payload.get("temperature") or 0.0,
+        "spo2": payload.get("spo2") or 0.0,
+        "glucose": payload.get("glucose") or 0.0,
+        "weight": payload.get("weight") or 0.0,
+    }
+
+
+class CompiledFeaturizer:
+    """Reproduces the fitted ColumnTransformer (TF-IDF text + numeric passthrough) without pandas."""
+
+    def __init__(self, preprocess) -> None:
+        text_vectorizer = preprocess.named_transformers_["text"]
+        if (
+            text_vectorizer.binary
+            or text_vectorizer.sublinear_tf
+            or text_vectorizer.norm not in ("l2", None)
+        ):
+            raise ValueError("Unsupported TF-IDF configuration for compiled inference.")
+
+        self.analyzer = text_vectorizer.build_analyzer()
+        self.vocabulary: dict[str, int] = dict(text_vectorizer.vocabulary_)
+        self.idf = (
+            text_vectorizer.idf_ if text_vectorizer.use_idf else np.ones(len(self.vocabulary))
+        )
+        self.normalize = text_vectorizer.norm == "l2"
+        self.text_offset = preprocess.output_indices_["text"].start
+        self.numeric_offset = preprocess.output_indices_["num"].start
+        self.numeric_columns = next(
+            columns for name, _, columns in preprocess.transformers_ if name == "num"
+        )
+        self.n_features = preprocess.output_indices_["num"].stop
+
+    def transform(self, payloads: list[dict[str, Any]], tag_lists: list[list[str]]) -> np.ndarray:
+        features = np.zeros((len(payloads), self.n_features), dtype=np.float64)
+        for row, (payload, symptom_tags) in enumerate(zip(payloads, tag_lists, strict=True)):
+            inputs = _model_inputs(payload, symptom_tags)
+
+            counts: dict[int, int] = {}
+            for term in self.analyzer(inputs["symptoms_text"]):
+                idx = self.vocabulary.get(term)
+                if idx is not None:
+                    counts[idx] = counts.get(idx, 0) + 1
+            if counts:
+                indices = np.fromiter(counts.keys(), dtype=np.intp, count=len(counts))
+                weights = (
+                    np.fromiter(counts.values(), dtype=np.float64, count=len(counts))
+                    * self.idf[indices]
+                )
+                if self.normalize:
+                    weights /= np.sqrt(np.dot(weights, weights))
+                features[row, self.text_offset + indices] = weights
+
+            for col, name in enumerate(self.numeric_columns):
+                features[row, self.numeric_offset + col] = inputs[name]
+        return features
+
+
+class CompiledForest:
+    """RandomForestClassifier flattened into contiguous node arrays and traversed level by level."""
+
+    def __init__(self, classifier) -> None:
+        self._set_arrays(flatten_forest(classifier))
+
+    @classmethod
+    def load(cls, path: Path) -> CompiledForest:
+        # Compact variants ship float32 arrays written at training time (ml.compact).
+        forest = cls.__new__(cls)
+        with np.load(path) as arrays:
+            forest._set_arrays({name: arrays[name] for name in arrays.files})
+        return forest
+
+    def _set_arrays(self, arrays: dict[str, np.ndarray]) -> None:
+        self.classes_ = arrays["classes"]
+        self.roots = arrays["roots"]
+        self.feature = arrays["feature"]
+        self.threshold = arrays["threshold"]
+        self.left = arrays["left"]
+        self.right = arrays["right"]
+        self.value = arrays["value"]
+        self.max_depth = int(arrays["max_depth"])
+
+    def predict_proba(self, features: np.ndarray) -> np.ndarray:
+        # sklearn compares float32 inputs against float64 thresholds; match that exactly.
+        features = np.asarray(features, dtype=np.float32)
+        rows = np.arange(features.shape[0])[np.newaxis, :]
+        nodes = np.repeat(self.roots[:, np.newaxis], features.shape[0], axis=1)
+        for _ in range(self.max_depth):
+            go_left = features[rows, self.feature[nodes]] <= self.threshold[nodes]
+            nodes = np.where(go_left, self.left[nodes], self.right[nodes])
+        return self.value[nodes].sum(axis=0, dtype=np.float64) / len(self.roots)
+
+
+def _build_dataframe(payloads: list[dict[str, Any]], tag_lists: list[list[str]]) -> pd.DataFrame:
+    return pd.DataFrame(
+        [_model_inputs(payload, tags) for payload, tags in zip(payloads, tag_lists, strict=True)]
+    )
+
+
+def _canary_payloads(n_samples: int, seed: int) -> list[dict[str, Any]]:
+    from ml.data_generator import generate_synthetic_dataset
+
+    return (
+        generate_synthetic_dataset(n_samples=n_samples, seed=seed)
+        .drop(columns=["condition"])
+        .to_dict("records")
+    )
+
+
+@dataclass
+class LoadedModel:
+    version: str
+    model: Any
+    vectorizer: Any
+    metadata: dict[str, Any]
+    variant: str | None = None
+    compiled: tuple[CompiledFeaturizer, CompiledForest] | None = None
+    loaded_at: datetime = field(default_factory=lambda: datetime.now(UTC))
+    _explainer: Any = None
+    _explainer_lock: threading.Lock = field(default_factory=threading.Lock)
+
+    @property
+    def served_version(self) -> str:
+        return f"{self.version}:{self.variant}" if self.variant else self.version
+
+    def matches(self, artifacts: ModelArtifacts) -> bool:
+        return (self.version, self.variant) == (artifacts.version, artifacts.variant_name)
+
+    @property
+    def preprocess(self):
+        return self.model.named_steps["preprocess"]
+
+    @property
+    def classifier(self):
+        return self.model.named_steps["clf"]
+
+    def tree_explainer(self):
+        if self._explainer is None:
+            with self._explainer_lock:
+                if self._explainer is None:
+                    import shap
+
+                    self._explainer = shap.TreeExplainer(self.classifier)
+        return self._explainer
+
+
+@dataclass
+class FeatureBatch:
+    # Features stay bound to the model that produced them, so a hot swap between
+    # featurization and prediction/explanation cannot mix two vocabularies.
+    model: LoadedModel
+    matrix: Any
+
+    def __len__(self) -> int:
+        return self.matrix.shape[0]
+
+    def __getitem__(self, rows: slice) -> FeatureBatch:
+        return FeatureBatch(self.model, self.matrix[rows])
+
 
 class PredictionEngine:
-    def __init__(self) -> None:
-        self.model = None
-        self.vectorizer = None
-        self._ensure_artifacts()
-        self._load_artifacts()
+    def __init__(
+        self,
+        inference_mode: str | None = None,
+        registry: ModelRegistry | None = None,
+        lazy: bool = False,
+        variant: str | None = None,
+    ) -> None:
+        self.inference_mode = inference_mode or settings.inference_mode
+        if self.inference_mode not in INFERENCE_MODES:
+            raise ValueError(f"Unknown inference mode: {self.inference_mode}")
+        self.registry = registry or ModelRegistry(settings.model_root)
+        self.variant = (variant if variant is not None else settings.model_variant) or None
+        self._previous: LoadedModel | None = None
+        self._reload_lock = threading.Lock()
+        self._reload_state: dict[str, Any] = {"status": "idle", "target": None, "error": None}
+        self._active: LoadedModel | None = None
+        self._load_lock = threading.Lock()
+        if not lazy:
+            self.ensure_loaded()
+
+    def ensure_loaded(self) -> LoadedModel:
+        if self._active is None:
+            with self._load_lock:
+                if self._active is None:
+                    self._ensure_artifacts()
+                    self._active = self._load(self._resolve())
+        return self._active
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._active is not None
+
+    @property
+    def active(self) -> LoadedModel:
+        return self._active or self.ensure_loaded()
+
+    @property
+    def model(self):
+        return self.active.model
+
+    @property
+    def model_version(self) -> str:
+        return self.active.served_version
+
+    def check_artifacts(self) -> None:
+        if not self.registry.versions() and not settings.allow_model_auto_train:
+            raise RuntimeError(
+                f"No model artifacts under {self.registry.root} and MODEL_AUTO_TRAIN is off. "
+                "Run `python -m ml.train` before starting the API."
+            )
 
     def _ensure_artifacts(self) -> None:
-        model_path = settings.model_path
-        vectorizer_path = settings.vectorizer_path
-        if model_path.exists() and vectorizer_path.exists():
+        if self.registry.versions():
             return
+        self.check_artifacts()
         logger.info("Model artifacts missing. Training synthetic baseline model.")
         from ml.train import train_and_save
 
-        train_and_save(Path(settings.model_dir))
+        # Single-threaded: this runs inside a serving worker, next to its siblings on the host.
+        train_and_save(self.registry.root, n_jobs=1)
 
-    def _load_artifacts(self) -> None:
-        self.model = joblib.load(settings.model_path)
-        self.vectorizer = joblib.load(settings.vectorizer_path)
+    def _resolve(self, version: str | None = None) -> ModelArtifacts:
+        artifacts = self.registry.resolve(version)
+        if self.variant is None:
+            return artifacts
+        try:
+            return artifacts.variant(self.variant)
+        except FileNotFoundError:
+            logger.warning(
+                "Model %s has no %r variant; serving the full model.",
+                artifacts.version,
+                self.variant,
+            )
+            return artifacts
 
-    def _build_dataframe(self, payload: dict[str, Any], symptom_tags: list[str]) -> pd.DataFrame:
-        text = payload["symptoms_text"]
-        if symptom_tags:
-            text = f"{text}. symptoms: {', '.join(symptom_tags)}"
+    def _load(self, artifacts: ModelArtifacts) -> LoadedModel:
+        loaded = LoadedModel(
+            version=artifacts.version,
+            model=joblib.load(artifacts.model_path),
+            vectorizer=joblib.load(artifacts.vectorizer_path),
+            metadata=artifacts.metadata(),
+            variant=artifacts.variant_name,
+        )
+        if self.inference_mode == "compiled":
+            loaded.compiled = self._compile(loaded, artifacts.directory / FOREST_ARRAYS)
+        return loaded
 
-        return pd.DataFrame(
-            [
-                {
-                    "symptoms_text": text,
-                    "heart_rate": payload.get("heart_rate") or 0,
-                    "systolic_bp": payload.get("systolic_bp") or 0,
-                    "diastolic_bp": payload.get("diastolic_bp") or 0,
-                    "temperature": payload.get("temperature") or 0.0,
-                    "spo2": payload.get("spo2") or 0.0,
-                    "glucose": payload.get("glucose") or 0.0,
-                    "weight": payload.get("weight") or 0.0,
-                }
-            ]
+    def _compile(
+        self, loaded: LoadedModel, arrays_path: Path
+    ) -> tuple[CompiledFeaturizer, CompiledForest] | None:
+        try:
+            featurizer = CompiledFeaturizer(loaded.preprocess)
+            forest = (
+                CompiledForest.load(arrays_path)
+                if arrays_path.exists()
+                else CompiledForest(loaded.classifier)
+            )
+        except Exception as exc:  # noqa: BLE001
+            logger.warning("Compiled inference unavailable, using sklearn pipeline: %s", exc)
+            return None
+        # Stored float32 leaf probabilities round in the 7th digit; splits stay exact either way.
+        tolerance = 1e-6 if forest.value.dtype == np.float32 else 1e-9
+
+        payloads = _canary_payloads(64, seed=7)
+        tag_lists = [[] for _ in payloads]
+        expected = loaded.model.predict_proba(_build_dataframe(payloads, tag_lists))
+        actual = forest.predict_proba(featurizer.transform(payloads, tag_lists))
+        if not np.allclose(actual, expected, rtol=0, atol=tolerance):
+            logger.warning(
+                "Compiled forest disagrees with predict_proba (max abs diff %.3g), using sklearn pipeline.",
+                float(np.max(np.abs(actual - expected))),
+            )
+            return None
+        logger.info(
+            "Compiled inference enabled for %s (%s nodes).", loaded.version, len(forest.threshold)
+        )
+        return featurizer, forest
+
+    def warm_up(self) -> None:
+        self._warm_up(self.ensure_loaded())
+
+    def _warm_up(self, loaded: LoadedModel) -> None:
+        payloads = _canary_payloads(16, seed=11)
+        tag_lists = [[] for _ in payloads]
+        features = self._featurize_with(loaded, payloads, tag_lists)
+        predictions = self.predict_top3_features(features)
+        confidences = [rows[0]["confidence"] for rows in predictions]
+        if not all(0.0 <= value <= 1.0 for value in confidences):
+            raise ValueError("Canary predictions produced invalid confidences")
+        self.explain_features(
+            features, payloads, tag_lists, [rows[0]["condition"] for rows in predictions]
+        )
+
+    def reload(self, version: str | None = None, wait: bool = False) -> threading.Thread | None:
+        if not self._reload_lock.acquire(blocking=False):
+            logger.info("Model reload already in progress; ignoring request for %s.", version)
+            return None
+
+        def run() -> None:
+            try:
+                self._reload_state = {"status": "loading", "target": version, "error": None}
+                artifacts = self._resolve(version)
+                if self.active.matches(artifacts):
+                    self._reload_state = {"status": "idle", "target": None, "error": None}
+                    return
+                if self._previous is not None and self._previous.matches(artifacts):
+                    loaded = self._previous
+                else:
+                    loaded = self._load(artifacts)
+                    self._warm_up(loaded)
+                # A single reference assignment is the swap; in-flight requests keep the old model.
+                self._previous, self._active = self.active, loaded
+                self._reload_state = {"status": "idle", "target": None, "error": None}
+                logger.info("Model version %s is now active.", loaded.version)
+            except Exception as exc:  # noqa: BLE001
+                logger.exception(
+                    "Model reload to %s failed; keeping %s.", version, self.model_version
+                )
+                self._reload_state = {"status": "failed", "target": version, "error": str(exc)}
+            finally:
+                self._reload_lock.release()
+
+        if wait:
+            run()
+            return None
+        thread = threading.Thread(target=run, name="model-reload", daemon=True)
+        thread.start()
+        return thread
+
+    def watch_registry(self, interval_seconds: float) -> threading.Thread | None:
+        if interval_seconds <= 0:
+            return None
+
+        def poll() -> None:
+            while True:
+                time.sleep(interval_seconds)
+                try:
+                    wanted = self.registry.active_version()
+                except Exception as exc:  # noqa: BLE001
+                    logger.warning("Could not read active model version: %s", exc)
+                    continue
+                if not self.is_loaded:
+                    continue
+                if (
+                    wanted
+                    and wanted != self._active.version
+                    and self._reload_state["target"] != wanted
+                ):
+                    logger.info("Active model pointer changed to %s; reloading.", wanted)
+                    self.reload(wanted)
+
+        thread = threading.Thread(target=poll, name="model-registry-watch", daemon=True)
+        thread.start()
+        return thread
+
+    def status(self) -> dict[str, Any]:
+        active, previous = self.active, self._previous
+        return {
+            "active_version": active.version,
+            "loaded_at": active.loaded_at.isoformat(),
+            "previous_version": previous.version if previous else None,
+            "variant": active.variant,
+            "inference_mode": "compiled" if active.compiled else "sklearn",
+            "metadata": active.metadata,
+            "available_versions": self.registry.versions(),
+            "reload": dict(self._reload_state),
+        }
+
+    def _featurize_with(
+        self, loaded: LoadedModel, payloads: list[dict[str, Any]], tag_lists: list[list[str]]
+    ) -> FeatureBatch:
+        if loaded.compiled is not None:
+            return FeatureBatch(loaded, loaded.compiled[0].transform(payloads, tag_lists))
+        return FeatureBatch(
+            loaded, loaded.preprocess.transform(_build_dataframe(payloads, tag_lists))
         )
 
+    def featurize(self, payloads: list[dict[str, Any]], tag_lists: list[list[str]]) -> FeatureBatch:
+        with stage("featurize"):
+            return self._featurize_with(self.active, payloads, tag_lists)
+
     def predict_top3(self, payload: dict[str, Any], symptom_tags: list[str]) -> list[dict]:
-        frame = self._build_dataframe(payload, symptom_tags)
-        probs = self.model.predict_proba(frame)[0]
-        classes = self.model.classes_
-        top_indices = np.argsort(probs)[::-1][:3]
+        return self.predict_top3_batch([payload], [symptom_tags])[0]
+
+    def predict_top3_batch(
+        self, payloads: list[dict[str, Any]], tag_lists: list[list[str]]
+    ) -> list[list[dict]]:
+        return self.predict_top3_features(self.featurize(payloads, tag_lists))
+
+    def predict_top3_features(self, features: FeatureBatch) -> list[list[dict]]:
+        loaded = features.model
+        classifier = loaded.compiled[1] if loaded.compiled is not None else loaded.classifier
+        with stage("predict_proba"):
+            probs = classifier.predict_proba(features.matrix)
+        classes = classifier.classes_
+        top_indices = np.argsort(probs, axis=1)[:, ::-1][:, :3]
         return [
-            {"condition": str(classes[idx]), "confidence": round(float(probs[idx]), 4)}
-            for idx in top_indices
+            [
+                {"condition": str(classes[idx]), "confidence": round(float(row_probs[idx]), 4)}
+                for idx in row_top
+            ]
+            for row_probs, row_top in zip(probs, top_indices, strict=True)
         ]
 
-    def explain(self, payload: dict[str, Any], symptom_tags: list[str], top_condition: str) -> list[str]:
-        frame = self._build_dataframe(payload, symptom_tags)
+    def loaded_model(self, served_version: str) -> LoadedModel | None:
+        """The active or previous model serving ``served_version``, if either still is."""
+        for loaded in (self._active, self._previous):
+            if loaded is not None and loaded.served_version == served_version:
+                return loaded
+        return None
+
+    def explain(
+        self,
+        payload: dict[str, Any],
+        symptom_tags: list[str],
+        top_condition: str,
+        model: LoadedModel | None = None,
+    ) -> list[str]:
+        if model is None:
+            return self.explain_batch([payload], [symptom_tags], [top_condition])[0]
+        features = self._featurize_with(model, [payload], [symptom_tags])
+        return self.explain_features(features, [payload], [symptom_tags], [top_condition])[0]
+
+    def explain_batch(
+        self,
+        payloads: list[dict[str, Any]],
+        tag_lists: list[list[str]],
+        top_conditions: list[str],
+    ) -> list[list[str]]:
+        return self.explain_features(
+            self.featurize(payloads, tag_lists), payloads, tag_lists, top_conditions
+        )
+
+    def explain_features(
+        self,
+        features: FeatureBatch,
+        payloads: list[dict[str, Any]],
+        tag_lists: list[list[str]],
+        top_conditions: list[str],
+    ) -> list[list[str]]:
         try:
-            import shap
-
-            preprocess = self.model.named_steps["preprocess"]
-            classifier = self.model.named_steps["clf"]
-            transformed = preprocess.transform(frame)
-            transformed_dense = transformed.toarray() if hasattr(transformed, "toarray") else transformed
-            feature_names = preprocess.get_feature_names_out()
-
-            explainer = shap.TreeExplainer(classifier)
-            shap_values = explainer.shap_values(transformed_dense)
-            class_index = int(np.where(classifier.classes_ == top_condition)[0][0])
-            class_values = shap_values[class_index][0]
-
-            top_features = np.argsort(np.abs(class_values))[::-1][:5]
-            output = []
-            for idx in top_features:
-                name = str(feature_names[idx]).replace("text__", "").replace("num__", "")
-                output.append(name.replace("_", " "))
-            return output
+            loaded = features.model
+            matrix = features.matrix
+            # TreeExplainer cannot walk sparse input, so densify the shared matrix once here.
+            features_dense = matrix.toarray() if hasattr(matrix, "toarray") else matrix
+            feature_names = loaded.preprocess.get_feature_names_out()
+
+            with stage("shap"):
+                shap_values = loaded.tree_explainer().shap_values(features_dense)
+            # Older shap releases return one (rows, features) array per class.
+            if isinstance(shap_values, list):
+                shap_values = np.stack(shap_values, axis=-1)
+            class_lookup = {str(label): idx for idx, label in enumerate(loaded.classifier.classes_)}
+
+            outputs = []
+            for row, top_condition in enumerate(top_conditions):
+                class_values = shap_values[row, :, class_lookup[top_condition]]
+                top_features = np.argsort(np.abs(class_values))[::-1][:5]
+                output = []
+                for idx in top_features:
+                    name = str(feature_names[idx]).replace("text__", "").replace("num__", "")
+                    output.append(name.replace("_", " "))
+                outputs.append(output)
+            return outputs
         except Exception as exc:  # noqa: BLE001
             logger.warning("SHAP explanation failed, using fallback: %s", exc)
-            return self._fallback_explain(payload, symptom_tags)
+            return [
+                self._fallback_explain(payload, tags)
+                for payload, tags in zip(payloads, tag_lists, strict=True)
+            ]
 
     def _fallback_explain(self, payload: dict[str, Any], symptom_tags: list[str]) -> list[str]:
         features: list[str] = []
@@ -113,4 +525,4 @@ class PredictionEngine:
         return features[:5] if features else ["reported symptom pattern"]
 
 
-prediction_engine = PredictionEngine()
+prediction_engine = PredictionEngine(lazy=True)
@@ -0,0 +1,129 @@
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from datetime import UTC, datetime
+from typing import Any
+
+from sqlalchemy import delete, select, update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models.refresh_token import RefreshToken
+
+logger = logging.getLogger(__name__)
+
+
+def revoke_user_tokens(db: Session, user_id: int) -> int:
+    """Revoke every live refresh token of ``user_id`` in one UPDATE; returns how many."""
+    result = db.execute(
+        update(RefreshToken)
+        .where(RefreshToken.user_id == user_id, RefreshToken.revoked.is_(False))
+        .values(revoked=True)
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+    return result.rowcount
+
+
+class RefreshTokenPurger:
+    """Deletes revoked and expired refresh tokens, walking the primary key in ranges.
+
+    Each batch examines the next ``batch_size`` ids and deletes the dead rows among them in
+    one short transaction, so the work per batch is bounded however large the backlog, no
+    row is scanned twice, and deletes follow primary-key order. Login, refresh and
+    logout interleave freely between batches.
+    """
+
+    def __init__(self, session_factory, batch_size: int, pause_seconds: float = 0.0) -> None:
+        self.session_factory = session_factory
+        self.batch_size = max(1, batch_size)
+        self.pause_seconds = pause_seconds
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+        self._runs = 0
+        self._deleted = 0
+        self._last_run_at: datetime | None = None
+        self._last_run_seconds: float | None = None
+
+    def run_once(self, now: datetime | None = None) -> int:
+        # expires_at is stored naive, in UTC.
+        cutoff = (now or datetime.now(UTC)).replace(tzinfo=None)
+        dead = RefreshToken.revoked.is_(True) | (RefreshToken.expires_at < cutoff)
+        started = time.perf_counter()
+        deleted = 0
+        with self._lock:
+            after = 0
+            while after is not None:
+                count, after = self._delete_batch(dead, after)
+                deleted += count
+                if after is not None and self.pause_seconds > 0:
+                    time.sleep(self.pause_seconds)
+            self._runs += 1
+            self._deleted += deleted
+            self._last_run_at = datetime.now(UTC)
+            self._last_run_seconds = time.perf_counter() - started
+        if deleted:
+            logger.info("Purged %d refresh tokens in %.2fs.", deleted, self._last_run_seconds)
+        return deleted
+
+    def start(self, interval_seconds: float) -> threading.Thread | None:
+        if interval_seconds <= 0 or self._thread is not None:
+            return None
+
+        def loop() -> None:
+            while True:
+                time.sleep(interval_seconds)
+                try:
+                    self.run_once()
+                except Exception:  # noqa: BLE001
+                    logger.exception("Refresh token purge failed.")
+
+        self._thread = threading.Thread(target=loop, name="refresh-token-purge", daemon=True)
+        self._thread.start()
+        return self._thread
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "batch_size": self.batch_size,
+            "runs": self._runs,
+            "deleted": self._deleted,
+            "last_run_at": self._last_run_at.isoformat() if self._last_run_at else None,
+            "last_run_seconds": self._last_run_seconds,
+        }
+
+    def _delete_batch(self, dead, after: int) -> tuple[int, int | None]:
+        """Delete dead rows with ids in ``(after, upper]``; return the count and ``upper``.
+
+        ``upper`` is None once the range reaches the end of the table.
+        """
+        db = self.session_factory()
+        try:
+            upper = db.execute(
+                select(RefreshToken.id)
+                .where(RefreshToken.id > after)
+                .order_by(RefreshToken.id)
+                .offset(self.batch_size - 1)
+                .limit(1)
+            ).scalar_one_or_none()
+            in_range = RefreshToken.id > after
+            if upper is not None:
+                in_range &= RefreshToken.id <= upper
+            result = db.execute(
+                delete(RefreshToken)
+                .where(in_range, dead)
+                .execution_options(synchronize_session=False)
+            )
+            db.commit()
+            return result.rowcount, upper
+        finally:
+            db.close()
+
+
+refresh_token_purger = RefreshTokenPurger(
+    SessionLocal,
+    batch_size=settings.refresh_token_purge_batch_size,
+    pause_seconds=settings.refresh_token_purge_pause_seconds,
+)
@@ -2,6 +2,8 @@ from __future__ import annotations
 
 from dataclasses import dataclass
 
+import numpy as np
+
 
 @dataclass
 class RiskResult:
@@ -11,6 +13,19 @@ class RiskResult:
     warning_message: str | None
 
 
+# (vital, normal low, normal high, mild points, severe points)
+VITAL_RANGES: tuple[tuple[str, float, float, int, int], ...] = (
+    ("heart_rate", 60, 100, 7, 15),
+    ("systolic_bp", 90, 130, 8, 16),
+    ("diastolic_bp", 60, 85, 8, 16),
+    ("temperature", 36.1, 37.7, 10, 18),
+    ("spo2", 95, 100, 12, 24),
+    ("glucose", 70, 140, 8, 16),
+)
+
+EMERGENCY_MESSAGE = "Dangerously abnormal vitals detected. Seek medical care now."
+
+
 def _add_for_range(value: float | None, low: float, high: float, mild: int, severe: int) -> int:
     if value is None:
         return 0
@@ -22,27 +37,25 @@ def _add_for_range(value: float | None, low: float, high: float, mild: int, seve
     return 0
 
 
+def _level_for(score: int) -> str:
+    if score >= 67:
+        return "High"
+    if score >= 34:
+        return "Moderate"
+    return "Low"
+
+
 def calculate_risk(vitals: dict, top_confidence: float) -> RiskResult:
     score = 0
     emergency = False
     warning = None
 
-    score += _add_for_range(vitals.get("heart_rate"), 60, 100, 7, 15)
-    score += _add_for_range(vitals.get("systolic_bp"), 90, 130, 8, 16)
-    score += _add_for_range(vitals.get("diastolic_bp"), 60, 85, 8, 16)
-    score += _add_for_range(vitals.get("temperature"), 36.1, 37.7, 10, 18)
-    score += _add_for_range(vitals.get("spo2"), 95, 100, 12, 24)
-    score += _add_for_range(vitals.get("glucose"), 70, 140, 8, 16)
+    for name, low, high, mild, severe in VITAL_RANGES:
+        score += _add_for_range(vitals.get(name), low, high, mild, severe)
 
     score += int(max(0, min(1, top_confidence)) * 25)
     score = max(0, min(100, score))
-
-    if score >= 67:
-        level = "High"
-    elif score >= 34:
-        level = "Moderate"
-    else:
-        level = "Low"
+    level = _level_for(score)
 
     hr = vitals.get("heart_rate")
     sbp = vitals.get("systolic_bp")
@@ -61,8 +74,56 @@ def calculate_risk(vitals: dict, top_confidence: float) -> RiskResult:
     ]
     if any(dangerous):
         emergency = True
-        warning = "Dangerously abnormal vitals detected. Seek medical care now."
+        warning = EMERGENCY_MESSAGE
         score = max(score, 85)
         level = "High"
 
     return RiskResult(score=score, level=level, emergency_warning=emergency, warning_message=warning)
+
+
+def calculate_risk_batch(vitals_rows: list[dict], top_confidences: list[float]) -> list[RiskResult]:
+    if not vitals_rows:
+        return []
+
+    # Missing vitals become NaN, which fails every comparison and so never scores.
+    columns = {
+        name: np.array(
+            [np.nan if row.get(name) is None else row[name] for row in vitals_rows], dtype=float
+        )
+        for name in ("heart_rate", "systolic_bp", "diastolic_bp", "temperature", "spo2", "glucose")
+    }
+
+    score = np.zeros(len(vitals_rows), dtype=np.int64)
+    for name, low, high, mild, severe in VITAL_RANGES:
+        values = columns[name]
+        out_of_range = (values < low) | (values > high)
+        severe_out = (values < low - (low * 0.1)) | (values > high + (high * 0.1))
+        score += np.where(severe_out, severe, np.where(out_of_range, mild, 0))
+
+    confidence = np.clip(np.asarray(top_confidences, dtype=float), 0, 1)
+    score += (confidence * 25).astype(np.int64)
+    score = np.clip(score, 0, 100)
+
+    hr = columns["heart_rate"]
+    glucose = columns["glucose"]
+    dangerous = (
+        (columns["spo2"] < 90)
+        | (hr < 40)
+        | (hr > 150)
+        | (columns["systolic_bp"] > 180)
+        | (columns["diastolic_bp"] > 120)
+        | (columns["temperature"] >= 39.5)
+        | (glucose < 54)
+        | (glucose > 300)
+    )
+    score = np.where(dangerous, np.maximum(score, 85), score)
+
+    return [
+        RiskResult(
+            score=int(row_score),
+            level="High" if emergency else _level_for(int(row_score)),
+            emergency_warning=bool(emergency),
+            warning_message=EMERGENCY_MESSAGE if emergency else None,
+        )
+        for row_score, emergency in zip(score, dangerous, strict=True)
+    ]
@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+from typing import Any
+
+from app.core.metrics import stage
+from app.schemas.predict import PredictionInput
+from app.services.batching import prediction_batcher
+from app.services.nlp_service import ExtractionResult, symptom_extractor
+from app.services.prediction_cache import canonical_inputs, prediction_cache
+from app.services.prediction_service import FeatureBatch, prediction_engine
+from app.services.recommendation_service import recommendation_for
+from app.services.risk_service import RiskResult, calculate_risk_batch
+
+DISCLAIMER = "This is not medical advice. Consult a licensed clinician for diagnosis."
+
+InferenceResult = tuple[ExtractionResult, list[dict], list[str] | None, str]
+ScoredItem = tuple[ExtractionResult, list[dict], RiskResult, list[str] | None, str]
+
+
+def infer(
+    payload_data: list[dict[str, Any]], explain: bool | list[bool] = True
+) -> list[InferenceResult]:
+    with stage("nlp"):
+        extracted = symptom_extractor.extract_batch(
+            [payload["symptoms_text"] for payload in payload_data]
+        )
+    tag_lists = [result.tags for result in extracted]
+
+    features, predictions = prediction_batcher.run(payload_data, tag_lists)
+    mask = explain if isinstance(explain, list) else [explain] * len(payload_data)
+    rows = [index for index, wanted in enumerate(mask) if wanted]
+    top_features: list[list[str] | None] = [None] * len(payload_data)
+    if rows:
+        subset = (
+            features
+            if len(rows) == len(payload_data)
+            else FeatureBatch(features.model, features.matrix[rows])
+        )
+        explained = prediction_engine.explain_features(
+            subset,
+            [payload_data[index] for index in rows],
+            [tag_lists[index] for index in rows],
+            [predictions[index][0]["condition"] for index in rows],
+        )
+        for index, value in zip(rows, explained, strict=True):
+            top_features[index] = value
+    return [
+        (*row, features.model.served_version)
+        for row in zip(extracted, predictions, top_features, strict=True)
+    ]
+
+
+def score_batch(
+    payloads: list[PredictionInput], explain: bool | list[bool] = True
+) -> list[ScoredItem]:
+    payload_data = [payload.model_dump() for payload in payloads]
+    if isinstance(explain, list) and all(explain):
+        explain = True
+    # Cached results always carry an explanation, so rows that skip it bypass the cache.
+    if prediction_cache.enabled and explain is True:
+        # The canonical form only names the cache entry; misses are scored on the request as sent.
+        inferred = prediction_cache.get_or_compute_many(
+            [prediction_cache.key_for(canonical_inputs(payload)) for payload in payload_data],
+            lambda indices: infer([payload_data[index] for index in indices]),
+        )
+    else:
+        inferred = infer(payload_data, explain=explain)
+
+    top_confidences = [row[1][0]["confidence"] if row[1] else 0.0 for row in inferred]
+    with stage("risk"):
+        risks = calculate_risk_batch(payload_data, top_confidences)
+    return [
+        (extracted, predictions, risk, top_features, model_version)
+        for (extracted, predictions, top_features, model_version), risk in zip(
+            inferred, risks, strict=True
+        )
+    ]
+
+
+def prediction_result(
+    extracted: ExtractionResult,
+    predictions: list[dict],
+    risk: RiskResult,
+    top_features: list[str] | None,
+    model_version: str,
+) -> dict[str, Any]:
+    for row in predictions:
+        row["recommended_next_steps"] = recommendation_for(row["condition"])
+
+    return {
+        "symptom_tags": extracted.tags,
+        "nlp_source": extracted.source,
+        "predictions": predictions,
+        "risk_score": risk.score,
+        "risk_level": risk.level,
+        "emergency_warning": risk.emergency_warning,
+        "warning_message": risk.warning_message,
+        "top_contributing_features": top_features,
+        "model_version": model_version,
+        "disclaimer": DISCLAIMER,
+    }
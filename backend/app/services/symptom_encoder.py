@@ -0,0 +1,200 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+ENCODER_MODES = ("auto", "cpu", "gpu", "off")
+HUB_MODEL = "distilbert-base-uncased"
+# Weight given to the newest batch in the running cost-per-text estimate.
+COST_SMOOTHING = 0.2
+
+
+class SymptomEncoder:
+    """Mean-pooled, L2-normalised DistilBERT embeddings with a per-call latency budget.
+
+    The cost of one text is measured while the label embeddings are built and then tracked
+    as a running average. A batch whose estimated cost exceeds ``budget_ms`` is not encoded
+    at all, so callers fall back to the TF-IDF and keyword tags instead of blowing the
+    request's latency.
+    """
+
+    def __init__(
+        self,
+        torch,
+        tokenizer,
+        model,
+        device: str,
+        quantized: bool,
+        fingerprint: str,
+        max_tokens: int,
+        batch_size: int,
+        budget_ms: float,
+    ) -> None:
+        self.torch = torch
+        self.tokenizer = tokenizer
+        self.model = model
+        self.device = device
+        self.quantized = quantized
+        self.fingerprint = fingerprint
+        self.max_tokens = max_tokens
+        self.batch_size = max(1, batch_size)
+        self.budget_ms = budget_ms
+        self.ms_per_text: float | None = None
+        self.skipped_batches = 0
+        self._lock = threading.Lock()
+
+    @property
+    def description(self) -> str:
+        return f"{self.device}{'-int8' if self.quantized else ''}"
+
+    def fits(self, count: int) -> bool:
+        if self.budget_ms <= 0 or self.ms_per_text is None:
+            return True
+        if count * self.ms_per_text <= self.budget_ms:
+            return True
+        self.skipped_batches += 1
+        return False
+
+    def encode(self, texts: list[str]) -> np.ndarray:
+        torch = self.torch
+        started = time.perf_counter()
+        chunks = []
+        # Torch modules are not safe to call from several request threads at once.
+        with self._lock, torch.inference_mode():
+            for start in range(0, len(texts), self.batch_size):
+                tokens = self.tokenizer(
+                    texts[start : start + self.batch_size],
+                    return_tensors="pt",
+                    truncation=True,
+                    max_length=self.max_tokens,
+                    padding=True,
+                ).to(self.device)
+                hidden = self.model(**tokens).last_hidden_state
+                # Average real tokens only; padding would otherwise pull short texts together.
+                mask = tokens["attention_mask"].unsqueeze(-1).to(hidden.dtype)
+                pooled = (hidden * mask).sum(dim=1) / mask.sum(dim=1).clamp(min=1.0)
+                chunks.append(torch.nn.functional.normalize(pooled, dim=1).float().cpu().numpy())
+        self._record((time.perf_counter() - started) * 1000, len(texts))
+        return np.concatenate(chunks) if chunks else np.empty((0, 0), dtype=np.float32)
+
+    def label_embeddings(self, label_texts: list[str], cache_dir: Path | None) -> np.ndarray:
+        key = hashlib.sha256(
+            json.dumps([self.fingerprint, self.quantized, self.max_tokens, label_texts]).encode(
+                "utf-8"
+            )
+        ).hexdigest()[:16]
+        path = cache_dir / f"labels-{key}.npy" if cache_dir else None
+        if path is not None and path.exists():
+            embeddings = np.load(path)
+            # A cache hit skips the first real encode, so time one label to seed the budget.
+            self.encode(label_texts[:1])
+            return embeddings
+
+        embeddings = self.encode(label_texts)
+        if path is not None:
+            try:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                tmp = path.with_suffix(".tmp.npy")
+                np.save(tmp, embeddings)
+                tmp.replace(path)
+            except OSError:
+                logger.warning("Could not cache label embeddings in %s.", cache_dir, exc_info=True)
+        return embeddings
+
+    def _record(self, elapsed_ms: float, count: int) -> None:
+        if not count:
+            return
+        cost = elapsed_ms / count
+        previous = self.ms_per_text
+        self.ms_per_text = (
+            cost if previous is None else previous + COST_SMOOTHING * (cost - previous)
+        )
+
+
+def _fingerprint(model_dir: Path | None) -> str:
+    if model_dir is None:
+        return HUB_MODEL
+    files = sorted(path for path in model_dir.iterdir() if path.is_file())
+    return json.dumps([[path.name, path.stat().st_size, path.stat().st_mtime_ns] for path in files])
+
+
+def load_symptom_encoder(
+    mode: str,
+    model_dir: Path,
+    threads: int,
+    quantize: bool,
+    max_tokens: int,
+    batch_size: int,
+    budget_ms: float,
+) -> SymptomEncoder | None:
+    """Load DistilBERT for ``mode``, or return None when that mode cannot run here.
+
+    ``auto`` and ``gpu`` use CUDA only (``auto`` quietly stays off without it). ``cpu`` reads
+    the model from ``model_dir`` and never downloads; with ``quantize`` its linear layers run
+    as dynamic int8.
+    """
+    if mode not in ENCODER_MODES:
+        raise ValueError(
+            f"SYMPTOM_ENCODER_MODE must be one of {', '.join(ENCODER_MODES)}, got {mode!r}"
+        )
+    if mode == "off":
+        return None
+    try:
+        import torch
+        from transformers import AutoModel, AutoTokenizer
+    except ImportError as exc:
+        logger.warning("DistilBERT symptom extractor unavailable: %s", exc)
+        return None
+
+    local_dir = model_dir if (model_dir / "config.json").exists() else None
+    if mode == "cpu":
+        if local_dir is None:
+            logger.warning(
+                "No DistilBERT model in %s; run scripts/fetch_symptom_encoder.py. Encoder disabled.",
+                model_dir,
+            )
+            return None
+        device = "cpu"
+        if threads > 0:
+            torch.set_num_threads(threads)
+    else:
+        if not torch.cuda.is_available():
+            log = logger.info if mode == "auto" else logger.warning
+            log("GPU unavailable. DistilBERT extractor disabled.")
+            return None
+        device = "cuda"
+
+    try:
+        source = str(local_dir) if local_dir else HUB_MODEL
+        tokenizer = AutoTokenizer.from_pretrained(source, local_files_only=local_dir is not None)
+        model = AutoModel.from_pretrained(source, local_files_only=local_dir is not None)
+        model.eval()
+        quantized = device == "cpu" and quantize
+        if quantized:
+            model = torch.ao.quantization.quantize_dynamic(
+                model, {torch.nn.Linear}, dtype=torch.qint8
+            )
+        model.to(device)
+    except Exception as exc:  # noqa: BLE001
+        logger.warning("DistilBERT symptom extractor unavailable: %s", exc)
+        return None
+
+    return SymptomEncoder(
+        torch,
+        tokenizer,
+        model,
+        device=device,
+        quantized=quantized,
+        fingerprint=_fingerprint(local_dir),
+        max_tokens=max_tokens,
+        batch_size=batch_size,
+        budget_ms=budget_ms,
+    )
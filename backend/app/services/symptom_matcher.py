@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+import csv
+import json
+from collections import deque
+from pathlib import Path
+
+
+def _is_word(char: str) -> bool:
+    # Same character class as ``\w`` in a str regex.
+    return char.isalnum() or char == "_"
+
+
+class PhraseMatcher:
+    """Finds every tag whose phrases occur in a text, in one pass over the text.
+
+    An Aho-Corasick automaton is built once from all phrases. A hit only counts when both
+    ends sit on a word boundary, exactly like ``re.search(rf"\\b{re.escape(phrase)}\\b", text)``,
+    so the result matches the per-phrase regex loop it replaces without its tags x phrases
+    cost. Matching is case-sensitive; callers lower-case the text and phrases are lower-cased
+    on build.
+    """
+
+    def __init__(self, vocabulary: dict[str, list[str]]) -> None:
+        self.tags = list(vocabulary)
+        self._goto: list[dict[str, int]] = [{}]
+        self.phrase_count = 0
+
+        pending: list[list[tuple[int, int]]] = [[]]
+        for tag_index, phrases in enumerate(vocabulary.values()):
+            for phrase in phrases:
+                phrase = phrase.strip().lower()
+                if not phrase:
+                    continue
+                state = 0
+                for char in phrase:
+                    next_state = self._goto[state].get(char)
+                    if next_state is None:
+                        next_state = len(self._goto)
+                        self._goto[state][char] = next_state
+                        self._goto.append({})
+                        pending.append([])
+                    state = next_state
+                if (len(phrase), tag_index) not in pending[state]:
+                    pending[state].append((len(phrase), tag_index))
+                    self.phrase_count += 1
+
+        self._fail = [0] * len(self._goto)
+        # Per state: (phrase length, tag index) for every phrase ending there, fail chain included.
+        self._outputs: list[tuple[tuple[int, int], ...]] = [()] * len(self._goto)
+        queue = deque(self._goto[0].values())
+        self._outputs[0] = tuple(pending[0])
+        while queue:
+            state = queue.popleft()
+            self._outputs[state] = tuple(pending[state]) + self._outputs[self._fail[state]]
+            for char, child in self._goto[state].items():
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[child] = target if target != child else 0
+                queue.append(child)
+
+    def __len__(self) -> int:
+        return self.phrase_count
+
+    def match(self, text: str) -> set[str]:
+        goto, fail, outputs = self._goto, self._fail, self._outputs
+        found: set[int] = set()
+        state = 0
+        length = len(text)
+        for end, char in enumerate(text, start=1):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if not outputs[state]:
+                continue
+            for size, tag_index in outputs[state]:
+                if tag_index in found:
+                    continue
+                start = end - size
+                before = _is_word(text[start - 1]) if start else False
+                after = _is_word(text[end]) if end < length else False
+                if before != _is_word(text[start]) and after != _is_word(text[end - 1]):
+                    found.add(tag_index)
+        return {self.tags[index] for index in found}
+
+
+def load_vocabulary(path: str | Path) -> dict[str, list[str]]:
+    """Read ``{tag: [phrase, ...]}`` from a JSON file, or ``tag,phrase`` rows from a CSV file."""
+    path = Path(path)
+    if path.suffix.lower() == ".csv":
+        vocabulary: dict[str, list[str]] = {}
+        with path.open(encoding="utf-8", newline="") as handle:
+            for row in csv.DictReader(handle):
+                vocabulary.setdefault(row["tag"].strip(), []).append(row["phrase"])
+        return vocabulary
+    return {
+        tag: list(phrases) for tag, phrases in json.loads(path.read_text(encoding="utf-8")).items()
+    }
+
+
+def merge_vocabularies(*vocabularies: dict[str, list[str]]) -> dict[str, list[str]]:
+    merged: dict[str, list[str]] = {}
+    for vocabulary in vocabularies:
+        for tag, phrases in vocabulary.items():
+            known = merged.setdefault(tag, [])
+            known.extend(phrase for phrase in phrases if phrase not in known)
+    return merged
@@ -0,0 +1,281 @@
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import os
+import platform
+import sys
+import tempfile
+import time
+from collections.abc import Callable
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+_DB_DIR = tempfile.mkdtemp(prefix="proactivecare-bench-")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_DB_DIR}/bench.db")
+os.environ.setdefault("SECRET_KEY", "benchmark_secret_key")
+os.environ.setdefault("DB_CREATE_ALL_ON_STARTUP", "true")
+# The route case fires far more requests per minute than a real client may.
+os.environ.setdefault("RATE_LIMIT_PER_MINUTE", "100000000")
+
+from app.schemas.health import HealthEntryResponse  # noqa: E402
+from app.services.nlp_service import symptom_extractor  # noqa: E402
+from app.services.prediction_service import prediction_engine  # noqa: E402
+from app.services.risk_service import calculate_risk  # noqa: E402
+from app.services.symptom_matcher import PhraseMatcher  # noqa: E402
+from ml.data_generator import generate_synthetic_dataset  # noqa: E402
+
+BASELINE_PATH = Path(__file__).with_name("baseline.json")
+COMPARED_STATS = ("p50_ms", "p95_ms")
+# Timings below this many milliseconds are too close to timer noise to flag.
+NOISE_FLOOR_MS = 0.02
+
+Case = Callable[[int], Any]
+
+
+def _payloads(samples: int, seed: int) -> list[dict[str, Any]]:
+    data = generate_synthetic_dataset(n_samples=samples, seed=seed)
+    return data.drop(columns=["condition"]).to_dict("records")
+
+
+def _large_vocabulary(phrases: int, per_tag: int = 5) -> dict[str, list[str]]:
+    # Ontology-sized vocabulary of distinct multi-word synonyms sharing many prefixes, which
+    # is what makes a clinical synonym list expensive for a per-phrase scan.
+    qualifiers = [
+        "acute",
+        "chronic",
+        "mild",
+        "severe",
+        "recurrent",
+        "intermittent",
+        "sudden",
+        "persistent",
+    ]
+    sites = [
+        "chest",
+        "abdominal",
+        "lower back",
+        "joint",
+        "muscle",
+        "ear",
+        "eye",
+        "skin",
+        "throat",
+        "neck",
+    ]
+    findings = [
+        "pain",
+        "swelling",
+        "rash",
+        "itching",
+        "stiffness",
+        "numbness",
+        "burning",
+        "cramping",
+        "tenderness",
+    ]
+    words = [f"{q} {s} {f}" for q in qualifiers for s in sites for f in findings]
+    vocabulary: dict[str, list[str]] = {}
+    for index in range(phrases):
+        phrase = f"{words[index % len(words)]} type {index // len(words)}"
+        vocabulary.setdefault(f"finding_{index // per_tag}", []).append(phrase)
+    return vocabulary
+
+
+def _measure(case: Case, iterations: int, warmup: int) -> dict[str, float]:
+    for index in range(warmup):
+        case(index)
+    timings = np.empty(iterations)
+    started = time.perf_counter()
+    for index in range(iterations):
+        t0 = time.perf_counter()
+        case(index)
+        timings[index] = time.perf_counter() - t0
+    elapsed = time.perf_counter() - started
+    timings *= 1000
+    return {
+        "iterations": iterations,
+        "p50_ms": round(float(np.percentile(timings, 50)), 4),
+        "p95_ms": round(float(np.percentile(timings, 95)), 4),
+        "p99_ms": round(float(np.percentile(timings, 99)), 4),
+        "mean_ms": round(float(timings.mean()), 4),
+        "throughput_per_s": round(iterations / elapsed, 1),
+    }
+
+
+def _route_case(payloads: list[dict[str, Any]], save_entry: bool) -> Case:
+    from fastapi.testclient import TestClient
+
+    from app.main import app
+
+    client = TestClient(app)
+    client.__enter__()
+    credentials = {"email": "bench@example.com", "password": "BenchPass123"}
+    client.post("/api/v1/auth/register", json=credentials)
+    token = client.post("/api/v1/auth/login", json=credentials).json()["data"]["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+
+    def call(index: int) -> None:
+        response = client.post(
+            "/api/v1/predict",
+            json={**payloads[index % len(payloads)], "save_entry": save_entry},
+            headers=headers,
+        )
+        if response.status_code != 200:
+            raise RuntimeError(f"/predict returned {response.status_code}: {response.text}")
+
+    return call
+
+
+def build_cases(samples: int, seed: int) -> dict[str, Case | None]:
+    payloads = _payloads(samples, seed)
+    texts = [payload["symptoms_text"] for payload in payloads]
+    tag_lists = [result.tags for result in symptom_extractor.extract_batch(texts)]
+    predictions = prediction_engine.predict_top3_batch(payloads, tag_lists)
+    top_conditions = [rows[0]["condition"] for rows in predictions]
+    confidences = [rows[0]["confidence"] for rows in predictions]
+    n = len(payloads)
+
+    batch_texts = [texts[index % n] for index in range(256)]
+    large_matcher = PhraseMatcher(_large_vocabulary(10_000))
+    lowered = [text.lower() for text in texts]
+
+    symptom_extractor.ensure_loaded()
+    bert_available = symptom_extractor._bert_encoder is not None
+
+    entries = [
+        {
+            "id": index + 1,
+            "user_id": 1,
+            "recorded_at": datetime.now(UTC),
+            **payload,
+            "symptom_tags": tag_lists[index],
+            "risk_score": 42.0,
+            "risk_level": "Moderate",
+            "predictions": predictions[index],
+            "explanation": ["symptom:fever", "temperature"],
+            "model_version": prediction_engine.model_version,
+        }
+        for index, payload in enumerate(payloads)
+    ]
+
+    return {
+        "extract.keyword": lambda i: symptom_extractor._keyword_extract(texts[i % n]),
+        "extract.keyword_10k": lambda i: large_matcher.match(lowered[i % n]),
+        "extract.tfidf": lambda i: symptom_extractor._tfidf_extract(texts[i % n]),
+        "extract.bert": (
+            (lambda i: symptom_extractor._bert_extract(texts[i % n])) if bert_available else None
+        ),
+        "extract.full": lambda i: symptom_extractor.extract(texts[i % n]),
+        "extract.batch_256": lambda i: symptom_extractor.extract_batch(batch_texts),
+        "engine.predict_top3": lambda i: prediction_engine.predict_top3(
+            payloads[i % n], tag_lists[i % n]
+        ),
+        "engine.explain": lambda i: prediction_engine.explain(
+            payloads[i % n], tag_lists[i % n], top_conditions[i % n]
+        ),
+        "risk.calculate_risk": lambda i: calculate_risk(payloads[i % n], confidences[i % n]),
+        "schema.health_entry_response": lambda i: HealthEntryResponse.model_validate(
+            entries[i % n]
+        ).model_dump(mode="json"),
+        "route.predict": _route_case(payloads, save_entry=False),
+        "route.predict_save_entry": _route_case(payloads, save_entry=True),
+    }
+
+
+def compare(results: dict[str, dict], baseline: dict[str, dict], threshold: float) -> list[str]:
+    regressions = []
+    for name, stats in results.items():
+        previous = baseline.get(name)
+        if not previous or "skipped" in stats or "skipped" in previous:
+            continue
+        for stat in COMPARED_STATS:
+            before, after = previous[stat], stats[stat]
+            if after > before * (1 + threshold) and after - before > NOISE_FLOOR_MS:
+                regressions.append(
+                    f"{name} {stat}: {before:.4f} -> {after:.4f} ms (+{(after / before - 1) * 100:.0f}%)"
+                )
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Micro-benchmarks for the prediction hot path.")
+    parser.add_argument("--iterations", type=int, default=300)
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument(
+        "--samples", type=int, default=200, help="Distinct synthetic payloads to cycle through."
+    )
+    parser.add_argument("--seed", type=int, default=2024)
+    parser.add_argument(
+        "--only", nargs="*", help="Run only cases whose name starts with one of these prefixes."
+    )
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.25,
+        help="Allowed slowdown before flagging (0.25 = 25%%).",
+    )
+    parser.add_argument(
+        "--save-baseline", action="store_true", help="Overwrite the baseline with this run."
+    )
+    parser.add_argument("--json", type=Path, help="Also write this run's results to a file.")
+    args = parser.parse_args()
+
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    prediction_engine.warm_up()
+    cases = build_cases(args.samples, args.seed)
+    if args.only:
+        cases = {name: case for name, case in cases.items() if name.startswith(tuple(args.only))}
+
+    results: dict[str, dict] = {}
+    print(f"{'case':<30} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'ops/s':>10}")
+    for name, case in cases.items():
+        if case is None:
+            results[name] = {"skipped": "unavailable in this environment"}
+            print(f"{name:<30} {'skipped':>9}")
+            continue
+        stats = _measure(case, args.iterations, args.warmup)
+        results[name] = stats
+        print(
+            f"{name:<30} {stats['p50_ms']:>9.4f} {stats['p95_ms']:>9.4f} "
+            f"{stats['p99_ms']:>9.4f} {stats['throughput_per_s']:>10.1f}"
+        )
+
+    if args.json:
+        args.json.write_text(json.dumps(results, indent=2), encoding="utf-8")
+
+    if args.save_baseline:
+        document = {
+            "recorded_at": datetime.now(UTC).isoformat(),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "model_version": prediction_engine.model_version,
+            "inference_mode": prediction_engine.inference_mode,
+            "results": results,
+        }
+        args.baseline.write_text(json.dumps(document, indent=2) + "\n", encoding="utf-8")
+        print(f"Baseline written to {args.baseline}")
+        return 0
+
+    if not args.baseline.exists():
+        print(f"No baseline at {args.baseline}; run with --save-baseline to record one.")
+        return 0
+
+    baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+    regressions = compare(results, baseline["results"], args.threshold)
+    if regressions:
+        print(f"\nRegressions beyond {args.threshold:.0%} against {args.baseline.name}:")
+        for line in regressions:
+            print(f"  {line}")
+        return 1
+    print(f"\nNo regressions beyond {args.threshold:.0%} against {args.baseline.name}.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+import json
+import time
+from pathlib import Path
+from typing import Any
+
+import joblib
+import numpy as np
+from sklearn.metrics import f1_score
+
+# Each variant overrides the full model's parameters (same text__/clf__ keys as the search grid).
+COMPACT_VARIANTS: dict[str, dict[str, Any]] = {
+    "small": {
+        "text__max_features": 300,
+        "clf__n_estimators": 80,
+        "clf__max_depth": 18,
+        "clf__min_samples_leaf": 2,
+    },
+    "tiny": {
+        "text__max_features": 150,
+        "clf__n_estimators": 30,
+        "clf__max_depth": 12,
+        "clf__min_samples_leaf": 3,
+        "clf__ccp_alpha": 0.0005,
+    },
+}
+
+FOREST_ARRAYS = "forest.npz"
+
+
+def flatten_forest(classifier, dtype=np.float64) -> dict[str, np.ndarray]:
+    """Flatten a fitted RandomForestClassifier into contiguous node arrays.
+
+    Leaves point back at themselves so a fixed number of traversal steps always lands on a
+    leaf. With ``dtype=np.float32`` thresholds are rounded down to the nearest float32, which
+    keeps ``x <= threshold`` exact for the float32 inputs sklearn compares against.
+    """
+    trees = [estimator.tree_ for estimator in classifier.estimators_]
+    node_counts = np.array([tree.node_count for tree in trees])
+    offsets = np.concatenate([[0], np.cumsum(node_counts)[:-1]])
+    index_dtype = np.int32 if dtype == np.float32 else np.intp
+
+    features, thresholds, lefts, rights, values = [], [], [], [], []
+    for tree, offset in zip(trees, offsets, strict=True):
+        node_ids = np.arange(tree.node_count)
+        is_leaf = tree.children_left == -1
+        features.append(np.where(is_leaf, 0, tree.feature))
+        thresholds.append(tree.threshold)
+        lefts.append(np.where(is_leaf, node_ids, tree.children_left) + offset)
+        rights.append(np.where(is_leaf, node_ids, tree.children_right) + offset)
+
+        leaf_values = tree.value[:, 0, :].astype(np.float64)
+        normalizer = leaf_values.sum(axis=1, keepdims=True)
+        normalizer[normalizer == 0.0] = 1.0
+        values.append(leaf_values / normalizer)
+
+    threshold = np.concatenate(thresholds)
+    if dtype == np.float32:
+        rounded = threshold.astype(np.float32)
+        threshold = np.where(
+            rounded > threshold, np.nextafter(rounded, np.float32(-np.inf)), rounded
+        )
+
+    return {
+        "classes": np.asarray(classifier.classes_).astype(str),
+        "roots": offsets.astype(index_dtype),
+        "feature": np.ascontiguousarray(np.concatenate(features), dtype=index_dtype),
+        "threshold": np.ascontiguousarray(threshold, dtype=dtype),
+        "left": np.ascontiguousarray(np.concatenate(lefts), dtype=index_dtype),
+        "right": np.ascontiguousarray(np.concatenate(rights), dtype=index_dtype),
+        "value": np.ascontiguousarray(np.concatenate(values), dtype=dtype),
+        "max_depth": np.array(max(tree.max_depth for tree in trees)),
+    }
+
+
+def save_forest_arrays(classifier, path: Path) -> None:
+    np.savez_compressed(path, **flatten_forest(classifier, dtype=np.float32))
+
+
+def _per_row_latency_ms(model, x_sample) -> float:
+    timings = []
+    for index in range(len(x_sample)):
+        row = x_sample.iloc[index : index + 1]
+        started = time.perf_counter()
+        model.predict_proba(row)
+        timings.append((time.perf_counter() - started) * 1000)
+    return round(float(np.median(timings)), 4)
+
+
+def _load_seconds(path: Path) -> float:
+    started = time.perf_counter()
+    joblib.load(path)
+    return round(time.perf_counter() - started, 4)
+
+
+def model_report(model, directory: Path, x_test, y_test, latency_rows: int = 100) -> dict[str, Any]:
+    files = [directory / "model.pkl", directory / "vectorizer.pkl"]
+    forest = directory / FOREST_ARRAYS
+    classifier = model.named_steps["clf"]
+    return {
+        "artifact_bytes": sum(path.stat().st_size for path in files),
+        "forest_arrays_bytes": forest.stat().st_size if forest.exists() else None,
+        "load_seconds": _load_seconds(directory / "model.pkl"),
+        "latency_ms_per_row": _per_row_latency_ms(model, x_test.iloc[:latency_rows]),
+        "macro_f1": round(float(f1_score(y_test, model.predict(x_test), average="macro")), 4),
+        "n_estimators": len(classifier.estimators_),
+        "total_nodes": int(sum(tree.tree_.node_count for tree in classifier.estimators_)),
+        "vocabulary_size": len(
+            model.named_steps["preprocess"].named_transformers_["text"].vocabulary_
+        ),
+    }
+
+
+def write_variant_report(
+    directory: Path, report: dict[str, Any], full: dict[str, Any]
+) -> dict[str, Any]:
+    summary = {
+        **report,
+        "vs_full": {
+            "size_ratio": round(report["artifact_bytes"] / full["artifact_bytes"], 4),
+            "load_speedup": (
+                round(full["load_seconds"] / report["load_seconds"], 2)
+                if report["load_seconds"]
+                else None
+            ),
+            "latency_speedup": (
+                round(full["latency_ms_per_row"] / report["latency_ms_per_row"], 2)
+                if report["latency_ms_per_row"]
+                else None
+            ),
+            "macro_f1_delta": round(report["macro_f1"] - full["macro_f1"], 4),
+        },
+    }
+    metadata_path = directory / "metadata.json"
+    metadata = (
+        json.loads(metadata_path.read_text(encoding="utf-8")) if metadata_path.exists() else {}
+    )
+    metadata["report"] = summary
+    metadata_path.write_text(json.dumps(metadata, indent=2, default=str), encoding="utf-8")
+    return summary
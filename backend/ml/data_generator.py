@@ -1,7 +1,13 @@
 from __future__ import annotations
 
-import random
+import argparse
+import json
+from collections.abc import Iterator
+from concurrent.futures import ProcessPoolExecutor
+from itertools import permutations
+from pathlib import Path
 
+import numpy as np
 import pandas as pd
 
 CONDITIONS = [
@@ -24,52 +30,183 @@ SYMPTOM_POOL = {
     "Migraine": ["headache", "nausea", "light sensitivity"],
 }
 
+SYMPTOMS_PER_ROW = 3
+DEFAULT_CHUNK_SIZE = 100_000
+SHARD_FORMATS = ("csv", "parquet", "npz")
 
-def _sample_vitals(condition: str) -> dict:
-    base = {
-        "heart_rate": random.randint(60, 95),
-        "systolic_bp": random.randint(100, 130),
-        "diastolic_bp": random.randint(65, 85),
-        "temperature": round(random.uniform(36.2, 37.3), 1),
-        "spo2": round(random.uniform(95, 99), 1),
-        "glucose": round(random.uniform(80, 130), 1),
-        "weight": round(random.uniform(50, 90), 1),
-    }
+# (low, high, integer) per vital. Integer ranges are inclusive, float ranges are rounded to 0.1.
+BASE_VITALS: dict[str, tuple[float, float, bool]] = {
+    "heart_rate": (60, 95, True),
+    "systolic_bp": (100, 130, True),
+    "diastolic_bp": (65, 85, True),
+    "temperature": (36.2, 37.3, False),
+    "spo2": (95, 99, False),
+    "glucose": (80, 130, False),
+    "weight": (50, 90, False),
+}
+
+# Applied in order, later entries win, so each condition's vitals match its clinical profile.
+VITAL_OVERRIDES: list[tuple[frozenset[str], dict[str, tuple[float, float, bool]]]] = [
+    (
+        frozenset({"Influenza", "Pneumonia", "COVID-19"}),
+        {"temperature": (37.8, 40.0, False), "heart_rate": (85, 130, True)},
+    ),
+    (frozenset({"Pneumonia", "COVID-19"}), {"spo2": (86, 95, False)}),
+    (
+        frozenset({"Hypertension"}),
+        {"systolic_bp": (140, 190, True), "diastolic_bp": (90, 125, True)},
+    ),
+    (frozenset({"Type 2 Diabetes"}), {"glucose": (150, 320, False)}),
+    (frozenset({"Migraine"}), {"heart_rate": (65, 110, True)}),
+]
+
+VITAL_COLUMNS = list(BASE_VITALS)
+
+# Every ordered draw of symptoms without replacement, so picking one uniformly per row
+# reproduces random.sample() without building strings row by row.
+_SYMPTOM_TEXTS = {
+    condition: np.array(
+        [", ".join(combo) for combo in permutations(pool, min(SYMPTOMS_PER_ROW, len(pool)))],
+        dtype=object,
+    )
+    for condition, pool in SYMPTOM_POOL.items()
+}
+
+
+def _draw(
+    rng: np.random.Generator, low: float, high: float, integer: bool, size: int
+) -> np.ndarray:
+    if integer:
+        return rng.integers(int(low), int(high) + 1, size=size)
+    return np.round(rng.uniform(low, high, size=size), 1)
+
+
+def chunk_rng(seed: int, chunk_index: int) -> np.random.Generator:
+    # Independent, reproducible stream per chunk: shard i is identical whichever process writes it.
+    return np.random.default_rng(np.random.SeedSequence(seed, spawn_key=(chunk_index,)))
+
+
+def generate_chunk(n_rows: int, seed: int = 42, chunk_index: int = 0) -> pd.DataFrame:
+    rng = chunk_rng(seed, chunk_index)
+    condition_codes = rng.integers(0, len(CONDITIONS), size=n_rows)
+
+    vitals = {name: _draw(rng, *spec, size=n_rows) for name, spec in BASE_VITALS.items()}
+    for conditions, overrides in VITAL_OVERRIDES:
+        mask = np.isin(condition_codes, [CONDITIONS.index(name) for name in conditions])
+        count = int(mask.sum())
+        for name, spec in overrides.items():
+            vitals[name][mask] = _draw(rng, *spec, size=count)
 
-    if condition in {"Influenza", "Pneumonia", "COVID-19"}:
-        base["temperature"] = round(random.uniform(37.8, 40.0), 1)
-        base["heart_rate"] = random.randint(85, 130)
-    if condition in {"Pneumonia", "COVID-19"}:
-        base["spo2"] = round(random.uniform(86, 95), 1)
-    if condition == "Hypertension":
-        base["systolic_bp"] = random.randint(140, 190)
-        base["diastolic_bp"] = random.randint(90, 125)
-    if condition == "Type 2 Diabetes":
-        base["glucose"] = round(random.uniform(150, 320), 1)
-    if condition == "Migraine":
-        base["heart_rate"] = random.randint(65, 110)
-    return base
+    symptoms_text = np.empty(n_rows, dtype=object)
+    for code, condition in enumerate(CONDITIONS):
+        mask = condition_codes == code
+        texts = _SYMPTOM_TEXTS[condition]
+        symptoms_text[mask] = texts[rng.integers(0, len(texts), size=int(mask.sum()))]
+
+    return pd.DataFrame(
+        {
+            "symptoms_text": symptoms_text,
+            **vitals,
+            "condition": np.asarray(CONDITIONS, dtype=object)[condition_codes],
+        }
+    )
+
+
+def iter_synthetic_chunks(
+    n_samples: int,
+    seed: int = 42,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> Iterator[pd.DataFrame]:
+    chunk_size = max(1, chunk_size)
+    for index, start in enumerate(range(0, n_samples, chunk_size)):
+        yield generate_chunk(min(chunk_size, n_samples - start), seed=seed, chunk_index=index)
 
 
 def generate_synthetic_dataset(n_samples: int = 3000, seed: int = 42) -> pd.DataFrame:
-    random.seed(seed)
-    rows = []
-    for _ in range(n_samples):
-        condition = random.choice(CONDITIONS)
-        symptoms = random.sample(SYMPTOM_POOL[condition], k=min(3, len(SYMPTOM_POOL[condition])))
-        symptom_text = ", ".join(symptoms)
-        vitals = _sample_vitals(condition)
-        rows.append(
-            {
-                "symptoms_text": symptom_text,
-                "heart_rate": vitals["heart_rate"],
-                "systolic_bp": vitals["systolic_bp"],
-                "diastolic_bp": vitals["diastolic_bp"],
-                "temperature": vitals["temperature"],
-                "spo2": vitals["spo2"],
-                "glucose": vitals["glucose"],
-                "weight": vitals["weight"],
-                "condition": condition,
-            }
+    chunks = list(iter_synthetic_chunks(n_samples, seed=seed))
+    if not chunks:
+        return generate_chunk(0, seed=seed)
+    return pd.concat(chunks, ignore_index=True) if len(chunks) > 1 else chunks[0]
+
+
+def _write_shard(output_dir: Path, fmt: str, n_rows: int, seed: int, index: int) -> dict:
+    frame = generate_chunk(n_rows, seed=seed, chunk_index=index)
+    path = output_dir / f"shard-{index:05d}.{fmt}"
+    if fmt == "csv":
+        frame.to_csv(path, index=False)
+    elif fmt == "parquet":
+        try:
+            frame.to_parquet(path, index=False)
+        except ImportError as exc:
+            raise RuntimeError(
+                "Parquet shards need pyarrow installed; use --format csv or npz."
+            ) from exc
+    else:
+        np.savez_compressed(
+            path,
+            symptoms_text=frame["symptoms_text"].to_numpy(dtype=str),
+            condition=frame["condition"].to_numpy(dtype=str),
+            **{name: frame[name].to_numpy() for name in VITAL_COLUMNS},
         )
-    return pd.DataFrame(rows)
+    return {"path": path.name, "rows": n_rows, "chunk_index": index}
+
+
+def write_synthetic_shards(
+    output_dir: Path | str,
+    n_samples: int,
+    seed: int = 42,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    fmt: str = "csv",
+    workers: int = 1,
+) -> dict:
+    if fmt not in SHARD_FORMATS:
+        raise ValueError(f"Unsupported shard format {fmt!r}; expected one of {SHARD_FORMATS}")
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    chunk_size = max(1, chunk_size)
+    jobs = [
+        (output_dir, fmt, min(chunk_size, n_samples - start), seed, index)
+        for index, start in enumerate(range(0, n_samples, chunk_size))
+    ]
+
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            shards = list(pool.map(_write_shard, *zip(*jobs, strict=True)))
+    else:
+        shards = [_write_shard(*job) for job in jobs]
+
+    manifest = {
+        "samples": n_samples,
+        "seed": seed,
+        "chunk_size": chunk_size,
+        "format": fmt,
+        "columns": ["symptoms_text", *VITAL_COLUMNS, "condition"],
+        "shards": shards,
+    }
+    (output_dir / "manifest.json").write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+    return manifest
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Write synthetic training data as reproducible shards."
+    )
+    parser.add_argument("output_dir")
+    parser.add_argument("--samples", type=int, default=1_000_000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--format", choices=SHARD_FORMATS, default="csv")
+    parser.add_argument("--workers", type=int, default=1)
+    args = parser.parse_args()
+
+    info = write_synthetic_shards(
+        args.output_dir,
+        n_samples=args.samples,
+        seed=args.seed,
+        chunk_size=args.chunk_size,
+        fmt=args.format,
+        workers=args.workers,
+    )
+    print(
+        f"Wrote {len(info['shards'])} {args.format} shards ({args.samples} rows) to {args.output_dir}"
+    )
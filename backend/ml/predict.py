@@ -6,6 +6,8 @@ from pathlib import Path
 import joblib
 import pandas as pd
 
+from ml.registry import ModelRegistry
+
 
 def run_prediction(model_path: Path, symptoms_text: str) -> None:
     model = joblib.load(model_path)
@@ -32,12 +34,17 @@ def run_prediction(model_path: Path, symptoms_text: str) -> None:
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
-    parser.add_argument("--model", default="ml/artifacts/model.pkl")
+    parser.add_argument(
+        "--model", default=None, help="Path to a model.pkl; defaults to the active version."
+    )
     parser.add_argument("--text", required=True)
     args = parser.parse_args()
 
     backend_root = Path(__file__).resolve().parents[1]
-    model = Path(args.model)
-    if not model.is_absolute():
-        model = backend_root / model
+    if args.model is None:
+        model = ModelRegistry(backend_root / "ml/artifacts").resolve().model_path
+    else:
+        model = Path(args.model)
+        if not model.is_absolute():
+            model = backend_root / model
     run_prediction(model, args.text)
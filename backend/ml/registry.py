@@ -0,0 +1,186 @@
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+from dataclasses import dataclass
+from datetime import UTC, datetime
+from pathlib import Path
+
+ARTIFACT_FILES = ("model.pkl", "vectorizer.pkl")
+LEGACY_VERSION_PREFIX = "legacy-"
+
+
+@dataclass(frozen=True)
+class ModelArtifacts:
+    version: str
+    directory: Path
+    variant_name: str | None = None
+
+    @property
+    def model_path(self) -> Path:
+        return self.directory / "model.pkl"
+
+    @property
+    def vectorizer_path(self) -> Path:
+        return self.directory / "vectorizer.pkl"
+
+    @property
+    def metadata_path(self) -> Path:
+        return self.directory / "metadata.json"
+
+    def metadata(self) -> dict:
+        if not self.metadata_path.exists():
+            return {}
+        return json.loads(self.metadata_path.read_text(encoding="utf-8"))
+
+    def variants(self) -> list[str]:
+        root = self.directory / "variants"
+        if not root.is_dir():
+            return []
+        return sorted(
+            path.name
+            for path in root.iterdir()
+            if all((path / name).exists() for name in ARTIFACT_FILES)
+        )
+
+    def variant(self, name: str) -> ModelArtifacts:
+        directory = self.directory / "variants" / name
+        if not all((directory / file).exists() for file in ARTIFACT_FILES):
+            raise FileNotFoundError(
+                f"Model version {self.version} has no complete variant {name!r}"
+            )
+        return ModelArtifacts(version=self.version, directory=directory, variant_name=name)
+
+
+class ModelRegistry:
+    """Versioned artifact layout under MODEL_DIR.
+
+    ``versions/<version>/`` holds one trained model with its metadata, ``ACTIVE`` names the
+    version workers should serve and ``HISTORY`` lists earlier activations for rollback.
+    Artifacts written directly into MODEL_DIR by older releases are served as a single
+    ``legacy-<hash>`` version until a versioned model is activated.
+    """
+
+    def __init__(self, root: Path) -> None:
+        self.root = root
+        self.versions_dir = root / "versions"
+        self.active_file = root / "ACTIVE"
+        self.history_file = root / "HISTORY"
+
+    def new_version_dir(self) -> tuple[str, Path]:
+        version = datetime.now(UTC).strftime("%Y%m%d-%H%M%S-%f")
+        directory = self.versions_dir / version
+        directory.mkdir(parents=True, exist_ok=False)
+        return version, directory
+
+    def versions(self) -> list[str]:
+        found = []
+        if self.versions_dir.is_dir():
+            found = sorted(
+                path.name
+                for path in self.versions_dir.iterdir()
+                if all((path / name).exists() for name in ARTIFACT_FILES)
+            )
+        legacy = self._legacy()
+        return [legacy.version, *found] if legacy else found
+
+    def active_version(self) -> str | None:
+        if self.active_file.exists():
+            version = self.active_file.read_text(encoding="utf-8").strip()
+            if version:
+                return version
+        versions = self.versions()
+        return versions[-1] if versions else None
+
+    def resolve(self, version: str | None = None) -> ModelArtifacts:
+        version = version or self.active_version()
+        if version is None:
+            raise FileNotFoundError(f"No model artifacts found under {self.root}")
+        legacy = self._legacy()
+        if legacy and version == legacy.version:
+            return legacy
+        artifacts = ModelArtifacts(version=version, directory=self.versions_dir / version)
+        if not all((artifacts.directory / name).exists() for name in ARTIFACT_FILES):
+            raise FileNotFoundError(f"Model version {version} is incomplete or missing")
+        return artifacts
+
+    def activate(self, version: str) -> None:
+        self.resolve(version)
+        current = self.active_version()
+        if current == version:
+            return
+        if current:
+            with self.history_file.open("a", encoding="utf-8") as handle:
+                handle.write(current + "\n")
+        self._write_active(version)
+
+    def rollback(self) -> str:
+        history = self._history()
+        if not history:
+            raise LookupError("No previous model version to roll back to")
+        previous = history.pop()
+        self.resolve(previous)
+        self.history_file.write_text(
+            "".join(f"{version}\n" for version in history), encoding="utf-8"
+        )
+        self._write_active(previous)
+        return previous
+
+    def _history(self) -> list[str]:
+        if not self.history_file.exists():
+            return []
+        return [
+            line.strip()
+            for line in self.history_file.read_text(encoding="utf-8").splitlines()
+            if line.strip()
+        ]
+
+    def _write_active(self, version: str) -> None:
+        # Write-then-rename keeps the pointer atomic for workers polling it.
+        tmp = self.active_file.with_suffix(".tmp")
+        tmp.write_text(version + "\n", encoding="utf-8")
+        os.replace(tmp, self.active_file)
+
+    def _legacy(self) -> ModelArtifacts | None:
+        if not all((self.root / name).exists() for name in ARTIFACT_FILES):
+            return None
+        digest = hashlib.sha256()
+        metadata = self.root / "metadata.json"
+        if metadata.exists():
+            digest.update(metadata.read_bytes())
+        for name in ARTIFACT_FILES:
+            stat = (self.root / name).stat()
+            digest.update(f"{name}:{stat.st_size}:{stat.st_mtime_ns}".encode())
+        return ModelArtifacts(
+            version=LEGACY_VERSION_PREFIX + digest.hexdigest()[:12], directory=self.root
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Inspect and switch served model versions.")
+    parser.add_argument("--root", default="ml/artifacts")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("list")
+    activate_parser = commands.add_parser("activate")
+    activate_parser.add_argument("version")
+    commands.add_parser("rollback")
+    args = parser.parse_args()
+
+    root = Path(args.root)
+    if not root.is_absolute():
+        root = Path(__file__).resolve().parents[1] / root
+    registry = ModelRegistry(root)
+
+    if args.command == "list":
+        active = registry.active_version()
+        for name in registry.versions():
+            variants = registry.resolve(name).variants()
+            suffix = f"  (variants: {', '.join(variants)})" if variants else ""
+            print(f"{'*' if name == active else ' '} {name}{suffix}")
+    elif args.command == "activate":
+        registry.activate(args.version)
+        print(f"Activated {args.version}")
+    else:
+        print(f"Rolled back to {registry.rollback()}")
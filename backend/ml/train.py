@@ -1,17 +1,33 @@
 from __future__ import annotations
 
+import argparse
+import hashlib
 import json
+import sys
+import time
+from datetime import UTC, datetime
 from pathlib import Path
+from typing import Any
 
 import joblib
+import numpy as np
+from joblib import Parallel, delayed
 from sklearn.compose import ColumnTransformer
 from sklearn.ensemble import RandomForestClassifier
-from sklearn.model_selection import train_test_split
-from sklearn.pipeline import Pipeline
 from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics import classification_report
+from sklearn.metrics import classification_report, f1_score
+from sklearn.model_selection import ParameterGrid, StratifiedKFold, train_test_split
+from sklearn.pipeline import Pipeline
 
+from ml.compact import (
+    COMPACT_VARIANTS,
+    FOREST_ARRAYS,
+    model_report,
+    save_forest_arrays,
+    write_variant_report,
+)
 from ml.data_generator import generate_synthetic_dataset
+from ml.registry import ModelRegistry
 
 NUMERIC_FEATURES = [
     "heart_rate",
@@ -23,18 +39,62 @@ NUMERIC_FEATURES = [
     "weight",
 ]
 
+TEXT_PARAMS: dict[str, Any] = {"ngram_range": (1, 2), "max_features": 500}
+CLASSIFIER_PARAMS: dict[str, Any] = {
+    "n_estimators": 250,
+    "random_state": 42,
+    "class_weight": "balanced_subsample",
+}
+
+# Keys are prefixed with the step they configure: ``text__`` for the TF-IDF vectorizer,
+# ``clf__`` for the random forest.
+DEFAULT_PARAM_GRID: dict[str, list[Any]] = {
+    "text__max_features": [500, 2000],
+    "clf__n_estimators": [100, 250],
+    "clf__max_depth": [None, 24],
+    "clf__min_samples_leaf": [1, 2],
+}
+
+
+def build_preprocess(text_params: dict[str, Any] | None = None) -> ColumnTransformer:
+    return ColumnTransformer(
+        transformers=[
+            ("text", TfidfVectorizer(**{**TEXT_PARAMS, **(text_params or {})}), "symptoms_text"),
+            ("num", "passthrough", NUMERIC_FEATURES),
+        ]
+    )
+
 
-def train_and_save(output_dir: Path | str = "ml/artifacts") -> dict:
-    backend_root = Path(__file__).resolve().parents[1]
-    output = Path(output_dir)
-    if not output.is_absolute():
-        output = backend_root / output
-    output.mkdir(parents=True, exist_ok=True)
+def build_classifier(
+    clf_params: dict[str, Any] | None = None, n_jobs: int | None = None
+) -> RandomForestClassifier:
+    return RandomForestClassifier(**{**CLASSIFIER_PARAMS, **(clf_params or {})}, n_jobs=n_jobs)
 
-    data = generate_synthetic_dataset(n_samples=3500, seed=42)
+
+def build_model(
+    text_params: dict[str, Any] | None = None,
+    clf_params: dict[str, Any] | None = None,
+    n_jobs: int | None = None,
+) -> Pipeline:
+    return Pipeline(
+        steps=[
+            ("preprocess", build_preprocess(text_params)),
+            ("clf", build_classifier(clf_params, n_jobs=n_jobs)),
+        ]
+    )
+
+
+def _resolve_root(output_dir: Path | str) -> Path:
+    root = Path(output_dir)
+    if not root.is_absolute():
+        root = Path(__file__).resolve().parents[1] / root
+    return root
+
+
+def _load_split(n_samples: int, seed: int):
+    data = generate_synthetic_dataset(n_samples=n_samples, seed=seed)
     x = data[["symptoms_text", *NUMERIC_FEATURES]]
     y = data["condition"]
-
     x_train, x_test, y_train, y_test = train_test_split(
         x,
         y,
@@ -42,44 +102,364 @@ def train_and_save(output_dir: Path | str = "ml/artifacts") -> dict:
         random_state=42,
         stratify=y,
     )
+    return x_train, x_test, y_train, y_test
 
-    preprocess = ColumnTransformer(
-        transformers=[
-            ("text", TfidfVectorizer(ngram_range=(1, 2), max_features=500), "symptoms_text"),
-            ("num", "passthrough", NUMERIC_FEATURES),
-        ]
+
+def _split_params(params: dict[str, Any]) -> tuple[dict[str, Any], dict[str, Any]]:
+    text_params = {
+        key.removeprefix("text__"): value
+        for key, value in params.items()
+        if key.startswith("text__")
+    }
+    clf_params = {
+        key.removeprefix("clf__"): value for key, value in params.items() if key.startswith("clf__")
+    }
+    unknown = (
+        set(params)
+        - {f"text__{key}" for key in text_params}
+        - {f"clf__{key}" for key in clf_params}
     )
+    if unknown:
+        raise ValueError(f"Unknown search parameters: {sorted(unknown)}")
+    return text_params, clf_params
 
-    model = Pipeline(
-        steps=[
-            ("preprocess", preprocess),
-            (
-                "clf",
-                RandomForestClassifier(
-                    n_estimators=250,
-                    random_state=42,
-                    class_weight="balanced_subsample",
-                ),
-            ),
-        ]
+
+def _peak_memory_mb() -> float | None:
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    peak = max(
+        resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss,
     )
+    # ru_maxrss is bytes on macOS and kilobytes elsewhere.
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def _dump_artifacts(model: Pipeline, directory: Path) -> None:
+    # The pickled forest predicts one row at a time in the API; thread fan-out only adds latency there.
+    model.named_steps["clf"].set_params(n_jobs=None)
+    joblib.dump(model, directory / "model.pkl")
+    text_vectorizer = model.named_steps["preprocess"].named_transformers_["text"]
+    joblib.dump(text_vectorizer, directory / "vectorizer.pkl")
+
+
+def _write_metadata(directory: Path, metadata: dict[str, Any]) -> None:
+    (directory / "metadata.json").write_text(
+        json.dumps(metadata, indent=2, default=str), encoding="utf-8"
+    )
+
+
+def _build_variants(
+    model: Pipeline,
+    output: Path,
+    names: list[str],
+    split,
+    params: dict[str, dict[str, Any]],
+    n_jobs: int | None,
+) -> dict[str, Any]:
+    x_train, x_test, y_train, y_test = split
+    full = model_report(model, output, x_test, y_test)
+    summaries: dict[str, Any] = {"full": full}
+    for name in names:
+        text_params, clf_params = _split_params(COMPACT_VARIANTS[name])
+        started = time.perf_counter()
+        variant = build_model(
+            {**params["text"], **text_params}, {**params["clf"], **clf_params}, n_jobs=n_jobs
+        )
+        variant.fit(x_train, y_train)
+
+        directory = output / "variants" / name
+        directory.mkdir(parents=True)
+        _dump_artifacts(variant, directory)
+        save_forest_arrays(variant.named_steps["clf"], directory / FOREST_ARRAYS)
+        _write_metadata(
+            directory,
+            {
+                "variant": name,
+                "overrides": COMPACT_VARIANTS[name],
+                "fit_seconds": round(time.perf_counter() - started, 3),
+            },
+        )
+        summaries[name] = write_variant_report(
+            directory, model_report(variant, directory, x_test, y_test), full
+        )
+        print(f"variant {name}: {json.dumps(summaries[name]['vs_full'])}")
+    return summaries
+
+
+def _save_version(
+    model: Pipeline,
+    root: Path,
+    metadata: dict[str, Any],
+    activate: bool,
+    variants: list[str] | None = None,
+    split=None,
+    n_jobs: int | None = None,
+) -> dict[str, Any]:
+    registry = ModelRegistry(root)
+    version, output = registry.new_version_dir()
+    _dump_artifacts(model, output)
+
+    metadata = {"version": version, "created_at": datetime.now(UTC).isoformat(), **metadata}
+    if variants:
+        metadata["variants"] = _build_variants(
+            model, output, variants, split, metadata["training"]["params"], n_jobs
+        )
+    _write_metadata(output, metadata)
+    if activate:
+        registry.activate(version)
+    return metadata
+
+
+def train_and_save(
+    output_dir: Path | str = "ml/artifacts",
+    activate: bool = True,
+    n_samples: int = 3500,
+    n_jobs: int | None = -1,
+    params: dict[str, Any] | None = None,
+    variants: list[str] | None = None,
+) -> dict:
+    started = time.perf_counter()
+    x_train, x_test, y_train, y_test = _load_split(n_samples, seed=42)
+
+    text_params, clf_params = _split_params(params or {})
+    model = build_model(text_params, clf_params, n_jobs=n_jobs)
     model.fit(x_train, y_train)
     y_pred = model.predict(x_test)
     report = classification_report(y_test, y_pred, output_dict=True)
 
-    joblib.dump(model, output / "model.pkl")
-    text_vectorizer = model.named_steps["preprocess"].named_transformers_["text"]
-    joblib.dump(text_vectorizer, output / "vectorizer.pkl")
+    metadata = {
+        "classes": sorted(str(label) for label in model.classes_),
+        "samples": n_samples,
+        "metrics_macro_f1": report["macro avg"]["f1-score"],
+        "training": {
+            "params": {
+                "text": {**TEXT_PARAMS, **text_params},
+                "clf": {**CLASSIFIER_PARAMS, **clf_params},
+            },
+            "n_jobs": n_jobs,
+            "wall_seconds": round(time.perf_counter() - started, 3),
+            "peak_memory_mb": _peak_memory_mb(),
+        },
+    }
+    split = (x_train, x_test, y_train, y_test)
+    return _save_version(
+        model, _resolve_root(output_dir), metadata, activate, variants, split, n_jobs
+    )
+
+
+def _search_id(param_grid: dict[str, list[Any]], cv: int, n_samples: int, seed: int) -> str:
+    spec = json.dumps(
+        {"grid": param_grid, "cv": cv, "samples": n_samples, "seed": seed},
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(spec.encode()).hexdigest()[:12]
+
+
+def _candidate_key(params: dict[str, Any]) -> str:
+    return json.dumps(params, sort_keys=True, default=str)
+
+
+def _load_checkpoint(path: Path) -> dict[str, dict[str, Any]]:
+    done: dict[str, dict[str, Any]] = {}
+    if not path.exists():
+        return done
+    for line in path.read_text(encoding="utf-8").splitlines():
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError:
+            # A torn final line from an interrupted write; that candidate simply reruns.
+            continue
+        done[record["key"]] = record
+    return done
+
+
+def _score_fold(
+    clf_params: dict[str, Any], train_features, y_fit, valid_features, y_valid
+) -> float:
+    classifier = build_classifier(clf_params)
+    classifier.fit(train_features, y_fit)
+    return float(f1_score(y_valid, classifier.predict(valid_features), average="macro"))
+
+
+def search_and_save(
+    output_dir: Path | str = "ml/artifacts",
+    param_grid: dict[str, list[Any]] | None = None,
+    cv: int = 3,
+    n_samples: int = 3500,
+    n_jobs: int | None = -1,
+    resume: bool = True,
+    activate: bool = True,
+    seed: int = 42,
+    variants: list[str] | None = None,
+) -> dict:
+    """Grid search over TF-IDF and forest parameters with per-fold feature caching.
+
+    Each fold's TF-IDF/ColumnTransformer output is fitted once per distinct set of ``text__``
+    parameters and reused by every forest candidate. All (candidate, fold) fits of that group
+    run in parallel on ``n_jobs`` workers, each forest single-threaded. Finished candidates are appended to a
+    checkpoint file under ``<output_dir>/searches`` so an interrupted search picks up where
+    it stopped.
+    """
+    started = time.perf_counter()
+    param_grid = param_grid or DEFAULT_PARAM_GRID
+    root = _resolve_root(output_dir)
+    search_id = _search_id(param_grid, cv, n_samples, seed)
+    checkpoint = root / "searches" / f"{search_id}.jsonl"
+    checkpoint.parent.mkdir(parents=True, exist_ok=True)
+    if not resume and checkpoint.exists():
+        checkpoint.unlink()
+    completed = _load_checkpoint(checkpoint)
+
+    x_train, x_test, y_train, y_test = _load_split(n_samples, seed=seed)
+    folds = list(
+        StratifiedKFold(n_splits=cv, shuffle=True, random_state=seed).split(x_train, y_train)
+    )
+    y_values = y_train.to_numpy()
+
+    candidates = [dict(params) for params in ParameterGrid(param_grid)]
+    # Group by text parameters so each fold is tokenized once per group, not once per candidate.
+    candidates.sort(key=lambda params: _candidate_key(_split_params(params)[0]))
+    resumed = sum(1 for params in candidates if _candidate_key(params) in completed)
+
+    pending: dict[str, list[dict[str, Any]]] = {}
+    for params in candidates:
+        if _candidate_key(params) not in completed:
+            pending.setdefault(_candidate_key(_split_params(params)[0]), []).append(params)
+
+    with Parallel(n_jobs=n_jobs, prefer="threads", return_as="generator") as parallel:
+        for group in pending.values():
+            text_params = _split_params(group[0])[0]
+            fold_features = []
+            for train_idx, valid_idx in folds:
+                preprocess = build_preprocess(text_params)
+                train_features = preprocess.fit_transform(x_train.iloc[train_idx])
+                fold_features.append(
+                    (train_features, preprocess.transform(x_train.iloc[valid_idx]))
+                )
+
+            # Every (candidate, fold) pair of the group runs at once on the shared fold features;
+            # tree building releases the GIL, so threads avoid copying the matrices to workers.
+            scores = parallel(
+                delayed(_score_fold)(
+                    _split_params(params)[1],
+                    train_features,
+                    y_values[train_idx],
+                    valid_features,
+                    y_values[valid_idx],
+                )
+                for params in group
+                for (train_idx, valid_idx), (train_features, valid_features) in zip(
+                    folds, fold_features, strict=True
+                )
+            )
+            for params in group:
+                key = _candidate_key(params)
+                fold_scores = [next(scores) for _ in folds]
+                record = {
+                    "key": key,
+                    "params": params,
+                    "fold_scores": fold_scores,
+                    "mean_macro_f1": float(np.mean(fold_scores)),
+                }
+                with checkpoint.open("a", encoding="utf-8") as handle:
+                    handle.write(json.dumps(record, default=str) + "\n")
+                completed[key] = record
+                print(
+                    f"[search {search_id}] {len(completed)}/{len(candidates)} {params} -> {record['mean_macro_f1']:.4f}"
+                )
+
+    results = [completed[_candidate_key(params)] for params in candidates]
+    best = max(results, key=lambda record: record["mean_macro_f1"])
+    text_params, clf_params = _split_params(best["params"])
+
+    model = build_model(text_params, clf_params, n_jobs=n_jobs)
+    model.fit(x_train, y_train)
+    report = classification_report(y_test, model.predict(x_test), output_dict=True)
 
     metadata = {
-        "classes": sorted(list(set(y))),
-        "samples": len(data),
+        "classes": sorted(str(label) for label in model.classes_),
+        "samples": n_samples,
         "metrics_macro_f1": report["macro avg"]["f1-score"],
+        "training": {
+            "params": {
+                "text": {**TEXT_PARAMS, **text_params},
+                "clf": {**CLASSIFIER_PARAMS, **clf_params},
+            },
+            "n_jobs": n_jobs,
+            "wall_seconds": round(time.perf_counter() - started, 3),
+            "peak_memory_mb": _peak_memory_mb(),
+        },
+        "search": {
+            "id": search_id,
+            "cv": cv,
+            "candidates": len(candidates),
+            "resumed_candidates": resumed,
+            "best_params": best["params"],
+            "best_cv_macro_f1": best["mean_macro_f1"],
+            "results": [
+                {"params": record["params"], "mean_macro_f1": record["mean_macro_f1"]}
+                for record in results
+            ],
+        },
     }
-    (output / "metadata.json").write_text(json.dumps(metadata, indent=2), encoding="utf-8")
-    return metadata
+    split = (x_train, x_test, y_train, y_test)
+    return _save_version(model, root, metadata, activate, variants, split, n_jobs)
 
 
 if __name__ == "__main__":
-    info = train_and_save()
-    print("Training complete:", info)
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--no-activate", action="store_true", help="Publish the version without serving it."
+    )
+    parser.add_argument("--samples", type=int, default=3500)
+    parser.add_argument(
+        "--n-jobs",
+        type=int,
+        default=-1,
+        help="Cores for the parallel CV fits and final tree fitting (-1 = all).",
+    )
+    parser.add_argument(
+        "--search", action="store_true", help="Run a cross-validated grid search first."
+    )
+    parser.add_argument("--grid", help="JSON file with a parameter grid (text__*/clf__* keys).")
+    parser.add_argument("--cv", type=int, default=3)
+    parser.add_argument(
+        "--fresh", action="store_true", help="Ignore any checkpoint from an earlier run."
+    )
+    parser.add_argument(
+        "--variants",
+        nargs="*",
+        choices=sorted(COMPACT_VARIANTS),
+        help="Also build compact variants (no names = all) with a size/latency/accuracy report.",
+    )
+    args = parser.parse_args()
+    variants = None if args.variants is None else (args.variants or sorted(COMPACT_VARIANTS))
+
+    if args.search:
+        grid = json.loads(Path(args.grid).read_text(encoding="utf-8")) if args.grid else None
+        info = search_and_save(
+            param_grid=grid,
+            cv=args.cv,
+            n_samples=args.samples,
+            n_jobs=args.n_jobs,
+            resume=not args.fresh,
+            activate=not args.no_activate,
+            variants=variants,
+        )
+    else:
+        info = train_and_save(
+            activate=not args.no_activate,
+            n_samples=args.samples,
+            n_jobs=args.n_jobs,
+            variants=variants,
+        )
+    print(
+        "Training complete:",
+        json.dumps(
+            {key: info[key] for key in ("version", "metrics_macro_f1", "training")}, default=str
+        ),
+    )
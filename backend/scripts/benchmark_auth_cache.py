@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+import argparse
+import logging
+import os
+import tempfile
+import time
+
+_DB_DIR = tempfile.mkdtemp(prefix="proactivecare-auth-bench-")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_DB_DIR}/bench.db")
+os.environ.setdefault("SECRET_KEY", "benchmark_secret_key")
+os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+os.environ.setdefault("WARM_UP_ON_STARTUP", "false")
+
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy import event  # noqa: E402
+
+from app.core.principal_cache import principal_cache  # noqa: E402
+from app.db.base import Base  # noqa: E402
+from app.db.session import engine  # noqa: E402
+from app.main import app  # noqa: E402
+
+ROUTES = ("/api/v1/profile/me", "/api/v1/health-entries")
+
+
+def run(requests: int) -> None:
+    Base.metadata.create_all(bind=engine)
+    queries = 0
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _count(*_args) -> None:
+        nonlocal queries
+        queries += 1
+
+    with TestClient(app) as client:
+        credentials = {"email": "auth-bench@example.com", "password": "BenchPass123"}
+        client.post("/api/v1/auth/register", json=credentials)
+        token = client.post("/api/v1/auth/login", json=credentials).json()["data"]["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+
+        print(f"{'route':<28} {'cache':>5} {'req/s':>9} {'queries/req':>12}")
+        for route in ROUTES:
+            for enabled in (False, True):
+                principal_cache.enabled = enabled
+                principal_cache.clear()
+                client.get(route, headers=headers)
+                queries = 0
+                started = time.perf_counter()
+                for _ in range(requests):
+                    client.get(route, headers=headers)
+                elapsed = time.perf_counter() - started
+                label = "on" if enabled else "off"
+                print(
+                    f"{route:<28} {label:>5} {requests / elapsed:>9.0f} {queries / requests:>12.2f}"
+                )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Requests per second and DB queries per request with the principal cache on and off."
+    )
+    parser.add_argument("--requests", type=int, default=1000)
+    args = parser.parse_args()
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    run(args.requests)
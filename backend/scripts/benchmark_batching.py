@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from app.services.batching import PredictionBatcher
+from app.services.prediction_service import PredictionEngine
+from ml.data_generator import generate_synthetic_dataset
+
+
+def _drive(
+    batcher: PredictionBatcher, payloads: list[dict], concurrency: int
+) -> tuple[float, np.ndarray]:
+    def call(payload: dict) -> float:
+        start = time.perf_counter()
+        batcher.run([payload], [[]])
+        return (time.perf_counter() - start) * 1000
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        latencies = np.array(list(pool.map(call, payloads)))
+    return len(payloads) / (time.perf_counter() - started), latencies
+
+
+def run(
+    requests: int, concurrency: int, window_ms: float, max_batch_size: int, inference_mode: str
+) -> None:
+    engine = PredictionEngine(inference_mode=inference_mode)
+    payloads = (
+        generate_synthetic_dataset(n_samples=requests, seed=5)
+        .drop(columns=["condition"])
+        .to_dict("records")
+    )
+
+    for enabled in (False, True):
+        batcher = PredictionBatcher(
+            engine, enabled=enabled, window_ms=window_ms, max_batch_size=max_batch_size
+        )
+        throughput, latencies = _drive(batcher, payloads, concurrency)
+        label = f"batched ({window_ms:g} ms / {max_batch_size})" if enabled else "unbatched"
+        print(
+            f"{label:>24}: {throughput:8.1f} req/s  p50={np.percentile(latencies, 50):.2f} ms  "
+            f"p99={np.percentile(latencies, 99):.2f} ms"
+        )
+        if enabled:
+            stats = batcher.stats()
+            print(
+                f"{'':>24}  batches={stats['batches']} mean_batch_size={stats['mean_batch_size']}"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Measure /predict inference throughput with micro-batching."
+    )
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--window-ms", type=float, default=5.0)
+    parser.add_argument("--max-batch-size", type=int, default=32)
+    parser.add_argument("--inference-mode", default="sklearn")
+    args = parser.parse_args()
+    run(args.requests, args.concurrency, args.window_ms, args.max_batch_size, args.inference_mode)
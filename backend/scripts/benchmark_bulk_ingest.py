@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+import argparse
+import logging
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+_DB_DIR = tempfile.mkdtemp(prefix="proactivecare-ingest-bench-")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_DB_DIR}/bench.db")
+os.environ.setdefault("SECRET_KEY", "benchmark_secret_key")
+os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+os.environ.setdefault("WARM_UP_ON_STARTUP", "false")
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+from app.db.base import Base  # noqa: E402
+from app.db.session import engine  # noqa: E402
+from app.main import app  # noqa: E402
+
+
+def _readings(count: int, offset: int) -> list[dict]:
+    # What a wearable sync uploads: one check-in every few minutes with a stable reading id.
+    rng = random.Random(offset)
+    start = datetime(2026, 1, 1)
+    return [
+        {
+            "idempotency_key": f"watch-reading-{offset + index}",
+            "recorded_at": (start + timedelta(minutes=5 * (offset + index))).isoformat(),
+            "symptoms_text": "automatic wearable check-in",
+            "heart_rate": rng.randint(55, 120),
+            "spo2": round(rng.uniform(94, 100), 1),
+            "temperature": round(rng.uniform(36.2, 37.8), 1),
+        }
+        for index in range(count)
+    ]
+
+
+def run(single: int, bulk: int, batch_size: int) -> None:
+    Base.metadata.create_all(bind=engine)
+    with TestClient(app) as client:
+        credentials = {"email": "ingest-bench@example.com", "password": "BenchPass123"}
+        client.post("/api/v1/auth/register", json=credentials)
+        token = client.post("/api/v1/auth/login", json=credentials).json()["data"]["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+
+        readings = _readings(single, 0)
+        for reading in readings:
+            reading.pop("idempotency_key")
+        started = time.perf_counter()
+        for reading in readings:
+            client.post("/api/v1/health-entries", json=reading, headers=headers)
+        elapsed = time.perf_counter() - started
+        print(
+            f"single-entry route: {single:,} rows in {elapsed:.1f}s, {single / elapsed:,.0f} rows/s"
+        )
+
+        batches = [_readings(batch_size, single + start) for start in range(0, bulk, batch_size)]
+        started = time.perf_counter()
+        for batch in batches:
+            data = client.post(
+                "/api/v1/health-entries/bulk", json={"items": batch}, headers=headers
+            ).json()["data"]
+            assert data["created"] == len(batch), data
+        elapsed = time.perf_counter() - started
+        print(
+            f"bulk route, {batch_size} per request: {bulk:,} rows in {elapsed:.1f}s, "
+            f"{bulk / elapsed:,.0f} rows/s"
+        )
+
+        started = time.perf_counter()
+        for batch in batches:
+            data = client.post(
+                "/api/v1/health-entries/bulk", json={"items": batch}, headers=headers
+            ).json()["data"]
+            assert data["duplicates"] == len(batch), data
+        elapsed = time.perf_counter() - started
+        print(
+            f"bulk retry (all duplicates): {bulk:,} rows in {elapsed:.1f}s, {bulk / elapsed:,.0f} rows/s"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Rows per second: single-entry route vs bulk ingest."
+    )
+    parser.add_argument("--single", type=int, default=1000)
+    parser.add_argument("--bulk", type=int, default=50_000)
+    parser.add_argument("--batch-size", type=int, default=2000)
+    args = parser.parse_args()
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    run(args.single, args.bulk, args.batch_size)
@@ -0,0 +1,195 @@
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+_DB_DIR = tempfile.mkdtemp(prefix="proactivecare-history-bench-")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_DB_DIR}/bench.db")
+os.environ.setdefault("SECRET_KEY", "benchmark_secret_key")
+os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+os.environ.setdefault("WARM_UP_ON_STARTUP", "false")
+
+import numpy as np  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy import select, text, tuple_  # noqa: E402
+
+from app.db.base import Base  # noqa: E402
+from app.db.session import SessionLocal, engine  # noqa: E402
+from app.main import app  # noqa: E402
+from app.models.health_entry import HealthEntry  # noqa: E402
+from app.schemas.health import HealthEntryResponse  # noqa: E402
+
+INDEX = "ix_health_entries_user_id_recorded_at_id"
+# Shaped like what /predict saves with an entry.
+PREDICTIONS = json.dumps(
+    [
+        {"condition": "Influenza", "probability": 0.61, "confidence": "moderate"},
+        {"condition": "Common Cold", "probability": 0.24, "confidence": "low"},
+        {"condition": "Migraine", "probability": 0.09, "confidence": "low"},
+    ]
+)
+EXPLANATION = json.dumps(
+    [
+        "Elevated temperature increased the fever-related risk.",
+        "Reported headache pushed the migraine score up.",
+        "Normal oxygen saturation lowered respiratory risk.",
+    ]
+)
+
+
+def _seed(entries: int, other_users: int) -> None:
+    # One heavy user (id 1) with years of check-ins, interleaved with lighter users.
+    rng = random.Random(11)
+    start = datetime(2020, 1, 1)
+    now = datetime.utcnow()
+    rows = []
+    for index in range(entries * 2):
+        user_id = 1 if index % 2 == 0 else rng.randint(2, other_users + 1)
+        recorded = start + timedelta(minutes=30 * (index // 2), seconds=rng.randint(0, 60))
+        rows.append(
+            (
+                user_id,
+                recorded,
+                "woke up with a mild headache and some fatigue after a short night",
+                '["headache", "fatigue"]',
+                rng.randint(55, 110),
+                rng.randint(100, 150),
+                rng.randint(60, 95),
+                round(rng.uniform(36.2, 38.5), 1),
+                rng.choice(["Low", "Low", "Moderate", "High"]),
+                PREDICTIONS,
+                EXPLANATION,
+                now,
+                now,
+            )
+        )
+    with engine.begin() as connection:
+        connection.exec_driver_sql(
+            "INSERT INTO health_entries (user_id, recorded_at, symptoms_text, symptom_tags, heart_rate, "
+            "systolic_bp, diastolic_bp, temperature, risk_level, predictions, explanation, created_at, "
+            "updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            rows,
+        )
+
+
+def _percentiles(samples: list[float]) -> str:
+    return f"p50 {np.percentile(samples, 50):.1f}ms, p99 {np.percentile(samples, 99):.1f}ms"
+
+
+def _walk(client: TestClient, headers: dict[str, str], limit: int, pages: int) -> list[float]:
+    timings, cursor = [], None
+    for _ in range(pages):
+        params = {"limit": limit, **({"cursor": cursor} if cursor else {})}
+        started = time.perf_counter()
+        response = client.get("/api/v1/health-entries", params=params, headers=headers)
+        timings.append((time.perf_counter() - started) * 1000)
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor is None:
+            break
+    return timings
+
+
+def _compare_fields(client: TestClient, headers: dict[str, str], limit: int) -> None:
+    # A full walk of the heavy user's history, once per response shape.
+    print(f"full history walk, {limit} per page:")
+    for fields in ("full", "summary"):
+        timings, sizes, cursor = [], [], None
+        while True:
+            params = {"limit": limit, "fields": fields, **({"cursor": cursor} if cursor else {})}
+            started = time.perf_counter()
+            response = client.get("/api/v1/health-entries", params=params, headers=headers)
+            timings.append((time.perf_counter() - started) * 1000)
+            sizes.append(len(response.content))
+            cursor = response.headers.get("X-Next-Cursor")
+            if cursor is None:
+                break
+
+        # Measured separately: tracing allocations slows every request down several times.
+        tracemalloc.start()
+        client.get(
+            "/api/v1/health-entries", params={"limit": limit, "fields": fields}, headers=headers
+        )
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        print(
+            f"  fields={fields:<8} {len(timings)} pages, {sum(sizes) / 2**20:.1f} MiB on the wire "
+            f"({np.mean(sizes) / 1024:.0f} KiB/page), peak {peak / 2**20:.1f} MiB/request, "
+            f"{_percentiles(timings)}, total {sum(timings) / 1000:.1f}s"
+        )
+
+
+def _plan(connection) -> list[str]:
+    query = (
+        select(HealthEntry)
+        .where(
+            HealthEntry.user_id == 1,
+            tuple_(HealthEntry.recorded_at, HealthEntry.id) < (datetime.utcnow(), 0),
+        )
+        .order_by(HealthEntry.recorded_at.desc(), HealthEntry.id.desc())
+        .limit(51)
+    )
+    compiled = query.compile(engine, compile_kwargs={"literal_binds": True})
+    return [row[-1] for row in connection.execute(text(f"EXPLAIN QUERY PLAN {compiled}"))]
+
+
+def run(entries: int, other_users: int, limit: int, pages: int, fields_limit: int) -> None:
+    Base.metadata.create_all(bind=engine)
+    with TestClient(app) as client:
+        # Registered first so the benchmark user gets id 1.
+        credentials = {"email": "history-bench@example.com", "password": "BenchPass123"}
+        client.post("/api/v1/auth/register", json=credentials)
+        token = client.post("/api/v1/auth/login", json=credentials).json()["data"]["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+        _seed(entries, other_users)
+        print(
+            f"{entries:,} entries for the benchmark user, {entries:,} more across {other_users} others"
+        )
+
+        with SessionLocal() as db:
+            started = time.perf_counter()
+            everything = db.execute(
+                select(HealthEntry)
+                .where(HealthEntry.user_id == 1)
+                .order_by(HealthEntry.recorded_at.desc())
+            ).scalars()
+            body = [HealthEntryResponse.model_validate(entry).model_dump() for entry in everything]
+            full_ms = (time.perf_counter() - started) * 1000
+        print(
+            f"old unpaginated list: {len(body):,} entries in {full_ms:.0f}ms (query + serialisation only)"
+        )
+
+        _compare_fields(client, headers, fields_limit)
+
+        for label, with_index in (("with index", True), ("without index", False)):
+            if not with_index:
+                with engine.begin() as connection:
+                    connection.execute(text(f"DROP INDEX {INDEX}"))
+            with engine.connect() as connection:
+                print(f"{label}: plan {_plan(connection)}")
+            first = [_walk(client, headers, limit, 1)[0] for _ in range(50)]
+            deep = _walk(client, headers, limit, pages)
+            print(f"  first page x50: {_percentiles(first)}")
+            print(f"  {len(deep)} consecutive pages of {limit}: {_percentiles(deep)}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="History page latency and query plan for heavy users."
+    )
+    parser.add_argument("--entries", type=int, default=150_000)
+    parser.add_argument("--other-users", type=int, default=500)
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--pages", type=int, default=500)
+    parser.add_argument(
+        "--fields-limit", type=int, default=500, help="Page size for the fields comparison."
+    )
+    args = parser.parse_args()
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    run(args.entries, args.other_users, args.limit, args.pages, args.fields_limit)
@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+import argparse
+import time
+
+import numpy as np
+
+from app.services.prediction_service import INFERENCE_MODES, PredictionEngine
+from ml.data_generator import generate_synthetic_dataset
+
+
+def _latencies_ms(
+    engine: PredictionEngine, payloads: list[dict], tag_lists: list[list[str]]
+) -> np.ndarray:
+    for payload, tags in zip(payloads[:20], tag_lists[:20], strict=True):
+        engine.predict_top3(payload, tags)
+
+    timings = []
+    for payload, tags in zip(payloads, tag_lists, strict=True):
+        start = time.perf_counter()
+        engine.predict_top3(payload, tags)
+        timings.append((time.perf_counter() - start) * 1000)
+    return np.array(timings)
+
+
+def run(samples: int) -> None:
+    data = generate_synthetic_dataset(n_samples=samples, seed=123)
+    tag_lists = [text.replace(" ", "_").split(",_") for text in data["symptoms_text"]]
+    payloads = data.drop(columns=["condition"]).to_dict("records")
+
+    results = {}
+    for mode in INFERENCE_MODES:
+        engine = PredictionEngine(inference_mode=mode)
+        if mode == "compiled" and engine.active.compiled is None:
+            print("compiled: unavailable (see log)")
+            continue
+        latencies = _latencies_ms(engine, payloads, tag_lists)
+        results[mode] = (np.percentile(latencies, 50), np.percentile(latencies, 99))
+        print(
+            f"{mode:>9}: p50={results[mode][0]:.3f} ms  p99={results[mode][1]:.3f} ms  (n={samples})"
+        )
+
+    if len(results) == 2:
+        base, compiled = results["sklearn"], results["compiled"]
+        print(f"  speedup: p50 x{base[0] / compiled[0]:.1f}  p99 x{base[1] / compiled[1]:.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Compare predict_top3 latency across inference modes."
+    )
+    parser.add_argument("--samples", type=int, default=500)
+    args = parser.parse_args()
+    run(args.samples)
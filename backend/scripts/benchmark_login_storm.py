@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+import argparse
+import logging
+import os
+import tempfile
+import threading
+import time
+
+_DB_DIR = tempfile.mkdtemp(prefix="proactivecare-login-bench-")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_DB_DIR}/bench.db")
+os.environ.setdefault("SECRET_KEY", "benchmark_secret_key")
+os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+os.environ.setdefault("WARM_UP_ON_STARTUP", "false")
+
+import numpy as np  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+
+from app.core.security import password_hasher  # noqa: E402
+from app.db.base import Base  # noqa: E402
+from app.db.session import engine  # noqa: E402
+from app.main import app  # noqa: E402
+
+
+def _storm(
+    client: TestClient, headers: dict[str, str], logins: int, seconds: float
+) -> dict[str, float]:
+    credentials = {"email": "storm@example.com", "password": "StormPass123"}
+    stop = threading.Event()
+    statuses: list[int] = []
+
+    def login_loop() -> None:
+        while not stop.is_set():
+            response = client.post("/api/v1/auth/login", json=credentials)
+            statuses.append(response.status_code)
+            if response.status_code == 503:
+                # Well-behaved clients wait as told instead of retrying in a tight loop.
+                stop.wait(float(response.headers.get("Retry-After", 1)))
+
+    threads = [threading.Thread(target=login_loop) for _ in range(logins)]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.5)
+
+    latencies = []
+    started = time.perf_counter()
+    while time.perf_counter() - started < seconds:
+        t0 = time.perf_counter()
+        client.get("/api/v1/health-entries", headers=headers)
+        latencies.append((time.perf_counter() - t0) * 1000)
+    elapsed = time.perf_counter() - started
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    return {
+        "logins_per_s": sum(status == 200 for status in statuses) / elapsed,
+        "rejected_503": sum(status == 503 for status in statuses),
+        "other_p50_ms": float(np.percentile(latencies, 50)),
+        "other_p99_ms": float(np.percentile(latencies, 99)),
+    }
+
+
+def run(logins: int, seconds: float, workers: int) -> None:
+    Base.metadata.create_all(bind=engine)
+    with TestClient(app) as client:
+        client.post(
+            "/api/v1/auth/register", json={"email": "storm@example.com", "password": "StormPass123"}
+        )
+        credentials = {"email": "reader@example.com", "password": "ReaderPass123"}
+        client.post("/api/v1/auth/register", json=credentials)
+        token = client.post("/api/v1/auth/login", json=credentials).json()["data"]["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+
+        print(
+            f"bcrypt rounds={password_hasher.rounds}, {logins} concurrent login loops, {seconds:.0f}s each"
+        )
+        print(f"{'hashing':<22} {'logins/s':>9} {'503s':>6} {'other p50':>10} {'other p99':>10}")
+        for label, pool_workers in (("inline (old)", 0), (f"pool, {workers} workers", workers)):
+            password_hasher.workers = pool_workers
+            result = _storm(client, headers, logins, seconds)
+            print(
+                f"{label:<22} {result['logins_per_s']:>9.1f} {result['rejected_503']:>6} "
+                f"{result['other_p50_ms']:>8.1f}ms {result['other_p99_ms']:>8.1f}ms"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Login throughput and non-auth latency during a login storm."
+    )
+    parser.add_argument("--logins", type=int, default=64, help="Concurrent login loops.")
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--workers", type=int, default=password_hasher.workers or 2)
+    args = parser.parse_args()
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    run(args.logins, args.seconds, args.workers)
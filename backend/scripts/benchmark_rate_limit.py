@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+import argparse
+import gc
+import tempfile
+import time
+import tracemalloc
+from collections import defaultdict, deque
+from datetime import UTC, datetime, timedelta
+from pathlib import Path
+
+from app.core.rate_limit import MemoryBackend, RateLimiter, SQLiteBackend
+
+# A long period keeps every bucket live so the memory numbers are not flattered by eviction.
+MEMORY_PERIOD = 24 * 3600.0
+
+
+class _DequeLimiter:
+    # The per-key deque of timestamps the limiter used before, kept for comparison.
+    def __init__(self, limit: int = 20) -> None:
+        self.limit = limit
+        self.requests: dict[str, deque[datetime]] = defaultdict(deque)
+
+    def hit(self, key: str) -> bool:
+        now = datetime.now(UTC)
+        window_start = now - timedelta(minutes=1)
+        queue = self.requests[key]
+        while queue and queue[0] < window_start:
+            queue.popleft()
+        if len(queue) >= self.limit:
+            return False
+        queue.append(now)
+        return True
+
+
+def _bytes_per_key(build, keys: int) -> float:
+    gc.collect()
+    tracemalloc.start()
+    limiter = build()
+    for index in range(keys):
+        limiter.hit(f"{index}:10.0.{index % 256}.{index % 251}")
+    used, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del limiter
+    return used / keys
+
+
+def _cost_per_check_us(limiter, checks: int, distinct: int) -> float:
+    keys = [f"{index}:10.0.0.1" for index in range(distinct)]
+    started = time.perf_counter()
+    for index in range(checks):
+        limiter.hit(keys[index % distinct])
+    return (time.perf_counter() - started) / checks * 1e6
+
+
+def run(keys: int, checks: int) -> None:
+    def memory() -> RateLimiter:
+        return RateLimiter(MemoryBackend(max_keys=keys * 2), limit=20, period=MEMORY_PERIOD)
+
+    per_key = {
+        "deque (old)": _bytes_per_key(_DequeLimiter, keys),
+        "memory": _bytes_per_key(memory, keys),
+    }
+    for name, size in per_key.items():
+        print(
+            f"{name:>12}: {size:6.0f} B/key  ~{size * 1_000_000 / 2**20:6.0f} MiB per million keys"
+        )
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "rate_limits.db"
+        sqlite_limiter = RateLimiter(SQLiteBackend(path), limit=20, period=MEMORY_PERIOD)
+        for index in range(keys):
+            sqlite_limiter.hit(f"{index}:10.0.{index % 256}.{index % 251}")
+        size = sum(file.stat().st_size for file in Path(tmp).iterdir())
+        print(
+            f"{'sqlite':>12}: {size / keys:6.0f} B/key on disk  ~{size / keys * 1_000_000 / 2**20:6.0f} MiB per million keys"
+        )
+
+        for name, limiter in (
+            ("deque (old)", _DequeLimiter()),
+            ("memory", RateLimiter(MemoryBackend(max_keys=100_000), limit=20)),
+            ("sqlite", RateLimiter(SQLiteBackend(Path(tmp) / "checks.db"), limit=20)),
+        ):
+            print(f"{name:>12}: {_cost_per_check_us(limiter, checks, distinct=1000):7.2f} us/check")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Memory per key and cost per check of the rate limiter backends."
+    )
+    parser.add_argument("--keys", type=int, default=200_000)
+    parser.add_argument("--checks", type=int, default=50_000)
+    args = parser.parse_args()
+    run(args.keys, args.checks)
@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+_DB_DIR = tempfile.mkdtemp(prefix="proactivecare-purge-bench-")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_DB_DIR}/bench.db")
+os.environ.setdefault("SECRET_KEY", "benchmark_secret_key")
+
+from sqlalchemy import text  # noqa: E402
+
+from app.db.base import Base  # noqa: E402
+from app.db.session import SessionLocal, engine  # noqa: E402
+from app.services.refresh_token_service import RefreshTokenPurger, revoke_user_tokens  # noqa: E402
+
+
+def _seed(rows: int, users: int) -> dict[str, int]:
+    # Roughly what months of rotation leave behind: most rows revoked, some expired, few live.
+    Base.metadata.create_all(bind=engine)
+    now = datetime.utcnow()
+    rng = random.Random(7)
+    counts = {"revoked": 0, "expired": 0, "live": 0}
+    connection = engine.raw_connection()
+    try:
+        cursor = connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.executemany(
+            "INSERT INTO users (id, email, hashed_password, created_at, updated_at) VALUES (?, ?, '', ?, ?)",
+            [(user_id, f"user{user_id}@example.com", now, now) for user_id in range(1, users + 1)],
+        )
+
+        def batch(start: int, stop: int):
+            for token_id in range(start, stop):
+                roll = rng.random()
+                if roll < 0.6:
+                    kind, revoked, expires = "revoked", 1, now + timedelta(days=rng.uniform(-30, 7))
+                elif roll < 0.9:
+                    kind, revoked, expires = (
+                        "expired",
+                        0,
+                        now - timedelta(days=rng.uniform(0.01, 30)),
+                    )
+                else:
+                    kind, revoked, expires = "live", 0, now + timedelta(days=rng.uniform(0.01, 7))
+                counts[kind] += 1
+                yield (token_id, rng.randint(1, users), f"jti-{token_id}", expires, revoked, now)
+
+        for start in range(1, rows + 1, 200_000):
+            cursor.executemany(
+                "INSERT INTO refresh_tokens (id, user_id, jti, expires_at, revoked, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                batch(start, min(rows + 1, start + 200_000)),
+            )
+        connection.commit()
+    finally:
+        connection.close()
+    return counts
+
+
+def _timed(callback) -> tuple[float, object]:
+    started = time.perf_counter()
+    result = callback()
+    return time.perf_counter() - started, result
+
+
+def _logout_all(user_id: int) -> int:
+    with SessionLocal() as db:
+        return revoke_user_tokens(db, user_id)
+
+
+def run(rows: int, users: int, batch_size: int, old_schema: bool) -> None:
+    seed_seconds, counts = _timed(lambda: _seed(rows, users))
+    print(f"seeded {rows:,} refresh tokens for {users:,} users in {seed_seconds:.1f}s: {counts}")
+    if old_schema:
+        with engine.begin() as connection:
+            connection.execute(text("DROP INDEX ix_refresh_tokens_user_id_revoked"))
+            connection.execute(text("CREATE INDEX ix_refresh_tokens_id ON refresh_tokens (id)"))
+        print("schema before 0004: no user_id index, redundant id index")
+
+    logout_seconds, revoked = _timed(lambda: _logout_all(1))
+    print(f"logout-all: {revoked} tokens revoked in {logout_seconds * 1000:.1f}ms")
+
+    purger = RefreshTokenPurger(SessionLocal, batch_size=batch_size)
+    purge_seconds, deleted = _timed(purger.run_once)
+    with engine.connect() as connection:
+        remaining = connection.execute(text("SELECT COUNT(*) FROM refresh_tokens")).scalar_one()
+    print(
+        f"purge: {deleted:,} rows in {purge_seconds:.1f}s ({deleted / purge_seconds:,.0f} rows/s, "
+        f"{batch_size}-row batches, no pause); {remaining:,} rows left"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Refresh-token purge and logout-all cost on a large table."
+    )
+    parser.add_argument("--rows", type=int, default=10_000_000)
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument(
+        "--old-schema", action="store_true", help="Undo the 0004 indexes to compare."
+    )
+    args = parser.parse_args()
+    run(args.rows, args.users, args.batch_size, args.old_schema)
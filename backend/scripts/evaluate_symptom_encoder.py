@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+import argparse
+import json
+import time
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+from app.services.nlp_service import SymptomExtractor
+
+# Hand-labelled descriptions. The second half paraphrases symptoms without the exact
+# keywords, which is where an encoder should add recall over TF-IDF and keyword matching.
+EVAL_SET: list[tuple[str, set[str]]] = [
+    ("high fever with dry cough", {"fever", "cough"}),
+    ("headache and nausea since morning", {"headache", "nausea"}),
+    ("shortness of breath and chest pain", {"shortness_of_breath", "chest_pain"}),
+    ("sore throat, fatigue and chills", {"sore_throat", "fatigue", "fever"}),
+    ("dizzy and lightheaded after standing", {"dizziness"}),
+    ("watery stool and vomiting", {"diarrhea", "nausea"}),
+    ("migraine with dizziness", {"headache", "dizziness"}),
+    ("productive cough and breathless on stairs", {"cough", "shortness_of_breath"}),
+    ("exhausted, tight chest", {"fatigue", "chest_pain"}),
+    ("scratchy throat and hot body", {"sore_throat", "fever"}),
+    ("my head is pounding and the room keeps spinning", {"headache", "dizziness"}),
+    ("i can't catch my breath when walking", {"shortness_of_breath"}),
+    ("burning up and shivering all night", {"fever"}),
+    ("feel sick to my stomach and threw up twice", {"nausea"}),
+    ("completely drained, no energy at all", {"fatigue"}),
+    ("it hurts to swallow", {"sore_throat"}),
+    ("crushing feeling behind my breastbone", {"chest_pain"}),
+    ("running to the bathroom every hour with loose bowels", {"diarrhea"}),
+    ("hacking all night and bringing up phlegm", {"cough"}),
+    ("temples throbbing and feel faint", {"headache", "dizziness"}),
+]
+
+
+def _scores(predicted: list[set[str]], expected: list[set[str]]) -> dict[str, float]:
+    true_positive = sum(len(p & e) for p, e in zip(predicted, expected, strict=True))
+    predicted_total = sum(len(p) for p in predicted)
+    expected_total = sum(len(e) for e in expected)
+    precision = true_positive / predicted_total if predicted_total else 0.0
+    recall = true_positive / expected_total if expected_total else 0.0
+    f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+    return {"precision": round(precision, 3), "recall": round(recall, 3), "f1": round(f1, 3)}
+
+
+def _latency(call, texts: list[str], batch: int, repeats: int) -> dict[str, float]:
+    batches = [texts[start : start + batch] for start in range(0, len(texts), batch)]
+    call(batches[0])
+    timings = []
+    for _ in range(repeats):
+        for chunk in batches:
+            started = time.perf_counter()
+            call(chunk)
+            timings.append((time.perf_counter() - started) * 1000 / len(chunk))
+    return {
+        "batch_size": batch,
+        "p50_ms_per_text": round(float(np.percentile(timings, 50)), 3),
+        "p95_ms_per_text": round(float(np.percentile(timings, 95)), 3),
+    }
+
+
+def evaluate(batch: int, repeats: int) -> dict[str, Any]:
+    extractor = SymptomExtractor(lazy=False)
+    encoder = extractor._bert_encoder
+    # Ignore the budget here so the encoder's real cost is measured.
+    budget_ms = encoder.budget_ms if encoder else 0.0
+    if encoder:
+        encoder.budget_ms = 0.0
+
+    texts = [text for text, _ in EVAL_SET]
+    expected = [tags for _, tags in EVAL_SET]
+    keyword = [extractor._keyword_extract(text) for text in texts]
+    tfidf = extractor._tfidf_extract_batch(texts)
+    baseline = [k | t for k, t in zip(keyword, tfidf, strict=True)]
+
+    report: dict[str, Any] = {
+        "samples": len(EVAL_SET),
+        "quality": {
+            "keywords": _scores(keyword, expected),
+            "tfidf": _scores(tfidf, expected),
+            "tfidf+keywords": _scores(baseline, expected),
+        },
+        "latency": {
+            "tfidf+keywords": _latency(
+                lambda chunk: extractor.extract_batch(chunk), texts, batch, repeats
+            )
+        },
+    }
+    if encoder is None:
+        report["encoder"] = "unavailable (see log); only the TF-IDF path was measured"
+        return report
+
+    bert = extractor._bert_extract_batch(texts)
+    report["encoder"] = encoder.description
+    report["quality"]["distilbert"] = _scores(bert, expected)
+    report["quality"]["distilbert+tfidf+keywords"] = _scores(
+        [b | t for b, t in zip(bert, baseline, strict=True)], expected
+    )
+    report["latency"]["distilbert"] = _latency(encoder.encode, texts, 1, repeats)
+    report["latency"]["distilbert_batched"] = _latency(encoder.encode, texts, batch, repeats)
+    report["latency"]["distilbert+tfidf+keywords"] = _latency(
+        extractor.extract_batch, texts, batch, repeats
+    )
+    if budget_ms > 0:
+        report["budget_ms"] = budget_ms
+        report["fits_budget_single_text"] = (
+            report["latency"]["distilbert"]["p95_ms_per_text"] <= budget_ms
+        )
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Compare symptom extraction quality and latency per NLP path."
+    )
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--json", type=Path, help="Also write the report to a file.")
+    args = parser.parse_args()
+
+    result = evaluate(args.batch_size, args.repeats)
+    print(json.dumps(result, indent=2))
+    if args.json:
+        args.json.write_text(json.dumps(result, indent=2), encoding="utf-8")
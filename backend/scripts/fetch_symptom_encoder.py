@@ -0,0 +1,28 @@
+from __future__ import annotations
+
+import argparse
+from pathlib import Path
+
+from app.core.config import settings
+from app.services.symptom_encoder import HUB_MODEL
+
+
+def fetch(model: str, target: Path) -> None:
+    from transformers import AutoModel, AutoTokenizer
+
+    target.mkdir(parents=True, exist_ok=True)
+    AutoTokenizer.from_pretrained(model).save_pretrained(target)
+    AutoModel.from_pretrained(model).save_pretrained(target)
+    print(f"Saved {model} to {target}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Download the symptom encoder once so SYMPTOM_ENCODER_MODE=cpu can load it offline."
+    )
+    parser.add_argument("--model", default=HUB_MODEL)
+    parser.add_argument(
+        "--target", type=Path, default=settings.backend_root / settings.symptom_encoder_dir
+    )
+    args = parser.parse_args()
+    fetch(args.model, args.target)
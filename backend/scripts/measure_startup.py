@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+import argparse
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+
+def _wait_for(url: str, started: float, timeout: float) -> float | None:
+    while time.monotonic() - started < timeout:
+        try:
+            with urllib.request.urlopen(url, timeout=1) as response:
+                if response.status == 200:
+                    return time.monotonic() - started
+        except (urllib.error.URLError, ConnectionError, TimeoutError):
+            pass
+        time.sleep(0.05)
+    return None
+
+
+def run(port: int, timeout: float) -> None:
+    started = time.monotonic()
+    server = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "uvicorn",
+            "app.main:app",
+            "--port",
+            str(port),
+            "--log-level",
+            "warning",
+        ],
+    )
+    try:
+        base = f"http://127.0.0.1:{port}"
+        first_request = _wait_for(f"{base}/health", started, timeout)
+        ready = _wait_for(f"{base}/ready", started, timeout)
+        print(
+            f"process start -> first /health 200: {first_request if first_request is None else f'{first_request:.2f}s'}"
+        )
+        print(f"process start -> /ready 200:        {ready if ready is None else f'{ready:.2f}s'}")
+    finally:
+        server.terminate()
+        server.wait(timeout=10)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Time how long a fresh API process takes to serve and to be ready."
+    )
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--timeout", type=float, default=120.0)
+    args = parser.parse_args()
+    run(args.port, args.timeout)
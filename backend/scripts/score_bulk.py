@@ -0,0 +1,227 @@
+from __future__ import annotations
+
+import argparse
+import csv
+import json
+import logging
+import os
+import sys
+import time
+from collections.abc import Iterator
+from concurrent.futures import Future, ProcessPoolExecutor
+from itertools import islice
+from pathlib import Path
+from typing import Any
+
+from pydantic import ValidationError
+
+from app.schemas.predict import PredictionInput
+
+logger = logging.getLogger(__name__)
+
+
+def read_records(path: Path, fmt: str) -> Iterator[dict[str, Any]]:
+    with path.open(encoding="utf-8", newline="") as handle:
+        if fmt == "csv":
+            for row in csv.DictReader(handle):
+                # Empty CSV cells mean "not measured", same as an omitted JSON field.
+                yield {key: value for key, value in row.items() if value not in ("", None)}
+        else:
+            for line in handle:
+                if line.strip():
+                    yield json.loads(line)
+
+
+def chunked(records: Iterator[dict[str, Any]], size: int) -> Iterator[list[dict[str, Any]]]:
+    while chunk := list(islice(records, size)):
+        yield chunk
+
+
+def _init_worker() -> None:
+    from app.services.nlp_service import symptom_extractor
+    from app.services.prediction_service import prediction_engine
+
+    prediction_engine.ensure_loaded()
+    symptom_extractor.ensure_loaded()
+
+
+def score_chunk(start: int, records: list[dict[str, Any]], explain: bool) -> list[str]:
+    from app.services.scoring_service import prediction_result, score_batch
+
+    results: list[dict[str, Any] | None] = [None] * len(records)
+    valid: list[tuple[int, PredictionInput]] = []
+    for offset, record in enumerate(records):
+        try:
+            valid.append((offset, PredictionInput.model_validate(record)))
+        except ValidationError as exc:
+            results[offset] = {
+                "success": False,
+                "errors": exc.errors(include_url=False, include_context=False),
+            }
+
+    if valid:
+        try:
+            scored = score_batch([item for _, item in valid], explain=explain)
+            for (offset, _), item in zip(valid, scored, strict=True):
+                results[offset] = {"success": True, "data": prediction_result(*item)}
+        except Exception:  # noqa: BLE001
+            # Re-run record by record so one bad record cannot fail the whole chunk.
+            logger.exception("Chunk at record %s failed, retrying records individually.", start)
+            for offset, item in valid:
+                try:
+                    scored_item = score_batch([item], explain=explain)[0]
+                    results[offset] = {"success": True, "data": prediction_result(*scored_item)}
+                except Exception:  # noqa: BLE001
+                    logger.exception("Scoring failed for record %s.", start + offset)
+                    results[offset] = {"success": False, "errors": ["Prediction failed"]}
+
+    lines = []
+    for offset, (record, result) in enumerate(zip(records, results, strict=True)):
+        # An "id" column in the input is echoed back so results can be joined to source rows.
+        head = {"index": start + offset, **({"id": record["id"]} if "id" in record else {})}
+        lines.append(json.dumps({**head, **result}, default=str) + "\n")
+    return lines
+
+
+class Progress:
+    """Resume point for an output file: chunks fully written and the byte offset after them."""
+
+    def __init__(self, output: Path, signature: dict[str, Any]) -> None:
+        self.path = output.with_name(output.name + ".progress")
+        self.signature = signature
+
+    def load(self) -> tuple[int, int]:
+        if not self.path.exists():
+            return 0, 0
+        state = json.loads(self.path.read_text(encoding="utf-8"))
+        if state["signature"] != self.signature:
+            raise SystemExit(f"{self.path} belongs to a different run; delete it or pass --fresh.")
+        return state["chunks"], state["offset"]
+
+    def save(self, chunks: int, offset: int) -> None:
+        tmp = self.path.with_suffix(".tmp")
+        tmp.write_text(
+            json.dumps({"signature": self.signature, "chunks": chunks, "offset": offset}),
+            encoding="utf-8",
+        )
+        os.replace(tmp, self.path)
+
+    def clear(self) -> None:
+        self.path.unlink(missing_ok=True)
+
+
+def run(
+    input_path: Path,
+    output_path: Path,
+    fmt: str,
+    chunk_size: int,
+    workers: int,
+    explain: bool,
+    fresh: bool,
+) -> None:
+    stat = input_path.stat()
+    progress = Progress(
+        output_path,
+        {
+            "input": str(input_path.resolve()),
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "chunk_size": chunk_size,
+            # Rows with and without explanations must not end up in one file.
+            "explain": explain,
+        },
+    )
+    if fresh:
+        progress.clear()
+    done_chunks, offset = progress.load()
+
+    records = read_records(input_path, fmt)
+    # Skipped chunks are still read so record indexes stay aligned with the input.
+    for _ in islice(chunked(records, chunk_size), done_chunks):
+        pass
+    chunks = enumerate(chunked(records, chunk_size), start=done_chunks)
+
+    mode = "r+b" if offset and output_path.exists() else "wb"
+    started = time.perf_counter()
+    written = 0
+    with output_path.open(mode) as out:
+        out.seek(offset)
+        out.truncate()
+
+        def write(chunk_index: int, lines: list[str]) -> None:
+            nonlocal written
+            out.write("".join(lines).encode("utf-8"))
+            out.flush()
+            written += len(lines)
+            progress.save(chunk_index + 1, out.tell())
+            elapsed = time.perf_counter() - started
+            print(
+                f"\r{written} records  {written / elapsed:,.0f} rec/s",
+                end="",
+                file=sys.stderr,
+                flush=True,
+            )
+
+        if workers <= 1:
+            _init_worker()
+            for chunk_index, chunk in chunks:
+                write(chunk_index, score_chunk(chunk_index * chunk_size, chunk, explain))
+        else:
+            # Keep only a few chunks in flight and write them strictly in input order.
+            window = workers * 2
+            pending: dict[int, Future] = {}
+            next_to_write = done_chunks
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+                for chunk_index, chunk in chunks:
+                    pending[chunk_index] = pool.submit(
+                        score_chunk, chunk_index * chunk_size, chunk, explain
+                    )
+                    while len(pending) >= window or (
+                        next_to_write in pending and pending[next_to_write].done()
+                    ):
+                        write(next_to_write, pending.pop(next_to_write).result())
+                        next_to_write += 1
+                while pending:
+                    write(next_to_write, pending.pop(next_to_write).result())
+                    next_to_write += 1
+
+    elapsed = time.perf_counter() - started
+    progress.clear()
+    resumed = f" (resumed after {done_chunks} chunks)" if done_chunks else ""
+    print(
+        f"\nScored {written} records in {elapsed:.1f}s ({written / elapsed if elapsed else 0:,.0f} rec/s)"
+        f"{resumed} -> {output_path}",
+        file=sys.stderr,
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Score a CSV or JSONL file of health records offline."
+    )
+    parser.add_argument("input", type=Path)
+    parser.add_argument(
+        "output", type=Path, help="JSONL file, one result per input record in input order."
+    )
+    parser.add_argument(
+        "--format", choices=("csv", "jsonl"), help="Defaults to the input file extension."
+    )
+    parser.add_argument("--chunk-size", type=int, default=256)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument(
+        "--no-explain", action="store_true", help="Skip SHAP explanations (much faster)."
+    )
+    parser.add_argument(
+        "--fresh", action="store_true", help="Ignore progress from an interrupted run."
+    )
+    args = parser.parse_args()
+
+    run(
+        args.input,
+        args.output,
+        fmt=args.format or ("csv" if args.input.suffix.lower() == ".csv" else "jsonl"),
+        chunk_size=max(1, args.chunk_size),
+        workers=args.workers,
+        explain=not args.no_explain,
+        fresh=args.fresh,
+    )
@@ -10,8 +10,15 @@ from sqlalchemy.orm import Session, sessionmaker
 
 os.environ["DATABASE_URL"] = "sqlite:///./test_proactivecare.db"
 os.environ["SECRET_KEY"] = "test_secret_key"
+os.environ["DB_CREATE_ALL_ON_STARTUP"] = "false"
+# The minimum bcrypt cost keeps the many register/login calls in the suite fast.
+os.environ["BCRYPT_ROUNDS"] = "4"
+# Every test registers and logs in the same user, far faster than a real client would.
+os.environ["AUTH_RATE_LIMIT_PER_MINUTE"] = "10000"
+os.environ["API_RATE_LIMIT_PER_MINUTE"] = "10000"
 
 from app.api.deps import get_db  # noqa: E402
+from app.core.principal_cache import principal_cache  # noqa: E402
 from app.db.base import Base  # noqa: E402
 from app.main import app  # noqa: E402
 
@@ -35,6 +42,8 @@ app.dependency_overrides[get_db] = override_get_db
 def setup_db():
     Base.metadata.drop_all(bind=engine)
     Base.metadata.create_all(bind=engine)
+    # Ids restart with every fresh schema, so cached principals from earlier tests are stale.
+    principal_cache.clear()
     yield
     Base.metadata.drop_all(bind=engine)
 
@@ -43,3 +52,10 @@ def setup_db():
 def client() -> Generator[TestClient, None, None]:
     with TestClient(app) as c:
         yield c
+
+
+def auth_headers(client: TestClient, email: str = "pred@example.com") -> dict[str, str]:
+    credentials = {"email": email, "password": "SecurePass123"}
+    client.post("/api/v1/auth/register", json=credentials)
+    token = client.post("/api/v1/auth/login", json=credentials).json()["data"]["access_token"]
+    return {"Authorization": f"Bearer {token}"}
@@ -1,3 +1,18 @@
+import threading
+from datetime import UTC, datetime, timedelta
+
+import pytest
+from sqlalchemy import event
+
+from app.core import security
+from app.core.principal_cache import principal_cache
+from app.core.security import HasherSaturated, PasswordHasher, password_hasher
+from app.models.refresh_token import RefreshToken
+from app.models.user import User
+from app.services.refresh_token_service import RefreshTokenPurger
+from tests.conftest import TestingSessionLocal, engine
+
+
 def test_register_and_login(client):
     register_payload = {
         "email": "test@example.com",
@@ -17,3 +32,117 @@ def test_register_and_login(client):
     data = login.json()["data"]
     assert "access_token" in data
     assert "refresh_token" in data
+
+
+def test_principal_cache_skips_user_query_and_follows_profile_updates(client):
+    credentials = {"email": "cache@example.com", "password": "SecurePass123"}
+    client.post("/api/v1/auth/register", json={**credentials, "age": 30})
+    login = client.post("/api/v1/auth/login", json=credentials).json()["data"]
+    headers = {"Authorization": f"Bearer {login['access_token']}"}
+
+    statements = []
+
+    def record(_conn, _cursor, statement, *_args):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        assert client.get("/api/v1/profile/me", headers=headers).json()["data"]["age"] == 30
+        statements.clear()
+        assert client.get("/api/v1/profile/me", headers=headers).json()["data"]["age"] == 30
+        assert statements == []
+
+        client.put("/api/v1/profile/me", json={"age": 31}, headers=headers)
+        assert client.get("/api/v1/profile/me", headers=headers).json()["data"]["age"] == 31
+
+        client.post("/api/v1/auth/logout", json={"refresh_token": login["refresh_token"]})
+        assert principal_cache.get(login["access_token"]) is None
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+
+def test_login_rehashes_old_cost_and_hash_pool_sheds_load(client, monkeypatch):
+    credentials = {"email": "rehash@example.com", "password": "SecurePass123"}
+    old_cost = PasswordHasher(rounds=5, executor="thread", workers=0, max_pending=0)
+    with TestingSessionLocal() as db:
+        db.add(
+            User(email=credentials["email"], hashed_password=old_cost.hash(credentials["password"]))
+        )
+        db.commit()
+
+    assert client.post("/api/v1/auth/login", json=credentials).status_code == 200
+    with TestingSessionLocal() as db:
+        stored = db.query(User).filter_by(email=credentials["email"]).one().hashed_password
+    assert stored.startswith(f"$2b${password_hasher.rounds:02d}$")
+    assert client.post("/api/v1/auth/login", json=credentials).status_code == 200
+
+    release = threading.Event()
+    hasher = PasswordHasher(rounds=4, executor="thread", workers=1, max_pending=1)
+    blocked = [threading.Thread(target=hasher._run, args=(release.wait,)) for _ in range(2)]
+    for thread in blocked:
+        thread.start()
+    while hasher.stats()["in_flight"] < 2:
+        release.wait(0.01)
+    with pytest.raises(HasherSaturated):
+        hasher.hash("another-password")
+    release.set()
+    for thread in blocked:
+        thread.join()
+    assert hasher.stats()["rejected"] == 1
+    assert security.verify_password("x" * 8, hasher.hash("x" * 8))
+
+    # The app maps a saturated pool to 503 with Retry-After.
+    def saturated(*_):
+        raise HasherSaturated("Too many sign-in requests in progress. Please retry shortly.")
+
+    monkeypatch.setattr(password_hasher, "_run", saturated)
+    busy = client.post("/api/v1/auth/login", json=credentials)
+    assert busy.status_code == 503 and busy.headers["Retry-After"] == "1"
+    assert busy.json()["success"] is False
+
+
+def test_logout_all_revokes_every_session_and_purge_deletes_dead_tokens(client):
+    credentials = {"email": "sessions@example.com", "password": "SecurePass123"}
+    client.post("/api/v1/auth/register", json=credentials)
+    sessions = [
+        client.post("/api/v1/auth/login", json=credentials).json()["data"] for _ in range(3)
+    ]
+    # Rotation leaves one revoked row behind.
+    rotated = client.post(
+        "/api/v1/auth/refresh", json={"refresh_token": sessions[0]["refresh_token"]}
+    )
+    sessions[0] = rotated.json()["data"]
+
+    headers = {"Authorization": f"Bearer {sessions[1]['access_token']}"}
+    logout_all = client.post("/api/v1/auth/logout-all", headers=headers)
+    assert logout_all.status_code == 200
+    assert logout_all.json()["data"]["revoked_sessions"] == 3
+    for session in sessions:
+        refreshed = client.post(
+            "/api/v1/auth/refresh", json={"refresh_token": session["refresh_token"]}
+        )
+        assert refreshed.status_code == 401
+
+    live = client.post("/api/v1/auth/login", json=credentials).json()["data"]
+    with TestingSessionLocal() as db:
+        db.add(
+            RefreshToken(
+                user_id=1,
+                jti="expired",
+                expires_at=datetime.now(UTC) - timedelta(days=1),
+                revoked=False,
+            )
+        )
+        db.commit()
+
+    purger = RefreshTokenPurger(TestingSessionLocal, batch_size=2)
+    assert purger.run_once() == 5
+    assert purger.run_once() == 0
+    with TestingSessionLocal() as db:
+        assert db.query(RefreshToken).count() == 1
+    assert (
+        client.post(
+            "/api/v1/auth/refresh", json={"refresh_token": live["refresh_token"]}
+        ).status_code
+        == 200
+    )
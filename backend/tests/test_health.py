@@ -0,0 +1,29 @@
+import time
+
+from app import main
+from app.core.readiness import Readiness
+
+
+def test_ready_reports_components_once_warm_up_finishes(client):
+    assert client.get("/health").status_code == 200
+
+    deadline = time.monotonic() + 60
+    resp = client.get("/ready")
+    while resp.status_code == 503 and time.monotonic() < deadline:
+        assert resp.json()["errors"]["components"]
+        time.sleep(0.1)
+        resp = client.get("/ready")
+
+    assert resp.status_code == 200
+    report = resp.json()["data"]
+    assert report["ready"] is True
+    assert {"prediction_engine", "symptom_extractor"} <= set(report["components"])
+    assert report["first_request_after_seconds"] is not None
+
+
+def test_ready_without_warm_up_does_not_wait_for_lazy_components(monkeypatch):
+    monkeypatch.setattr(main.settings, "warm_up_on_startup", False)
+    monkeypatch.setattr(main, "readiness", Readiness())
+    main.startup_event()
+    assert main.readiness.report()["ready"] is True
+    assert main.readiness.report()["components"] == {}
@@ -0,0 +1,138 @@
+from app.api import routes_health
+from tests.conftest import auth_headers
+
+
+def test_history_keyset_pagination_filters_and_summary_fields(client):
+    headers = auth_headers(client)
+    ids = []
+    for day in range(7):
+        # Two entries share each timestamp, so the cursor has to break ties on id.
+        for level in ("Low", "High"):
+            entry = {
+                "symptoms_text": "mild headache",
+                "recorded_at": f"2026-01-0{day + 1}T08:00:00Z",
+                "risk_level": level,
+            }
+            ids.append(
+                client.post("/api/v1/health-entries", json=entry, headers=headers).json()["data"][
+                    "id"
+                ]
+            )
+
+    pages, cursor = [], None
+    while True:
+        params = {"limit": 4, **({"cursor": cursor} if cursor else {})}
+        resp = client.get("/api/v1/health-entries", params=params, headers=headers)
+        pages.append([entry["id"] for entry in resp.json()["data"]])
+        cursor = resp.headers.get("X-Next-Cursor")
+        if cursor is None:
+            break
+    assert [len(page) for page in pages] == [4, 4, 4, 2]
+    assert [entry_id for page in pages for entry_id in page] == sorted(ids, reverse=True)
+
+    params = {
+        "recorded_from": "2026-01-02T00:00:00Z",
+        "recorded_to": "2026-01-04T00:00:00Z",
+        "risk_level": "High",
+    }
+    filtered = client.get("/api/v1/health-entries", params=params, headers=headers).json()["data"]
+    assert [(entry["recorded_at"][:10], entry["risk_level"]) for entry in filtered] == [
+        ("2026-01-03", "High"),
+        ("2026-01-02", "High"),
+    ]
+    params["fields"] = "summary"
+    summary = client.get("/api/v1/health-entries", params=params, headers=headers).json()["data"]
+    assert [entry["id"] for entry in summary] == [entry["id"] for entry in filtered]
+    assert {"recorded_at", "heart_rate", "risk_score", "risk_level"} <= set(summary[0])
+    assert not {"symptoms_text", "predictions", "explanation", "user_id"} & set(summary[0])
+    assert summary[0]["recorded_at"] == filtered[0]["recorded_at"]
+    bad = client.get("/api/v1/health-entries", params={"cursor": "not-a-cursor"}, headers=headers)
+    assert bad.status_code == 400
+
+
+def test_entry_stats_cover_the_whole_history_of_the_caller_only(client):
+    headers = auth_headers(client)
+    empty = client.get("/api/v1/health-entries/stats", headers=headers)
+    assert empty.status_code == 200
+    assert empty.json()["data"] == {"count": 0, "average_risk_score": None}
+
+    # More entries than one page of history, plus one without a score that the average skips.
+    for score in [10, 20, 30, 40] * 15:
+        client.post(
+            "/api/v1/health-entries",
+            json={"symptoms_text": "mild headache", "risk_score": score},
+            headers=headers,
+        )
+    client.post("/api/v1/health-entries", json={"symptoms_text": "not scored yet"}, headers=headers)
+    assert len(client.get("/api/v1/health-entries", headers=headers).json()["data"]) == 50
+    stats = client.get("/api/v1/health-entries/stats", headers=headers).json()["data"]
+    assert stats == {"count": 61, "average_risk_score": 25.0}
+
+    other = {"email": "other@example.com", "password": "SecurePass123"}
+    client.post("/api/v1/auth/register", json=other)
+    token = client.post("/api/v1/auth/login", json=other).json()["data"]["access_token"]
+    theirs = client.get(
+        "/api/v1/health-entries/stats", headers={"Authorization": f"Bearer {token}"}
+    )
+    assert theirs.json()["data"] == {"count": 0, "average_risk_score": None}
+    assert client.get("/api/v1/health-entries/stats").status_code == 401
+
+
+def test_bulk_ingest_validates_per_item_and_deduplicates_by_idempotency_key(client):
+    headers = auth_headers(client)
+    items = [
+        {"symptoms_text": "slight cough", "heart_rate": 72, "idempotency_key": "watch-1"},
+        {"symptoms_text": "no"},
+        {
+            "symptoms_text": "tired after run",
+            "heart_rate": 150,
+            "recorded_at": "2026-01-01T07:00:00Z",
+        },
+        {"symptoms_text": "slight cough again", "idempotency_key": "watch-1"},
+        {"symptoms_text": "mild fever", "temperature": 38.0, "idempotency_key": "watch-2"},
+    ]
+    resp = client.post("/api/v1/health-entries/bulk", json={"items": items}, headers=headers)
+    assert resp.status_code == 200
+    data = resp.json()["data"]
+    assert (data["total"], data["created"], data["duplicates"], data["failed"]) == (5, 3, 1, 1)
+    first, invalid, keyless, repeated, second = data["results"]
+    assert [first["status"], keyless["status"], repeated["status"]] == [
+        "created",
+        "created",
+        "duplicate",
+    ]
+    assert repeated["entry_id"] == first["entry_id"]
+    assert invalid["success"] is False and invalid["errors"][0]["loc"] == ["symptoms_text"]
+    assert not {"input", "ctx", "url"} & set(invalid["errors"][0])
+
+    # A retried upload only adds the item without a key.
+    retry = client.post(
+        "/api/v1/health-entries/bulk", json={"items": items}, headers=headers
+    ).json()["data"]
+    assert (retry["created"], retry["duplicates"], retry["failed"]) == (1, 3, 1)
+    assert retry["results"][4]["entry_id"] == second["entry_id"]
+
+    history = client.get("/api/v1/health-entries", headers=headers).json()["data"]
+    assert len(history) == 4
+    stored = next(entry for entry in history if entry["id"] == first["entry_id"])
+    assert (stored["heart_rate"], stored["idempotency_key"]) == (72, "watch-1")
+
+
+def test_bulk_ingest_answers_409_when_the_key_race_is_lost_twice(client, monkeypatch):
+    headers = auth_headers(client)
+    item = {"symptoms_text": "slight cough", "idempotency_key": "watch-1"}
+    client.post("/api/v1/health-entries/bulk", json={"items": [item]}, headers=headers)
+
+    # Every lookup misses, as if a concurrent upload inserted the key right after it.
+    monkeypatch.setattr(routes_health, "_existing_keys", lambda db, user_id, keys: {})
+    resp = client.post(
+        "/api/v1/health-entries/bulk",
+        json={"items": [item, {"symptoms_text": "mild fever"}]},
+        headers=headers,
+    )
+    assert resp.status_code == 409
+    assert resp.json()["success"] is False
+
+    monkeypatch.undo()
+    history = client.get("/api/v1/health-entries", headers=headers).json()["data"]
+    assert len(history) == 1
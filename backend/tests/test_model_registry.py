@@ -0,0 +1,91 @@
+import shutil
+
+import numpy as np
+import pytest
+
+from app.services.prediction_service import PredictionEngine, _build_dataframe, prediction_engine
+from ml import train
+from ml.data_generator import generate_synthetic_dataset
+from ml.registry import ModelRegistry
+from ml.train import search_and_save, train_and_save
+
+
+def test_model_registry_hot_reload_and_rollback(tmp_path):
+    # Whatever the app serves, trained on the spot when MODEL_DIR is empty.
+    source = prediction_engine.registry.resolve(prediction_engine.active.version)
+    registry = ModelRegistry(tmp_path)
+    for version in ("20260101-000000", "20260201-000000"):
+        target = registry.versions_dir / version
+        target.mkdir(parents=True)
+        for path in (source.model_path, source.vectorizer_path):
+            shutil.copy(path, target / path.name)
+    registry.activate("20260101-000000")
+
+    engine = PredictionEngine(registry=registry)
+    assert engine.model_version == "20260101-000000"
+    payload = {"symptoms_text": "fever and cough", "temperature": 39.0}
+    before = engine.predict_top3(payload, [])
+
+    registry.activate("20260201-000000")
+    engine.reload(wait=True)
+    status = engine.status()
+    assert status["active_version"] == "20260201-000000"
+    assert status["previous_version"] == "20260101-000000"
+    assert engine.predict_top3(payload, []) == before
+
+    assert registry.rollback() == "20260101-000000"
+    engine.reload(wait=True)
+    assert engine.model_version == "20260101-000000"
+
+
+def test_compact_variant_is_reported_and_selectable(tmp_path):
+    metadata = train_and_save(tmp_path, n_samples=700, n_jobs=None, variants=["tiny"])
+    report = metadata["variants"]["tiny"]
+    assert report["artifact_bytes"] < metadata["variants"]["full"]["artifact_bytes"]
+    assert {"load_seconds", "latency_ms_per_row", "macro_f1", "vs_full"} <= set(report)
+
+    engine = PredictionEngine(
+        inference_mode="compiled", registry=ModelRegistry(tmp_path), variant="tiny"
+    )
+    assert engine.model_version == f"{metadata['version']}:tiny"
+    featurizer, forest = engine.active.compiled
+    assert forest.value.dtype == np.float32
+
+    payloads = (
+        generate_synthetic_dataset(n_samples=100, seed=5)
+        .drop(columns=["condition"])
+        .to_dict("records")
+    )
+    tag_lists = [[] for _ in payloads]
+    expected = engine.model.predict_proba(_build_dataframe(payloads, tag_lists))
+    assert np.allclose(
+        forest.predict_proba(featurizer.transform(payloads, tag_lists)), expected, atol=1e-6
+    )
+
+
+def test_interrupted_search_resumes_from_its_checkpoint(tmp_path, monkeypatch):
+    grid = {"clf__n_estimators": [5, 10, 15], "clf__max_depth": [4]}
+    options = {"param_grid": grid, "cv": 2, "n_samples": 400, "n_jobs": 1}
+    score_fold = train._score_fold
+    fits = []
+
+    def interrupt_after_two_candidates(*args):
+        if len(fits) == 2 * options["cv"]:
+            raise KeyboardInterrupt
+        fits.append(args[0])
+        return score_fold(*args)
+
+    monkeypatch.setattr(train, "_score_fold", interrupt_after_two_candidates)
+    with pytest.raises(KeyboardInterrupt):
+        search_and_save(tmp_path, **options)
+    (checkpoint,) = (tmp_path / "searches").glob("*.jsonl")
+    assert len(checkpoint.read_text(encoding="utf-8").splitlines()) == 2
+
+    fits.clear()
+    monkeypatch.setattr(
+        train, "_score_fold", lambda *args: fits.append(args[0]) or score_fold(*args)
+    )
+    metadata = search_and_save(tmp_path, **options)
+    assert fits == [{"n_estimators": 15, "max_depth": 4}] * options["cv"]
+    assert metadata["search"]["resumed_candidates"] == 2
+    assert len(metadata["search"]["results"]) == 3
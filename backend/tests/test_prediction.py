@@ -1,3 +1,25 @@
+import json
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+
+from app.core.metrics import Metrics
+from app.schemas.predict import PredictionInput
+from app.services import scoring_service
+from app.services.batching import PredictionBatcher, prediction_batcher
+from app.services.explanation_service import explanation_queue
+from app.services.nlp_service import SymptomExtractor, symptom_vocabulary
+from app.services.prediction_cache import PredictionCache, canonical_inputs
+from app.services.prediction_service import PredictionEngine, _build_dataframe, prediction_engine
+from app.services.risk_service import calculate_risk, calculate_risk_batch
+from ml.data_generator import generate_chunk, generate_synthetic_dataset, iter_synthetic_chunks
+
+
 def _auth_headers(client):
     client.post(
         "/api/v1/auth/register",
@@ -34,3 +56,337 @@ def test_prediction_and_health_entry_persist(client):
     history = client.get("/api/v1/health-entries", headers=headers)
     assert history.status_code == 200
     assert len(history.json()["data"]) == 1
+
+
+def test_batch_prediction_reports_per_item_results(client):
+    headers = _auth_headers(client)
+    items = [
+        {
+            "symptoms_text": "fever, cough and fatigue",
+            "temperature": 38.9,
+            "heart_rate": 110,
+            "save_entry": True,
+        },
+        {"symptoms_text": "no"},
+        {"symptoms_text": "pounding headache and nausea", "systolic_bp": 150, "save_entry": False},
+    ]
+    resp = client.post("/api/v1/predict/batch", json={"items": items}, headers=headers)
+    assert resp.status_code == 200
+    data = resp.json()["data"]
+    assert (data["total"], data["succeeded"], data["failed"]) == (3, 2, 1)
+
+    first, invalid, third = data["results"]
+    assert first["success"] is True and len(first["data"]["predictions"]) == 3
+    assert "entry_id" in first["data"]
+    assert invalid["success"] is False and invalid["errors"]
+    assert third["success"] is True and "entry_id" not in third["data"]
+
+    history = client.get("/api/v1/health-entries", headers=headers)
+    assert [entry["id"] for entry in history.json()["data"]] == [first["data"]["entry_id"]]
+
+
+def test_batch_risk_matches_single_row_scoring():
+    rows = [
+        {"heart_rate": 120, "spo2": 91, "temperature": 39.1, "glucose": 130},
+        {"systolic_bp": 185, "diastolic_bp": 95},
+        {"heart_rate": 72, "temperature": 36.7},
+        {},
+    ]
+    confidences = [0.73, 0.41, 1.2, 0.0]
+    assert calculate_risk_batch(rows, confidences) == [
+        calculate_risk(row, conf) for row, conf in zip(rows, confidences, strict=True)
+    ]
+
+
+def test_compiled_inference_matches_sklearn_pipeline():
+    engine = PredictionEngine(inference_mode="compiled")
+    assert engine.active.compiled is not None
+
+    payloads = (
+        generate_synthetic_dataset(n_samples=200, seed=99)
+        .drop(columns=["condition"])
+        .to_dict("records")
+    )
+    tag_lists = [["fever", "cough"] if i % 2 else [] for i in range(len(payloads))]
+    featurizer, forest = engine.active.compiled
+    expected = engine.model.predict_proba(_build_dataframe(payloads, tag_lists))
+    assert np.allclose(
+        forest.predict_proba(featurizer.transform(payloads, tag_lists)), expected, atol=1e-9
+    )
+
+
+def test_synthetic_chunks_are_deterministic_and_follow_condition_profiles():
+    chunks = list(iter_synthetic_chunks(2500, seed=11, chunk_size=1000))
+    assert [len(chunk) for chunk in chunks] == [1000, 1000, 500]
+    assert chunks[1].equals(generate_chunk(1000, seed=11, chunk_index=1))
+
+    data = pd.concat(chunks, ignore_index=True)
+    hypertension = data[data["condition"] == "Hypertension"]
+    assert hypertension["systolic_bp"].between(140, 190).all()
+    assert (data.loc[data["condition"] == "Migraine", "symptoms_text"].str.count(",") == 2).all()
+
+
+def test_batcher_merges_concurrent_requests_and_returns_each_callers_rows():
+    payloads = [
+        {"symptoms_text": text, "temperature": temp}
+        for text, temp in [
+            ("fever and cough", 39.0),
+            ("headache, nausea", 36.8),
+            ("thirst, fatigue", 36.9),
+        ]
+        * 8
+    ]
+    batcher = PredictionBatcher(prediction_engine, enabled=True, window_ms=50, max_batch_size=64)
+    with ThreadPoolExecutor(max_workers=len(payloads)) as pool:
+        results = list(pool.map(lambda payload: batcher.run([payload], [[]])[1][0], payloads))
+
+    assert results == prediction_engine.predict_top3_batch(payloads, [[] for _ in payloads])
+    stats = batcher.stats()
+    assert stats["rows"] == len(payloads)
+    assert stats["batches"] < len(payloads)
+    assert stats["queue_depth"] == 0
+
+
+def test_prediction_cache_single_flight_and_version_invalidation():
+    engine = SimpleNamespace(model_version="v1")
+    cache = PredictionCache(engine, enabled=True, max_entries=2, max_bytes=1 << 20, ttl_seconds=60)
+    calls = []
+    lock = threading.Lock()
+
+    def compute(indices):
+        with lock:
+            calls.append(len(indices))
+        time.sleep(0.05)
+        return [{"predictions": ["Influenza"]} for _ in indices]
+
+    key = cache.key_for(
+        canonical_inputs({"symptoms_text": "Fever  and cough ", "temperature": 38.04})
+    )
+    assert key == cache.key_for(
+        canonical_inputs({"symptoms_text": "fever and cough", "temperature": 38.0})
+    )
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(lambda _: cache.get_or_compute_many([key], compute)[0], range(8)))
+    assert calls == [1]
+    assert all(result == {"predictions": ["Influenza"]} for result in results)
+    assert cache.get_or_compute_many([key], compute) == [{"predictions": ["Influenza"]}]
+    assert calls == [1]
+
+    engine.model_version = "v2"
+    cache.get_or_compute_many([key], compute)
+    stats = cache.stats()
+    assert calls == [1, 1]
+    assert stats["invalidations"] == 1 and stats["model_version"] == "v2"
+
+
+def test_cache_misses_score_the_request_as_sent_and_read_the_version_unlocked(monkeypatch):
+    class Engine:
+        @property
+        def model_version(self):
+            assert not cache._lock.locked()
+            return "v1"
+
+    cache = PredictionCache(
+        Engine(), enabled=True, max_entries=8, max_bytes=1 << 20, ttl_seconds=60
+    )
+    seen = []
+    real_infer = scoring_service.infer
+
+    def recording_infer(payload_data, explain=True):
+        seen.extend(payload["symptoms_text"] for payload in payload_data)
+        return real_infer(payload_data, explain=explain)
+
+    monkeypatch.setattr(scoring_service, "prediction_cache", cache)
+    monkeypatch.setattr(scoring_service, "infer", recording_infer)
+    payload = PredictionInput(symptoms_text="Fever  AND Cough ", temperature=38.04)
+    first = scoring_service.score_batch([payload])
+    assert seen == ["Fever  AND Cough "]
+    assert scoring_service.score_batch([payload]) == first
+    assert seen == ["Fever  AND Cough "]
+    assert cache.stats()["hits"] == 1
+
+
+def test_saved_entry_records_model_version(client):
+    headers = _auth_headers(client)
+    resp = client.post(
+        "/api/v1/predict",
+        json={"symptoms_text": "headache and nausea", "save_entry": True},
+        headers=headers,
+    )
+    assert resp.json()["data"]["model_version"] == prediction_engine.model_version
+
+    entry_id = resp.json()["data"]["entry_id"]
+    entry = client.get(f"/api/v1/health-entries/{entry_id}", headers=headers).json()["data"]
+    assert entry["model_version"] == prediction_engine.model_version
+
+
+def test_predict_reports_server_timing_and_metrics_merge_workers(client, tmp_path):
+    headers = _auth_headers(client)
+    resp = client.post(
+        "/api/v1/predict",
+        json={"symptoms_text": "fever and dry cough", "temperature": 38.9, "save_entry": True},
+        headers=headers,
+    )
+    assert resp.status_code == 200
+    stages = {part.split(";")[0].strip() for part in resp.headers["server-timing"].split(",")}
+    assert {"nlp", "risk", "db", "total"} <= stages
+
+    body = client.get("/metrics").text
+    assert (
+        'proactivecare_http_requests_total{method="POST",route="/api/v1/predict",status="200"}'
+        in body
+    )
+    assert 'proactivecare_stage_duration_seconds_count{stage="nlp"}' in body
+
+    worker = Metrics(enabled=True, multiproc_dir=str(tmp_path), flush_seconds=60)
+    worker.inc("proactivecare_http_requests_total", ("GET", "/health", "200"), 2)
+    exited = {
+        "pid": 2**22 + 1,
+        "values": {
+            "proactivecare_http_requests_total": [[["GET", "/health", "200"], 3.0]],
+            "proactivecare_http_requests_in_flight": [[["GET", "/health"], 1.0]],
+        },
+    }
+    (tmp_path / "metrics-exited.json").write_text(json.dumps(exited), encoding="utf-8")
+    merged = worker.render()
+    assert (
+        'proactivecare_http_requests_total{method="GET",route="/health",status="200"} 5' in merged
+    )
+    assert "proactivecare_http_requests_in_flight{" not in merged
+
+
+def test_server_timing_reports_batched_featurize_and_predict(client, monkeypatch):
+    headers = _auth_headers(client)
+    monkeypatch.setattr(prediction_batcher, "enabled", True)
+    monkeypatch.setattr(scoring_service.prediction_cache, "enabled", False)
+    resp = client.post(
+        "/api/v1/predict", json={"symptoms_text": "headache and nausea"}, headers=headers
+    )
+    assert resp.status_code == 200
+    stages = {part.split(";")[0].strip() for part in resp.headers["server-timing"].split(",")}
+    assert {"batch_wait", "featurize", "predict_proba"} <= stages
+    assert prediction_batcher.stats()["batches"] >= 1
+
+
+def test_deferred_explanation_is_saved_and_fetched_later(client):
+    headers = _auth_headers(client)
+    payload = {
+        "symptoms_text": "fever with cough",
+        "temperature": 38.7,
+        "save_entry": True,
+        "defer_explanation": True,
+    }
+    data = client.post("/api/v1/predict", json=payload, headers=headers).json()["data"]
+    assert data["top_contributing_features"] is None
+    assert data["explanation"]["url"] == f"/api/v1/predict/explanations/{data['entry_id']}"
+
+    deadline = time.monotonic() + 30
+    while True:
+        resp = client.get(data["explanation"]["url"], headers=headers)
+        if resp.status_code == 200 or time.monotonic() > deadline:
+            break
+        assert resp.status_code == 202
+        time.sleep(0.05)
+    assert resp.status_code == 200 and resp.json()["data"]["top_contributing_features"]
+
+    entry = client.get(f"/api/v1/health-entries/{data['entry_id']}", headers=headers).json()["data"]
+    assert entry["explanation_status"] == "ready"
+    assert entry["explanation"] == resp.json()["data"]["top_contributing_features"]
+
+    invalid = client.post("/api/v1/predict", json={**payload, "save_entry": False}, headers=headers)
+    assert invalid.status_code == 422
+
+
+def test_full_explanation_queue_sheds_and_failed_jobs_are_reported(client, monkeypatch):
+    def poll(url):
+        deadline = time.monotonic() + 30
+        while True:
+            resp = client.get(url, headers=headers)
+            if resp.status_code != 202 or time.monotonic() > deadline:
+                return resp
+            time.sleep(0.05)
+
+    headers = _auth_headers(client)
+    payload = {
+        "symptoms_text": "fever with cough",
+        "temperature": 38.7,
+        "save_entry": True,
+        "defer_explanation": True,
+    }
+    monkeypatch.setattr(explanation_queue, "submit", lambda job: False)
+    batch = client.post(
+        "/api/v1/predict/batch", json={"items": [payload, payload]}, headers=headers
+    ).json()["data"]
+    shed = [result["data"]["explanation"] for result in batch["results"]]
+    assert [explanation["status"] for explanation in shed] == ["shed", "shed"]
+    busy = client.get(shed[0]["url"], headers=headers)
+    assert busy.status_code == 503 and busy.headers["retry-after"] == "1"
+
+    # Once the queue has room, fetching a shed explanation resubmits it with the entry's model.
+    monkeypatch.undo()
+    resp = poll(shed[0]["url"])
+    assert resp.status_code == 200 and resp.json()["data"]["status"] == "ready"
+    assert resp.json()["data"]["top_contributing_features"]
+
+    # An explanation that cannot be computed is reported instead of staying pending forever.
+    monkeypatch.setattr(prediction_engine, "loaded_model", lambda version: None)
+    resp = poll(shed[1]["url"])
+    assert resp.status_code == 200
+    assert resp.json()["data"] == {
+        "entry_id": batch["results"][1]["data"]["entry_id"],
+        "status": "failed",
+        "top_contributing_features": None,
+    }
+
+
+def test_phrase_matcher_matches_word_boundary_regex_semantics(tmp_path):
+    vocabulary_file = tmp_path / "vocabulary.csv"
+    vocabulary_file.write_text(
+        "tag,phrase\nrash,Skin Rash\nrash,hives\nfever,pyrexia\n", encoding="utf-8"
+    )
+    vocabulary = symptom_vocabulary(str(vocabulary_file))
+    assert vocabulary["fever"][-1] == "pyrexia" and vocabulary["rash"] == ["Skin Rash", "hives"]
+
+    extractor = SymptomExtractor(lazy=True, vocabulary=vocabulary)
+    texts = [
+        "High fever, dry cough & chest pain-tight chest",
+        "feverish coughing_fit with headaches",
+        "skin rash and hives; pyrexia",
+        "lightheaded/dizzy",
+        "",
+    ]
+    for text in texts:
+        expected = {
+            tag
+            for tag, phrases in vocabulary.items()
+            if any(
+                re.search(rf"\b{re.escape(phrase.lower())}\b", text.lower()) for phrase in phrases
+            )
+        }
+        assert extractor._keyword_extract(text) == expected
+    assert extractor._keyword_extract("skin rash and pyrexia") == {"rash", "fever"}
+
+
+def test_batch_symptom_extraction_matches_single_text_endpoint(client):
+    headers = _auth_headers(client)
+    texts = ["fever with dry cough", "pounding headache and nausea", "nothing specific", "dizzy"]
+    resp = client.post(
+        "/api/v1/predict/extract-symptoms/batch", json={"texts": texts}, headers=headers
+    )
+    assert resp.status_code == 200
+    data = resp.json()["data"]
+    assert data["count"] == len(texts) and data["texts_per_second"] > 0
+
+    for text, result in zip(texts, data["results"], strict=True):
+        single = client.post(
+            "/api/v1/predict/extract-symptoms", json={"symptoms_text": text}
+        ).json()["data"]
+        assert result == single
+
+    assert (
+        client.post(
+            "/api/v1/predict/extract-symptoms/batch", json={"texts": []}, headers=headers
+        ).status_code
+        == 422
+    )
@@ -0,0 +1,114 @@
+import pytest
+from fastapi.testclient import TestClient
+from jose import jwt
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+from app.core.config import settings
+from app.core.rate_limit import (
+    MemoryBackend,
+    RateLimiter,
+    RateLimitMiddleware,
+    SQLiteBackend,
+    default_policies,
+)
+from app.core.security import create_access_token
+from tests.conftest import auth_headers
+
+
+def test_rate_limiter_headers_and_shared_sqlite_buckets(client, tmp_path):
+    headers = auth_headers(client)
+    resp = client.post(
+        "/api/v1/predict",
+        json={"symptoms_text": "mild cough", "save_entry": False},
+        headers=headers,
+    )
+    # The limiter is process-wide, so earlier tests may already have spent part of this bucket.
+    assert 0 <= int(resp.headers["RateLimit-Remaining"]) < int(resp.headers["RateLimit-Limit"])
+    assert int(resp.headers["RateLimit-Reset"]) > 0
+
+    # Two limiters on one file behave like two workers sharing a single limit.
+    path = tmp_path / "limits.db"
+    workers = [RateLimiter(SQLiteBackend(path), limit=3), RateLimiter(SQLiteBackend(path), limit=3)]
+    decisions = [workers[index % 2].hit("user:1") for index in range(4)]
+    assert [decision.allowed for decision in decisions] == [True, True, True, False]
+    assert [decision.remaining for decision in decisions[:3]] == [2, 1, 0]
+    assert decisions[-1].headers()["Retry-After"] == "20"
+
+    memory = RateLimiter(MemoryBackend(max_keys=2), limit=3)
+    for key in ("a", "b", "c"):
+        memory.hit(key)
+    assert len(memory.backend) == 2
+
+    # The sweep drops idle keys even when they sit behind a key that is still active.
+    backend = MemoryBackend(max_keys=10, sweep_every=3)
+    backend.update("long", 0.0, 30.0, 60.0)
+    backend.update("short", 0.0, 1.0, 60.0)
+    backend.update("other", 5.0, 1.0, 60.0)
+    assert set(backend._tats) == {"long", "other"}
+
+    with pytest.raises(ValueError):
+        RateLimiter(MemoryBackend(max_keys=2), limit=0)
+
+
+def test_rate_limit_middleware_rejects_before_the_app_runs(monkeypatch):
+    calls = []
+
+    async def endpoint(request):
+        calls.append(await request.json())
+        return JSONResponse({"ok": True})
+
+    inner = Starlette(routes=[Route("/api/v1/{path:path}", endpoint, methods=["POST"])])
+    policies = default_policies(MemoryBackend(max_keys=100), "/api/v1")
+    for policy in policies:
+        policy.limiter = RateLimiter(policy.limiter.backend, limit=2)
+    client = TestClient(RateLimitMiddleware(inner, policies))
+
+    login = [
+        client.post("/api/v1/auth/login", json={"email": f"u{i}@x.io", "password": "p"})
+        for i in range(3)
+    ]
+    assert [resp.status_code for resp in login] == [200, 200, 429]
+    assert len(calls) == 2 and calls[1]["email"] == "u1@x.io"
+    assert login[2].headers["Retry-After"] and login[2].json()["success"] is False
+
+    # Spreading one email across addresses is still held back by the email bucket.
+    for index in range(3):
+        other = TestClient(RateLimitMiddleware(inner, policies), client=(f"10.0.0.{index}", 5000))
+        resp = other.post(
+            "/api/v1/auth/login", json={"email": "Victim@x.io" if index else "victim@x.io"}
+        )
+    assert resp.status_code == 429 and len(calls) == 4
+
+    # A limit of 0 turns a policy off instead of failing at startup.
+    monkeypatch.setattr(settings, "auth_rate_limit_per_minute", 0)
+    unlimited = TestClient(
+        RateLimitMiddleware(inner, default_policies(MemoryBackend(max_keys=100), "/api/v1"))
+    )
+    statuses = [
+        unlimited.post("/api/v1/auth/login", json={"email": "a@x.io"}).status_code for _ in range(3)
+    ]
+    assert statuses == [200, 200, 200]
+    calls.clear()
+
+    # Authenticated routes are keyed by token subject, not by client address.
+    for subject in ("1", "2"):
+        headers = {"Authorization": f"Bearer {create_access_token(subject)[0]}"}
+        statuses = [
+            client.post("/api/v1/predict", json={}, headers=headers).status_code for _ in range(3)
+        ]
+        assert statuses == [200, 200, 429]
+
+    # A token that fails verification is keyed on the address, so a forged sub cannot drain
+    # the victim's bucket.
+    forged = {
+        "Authorization": f"Bearer {jwt.encode({'sub': '3'}, 'not-the-secret', algorithm='HS256')}"
+    }
+    attacker = TestClient(RateLimitMiddleware(inner, policies), client=("10.0.1.1", 5000))
+    statuses = [
+        attacker.post("/api/v1/predict", json={}, headers=forged).status_code for _ in range(3)
+    ]
+    assert statuses == [200, 200, 429]
+    victim = {"Authorization": f"Bearer {create_access_token('3')[0]}"}
+    assert client.post("/api/v1/predict", json={}, headers=victim).status_code == 200
@@ -0,0 +1,76 @@
+import json
+
+import pytest
+
+from app.services import scoring_service
+from scripts import score_bulk
+
+
+def _write_records(path, records):
+    path.write_text("".join(json.dumps(record) + "\n" for record in records), encoding="utf-8")
+
+
+def _read_results(path):
+    return [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+
+
+RECORDS = [
+    {"id": "a", "symptoms_text": "fever and dry cough", "temperature": 38.9},
+    {"id": "b", "symptoms_text": "no"},
+    {"id": "c", "symptoms_text": "pounding headache and nausea", "systolic_bp": 150},
+    {"symptoms_text": "thirst and fatigue"},
+    {"id": "e", "symptoms_text": "dizzy and lightheaded"},
+]
+
+
+def test_results_keep_input_order_echo_ids_and_isolate_failing_records(tmp_path, monkeypatch):
+    source, output = tmp_path / "records.jsonl", tmp_path / "results.jsonl"
+    _write_records(source, RECORDS)
+    score_batch = scoring_service.score_batch
+
+    def fail_on_headache(payloads, explain=True):
+        if any("headache" in payload.symptoms_text for payload in payloads):
+            raise RuntimeError("boom")
+        return score_batch(payloads, explain=explain)
+
+    monkeypatch.setattr(scoring_service, "score_batch", fail_on_headache)
+    score_bulk.run(source, output, "jsonl", chunk_size=2, workers=1, explain=False, fresh=False)
+
+    results = _read_results(output)
+    assert [result["index"] for result in results] == [0, 1, 2, 3, 4]
+    assert [result.get("id") for result in results] == ["a", "b", "c", None, "e"]
+    assert [result["success"] for result in results] == [True, False, False, True, True]
+    assert results[1]["errors"][0]["loc"] == ["symptoms_text"]
+    assert results[2]["errors"] == ["Prediction failed"]
+    assert len(results[0]["data"]["predictions"]) == 3
+    assert not (tmp_path / "results.jsonl.progress").exists()
+
+
+def test_interrupted_run_resumes_after_the_last_written_chunk(tmp_path, monkeypatch):
+    source, output = tmp_path / "records.jsonl", tmp_path / "results.jsonl"
+    _write_records(source, RECORDS)
+    options = {"fmt": "jsonl", "chunk_size": 2, "workers": 1, "explain": False, "fresh": False}
+    score_chunk = score_bulk.score_chunk
+    starts = []
+
+    def interrupt_at_second_chunk(start, records, explain):
+        if start == 2:
+            raise KeyboardInterrupt
+        starts.append(start)
+        return score_chunk(start, records, explain)
+
+    monkeypatch.setattr(score_bulk, "score_chunk", interrupt_at_second_chunk)
+    with pytest.raises(KeyboardInterrupt):
+        score_bulk.run(source, output, **options)
+    progress = json.loads((tmp_path / "results.jsonl.progress").read_text(encoding="utf-8"))
+    assert progress["chunks"] == 1 and progress["offset"] == output.stat().st_size
+
+    starts.clear()
+    monkeypatch.setattr(
+        score_bulk, "score_chunk", lambda *args: starts.append(args[0]) or score_chunk(*args)
+    )
+    score_bulk.run(source, output, **options)
+    assert starts == [2, 4]
+    results = _read_results(output)
+    assert [result["index"] for result in results] == [0, 1, 2, 3, 4]
+    assert [result.get("id") for result in results] == ["a", "b", "c", None, "e"]
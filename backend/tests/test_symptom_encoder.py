@@ -0,0 +1,69 @@
+import numpy as np
+
+from app.services.nlp_service import SymptomExtractor
+from app.services.symptom_encoder import SymptomEncoder
+
+
+class StubEncoder(SymptomEncoder):
+    """Skips torch: every text embeds to the same unit vector at a fixed cost per text."""
+
+    def __init__(self, fingerprint: str = "stub", budget_ms: float = 0.0, ms_per_text: float = 5.0):
+        super().__init__(
+            None,
+            None,
+            None,
+            device="cpu",
+            quantized=False,
+            fingerprint=fingerprint,
+            max_tokens=64,
+            batch_size=16,
+            budget_ms=budget_ms,
+        )
+        self.cost_ms = ms_per_text
+        self.calls: list[list[str]] = []
+
+    def encode(self, texts: list[str]) -> np.ndarray:
+        self.calls.append(list(texts))
+        self._record(self.cost_ms * len(texts), len(texts))
+        return np.full((len(texts), 4), 0.5, dtype=np.float32)
+
+
+def test_label_embeddings_are_cached_per_model_and_label_set(tmp_path):
+    labels = ["fever chills", "cough", "headache"]
+    first = StubEncoder()
+    embeddings = first.label_embeddings(labels, tmp_path)
+    assert first.calls == [labels]
+    assert len(list(tmp_path.glob("labels-*.npy"))) == 1
+
+    # Reused: only one label is encoded, to seed the cost estimate for the budget.
+    second = StubEncoder()
+    assert np.array_equal(second.label_embeddings(labels, tmp_path), embeddings)
+    assert second.calls == [labels[:1]]
+    assert second.ms_per_text == 5.0
+
+    # A different model or label set gets its own file.
+    other_model = StubEncoder(fingerprint="retrained")
+    other_model.label_embeddings(labels, tmp_path)
+    assert other_model.calls == [labels]
+    more_labels = StubEncoder()
+    more_labels.label_embeddings([*labels, "nausea"], tmp_path)
+    assert more_labels.calls == [[*labels, "nausea"]]
+    assert len(list(tmp_path.glob("labels-*.npy"))) == 3
+
+
+def test_batches_over_the_latency_budget_fall_back_to_tfidf():
+    extractor = SymptomExtractor(lazy=True)
+    encoder = StubEncoder(budget_ms=20.0, ms_per_text=5.0)
+    extractor._label_embeddings = encoder.label_embeddings(extractor._label_texts(), None)
+    extractor._bert_encoder = encoder
+    extractor._encoder_loaded = True
+
+    small = extractor.extract_batch(["fever and cough", "headache"])
+    assert {result.source for result in small} == {"distilbert+tfidf+keywords"}
+
+    encoder.calls.clear()
+    large = extractor.extract_batch(["fever and cough"] * 5)
+    assert encoder.calls == []
+    assert encoder.skipped_batches == 1
+    assert {result.source for result in large} == {"tfidf+keywords"}
+    assert large[0].tags == ["cough", "fever"]
@@ -1,18 +1,24 @@
-import { useEffect, useMemo, useState } from "react";
+import { useEffect, useState } from "react";
 import { Link } from "react-router-dom";
 import { api } from "../api/client";
-import { HealthEntry } from "../types";
+import { EntryStats, HealthEntry } from "../types";
 
 export function DashboardPage() {
-  const [entries, setEntries] = useState<HealthEntry[]>([]);
+  const [latest, setLatest] = useState<HealthEntry | undefined>();
+  const [stats, setStats] = useState<EntryStats>({ count: 0, average_risk_score: null });
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState("");
 
   useEffect(() => {
     const load = async () => {
       try {
-        const { data } = await api.get("/health-entries");
-        setEntries(data.data);
+        // Totals come from the stats endpoint; the history list is paginated.
+        const [latestRes, statsRes] = await Promise.all([
+          api.get("/health-entries", { params: { limit: 1 } }),
+          api.get("/health-entries/stats")
+        ]);
+        setLatest(latestRes.data.data[0]);
+        setStats(statsRes.data.data);
       } catch (err: any) {
         setError(err.response?.data?.message || "Failed to load dashboard data");
       } finally {
@@ -22,13 +28,7 @@ export function DashboardPage() {
     load();
   }, []);
 
-  const latest = entries[0];
-  const averageRisk = useMemo(() => {
-    if (!entries.length) return 0;
-    const valid = entries.filter((e) => typeof e.risk_score === "number");
-    if (!valid.length) return 0;
-    return Math.round(valid.reduce((sum, e) => sum + (e.risk_score || 0), 0) / valid.length);
-  }, [entries]);
+  const averageRisk = Math.round(stats.average_risk_score ?? 0);
 
   if (loading) return <p>Loading dashboard...</p>;
   if (error) return <p className="text-[var(--danger)]">{error}</p>;
@@ -54,7 +54,7 @@ export function DashboardPage() {
       <section className="grid gap-4 md:grid-cols-3">
         <article className="panel panel-hover p-4">
           <p className="text-sm subtle">Entries Logged</p>
-          <p className="text-3xl font-bold">{entries.length}</p>
+          <p className="text-3xl font-bold">{stats.count}</p>
         </article>
         <article className="panel panel-hover p-4">
           <p className="text-sm subtle">Average Risk</p>
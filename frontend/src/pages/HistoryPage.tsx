@@ -11,8 +11,17 @@ export function HistoryPage() {
   useEffect(() => {
     const load = async () => {
       try {
-        const { data } = await api.get("/health-entries");
-        setEntries(data.data);
+        // Follow X-Next-Cursor so the chart covers the whole history, not only the first page.
+        const all: HealthEntry[] = [];
+        let cursor: string | undefined;
+        do {
+          const { data, headers } = await api.get("/health-entries", {
+            params: { fields: "summary", limit: 500, cursor }
+          });
+          all.push(...data.data);
+          cursor = headers["x-next-cursor"];
+        } while (cursor);
+        setEntries(all);
       } catch (err: any) {
         setError(err.response?.data?.message || "Failed to load history");
       } finally {
@@ -40,6 +40,11 @@ export interface HealthEntry {
   risk_level?: string;
 }
 
+export interface EntryStats {
+  count: number;
+  average_risk_score: number | null;
+}
+
 export interface PredictionResult {
   symptom_tags: string[];
   predictions: { condition: string; confidence: number; recommended_next_steps: string[] }[];